@@ -0,0 +1,69 @@
+"""Benchmarks the crawl harness against a local HTTP server.
+
+    python benchmarks/crawl.py --pages 200 --workers 1 2 4 --contexts 2
+"""
+
+import argparse
+import http.server
+import pathlib
+import tempfile
+import threading
+
+from playwright_har_tracer.crawl import CrawlOptions, crawl, format_bytes
+
+PAGE = b"""<html><head><title>page</title></head>
+<body><img src="/pixel.gif"><script src="/script.js"></script></body></html>"""
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.endswith(".gif"):
+            body, content_type = b"GIF89a", "image/gif"
+        elif self.path.endswith(".js"):
+            body, content_type = b"void 0;", "application/javascript"
+        else:
+            body, content_type = PAGE, "text/html"
+
+        self.send_response(200)
+        self.send_header("content-type", content_type)
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--contexts", type=int, default=2)
+    args = parser.parse_args()
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f"http://127.0.0.1:{server.server_port}/{i}" for i in range(args.pages)]
+
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for workers in args.workers:
+            report = crawl(
+                urls,
+                pathlib.Path(tmp_dir) / f"crawl-{workers}.har",
+                workers=workers,
+                options=CrawlOptions(contexts=args.contexts),
+            )
+            baseline = baseline or report.pages_per_second / workers
+            speedup = report.pages_per_second / baseline
+            print(  # noqa: T001
+                f"{workers} worker(s): {report.pages_per_second:.1f} pages/sec "
+                f"(x{speedup:.2f} of one worker), "
+                f"max RSS {format_bytes(report.worker_max_rss)} per worker"
+            )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
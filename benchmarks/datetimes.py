@@ -0,0 +1,119 @@
+"""Benchmarks cookie date parsing and page start bookkeeping.
+
+    python benchmarks/datetimes.py --count 100000
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+from typing import Dict
+
+import dateutil.parser
+
+from playwright_har_tracer import dataclasses
+from playwright_har_tracer.utils import (
+    calculate_time,
+    datetime_to_millis,
+    parse_cookie,
+    parse_http_date,
+    set_timings,
+    timing_to_timings,
+)
+
+
+def previous_set_timings(
+    page_entry: dataclasses.har.Page,
+    har_entry: dataclasses.har.Entry,
+    timing: Dict[str, float],
+) -> None:
+    # the implementation converting the page start on every call
+    start_time = timing.get("startTime", 0.0)
+    if datetime_to_millis(page_entry.started_date_time) > start_time:
+        page_entry.started_date_time = datetime.fromtimestamp(start_time / 1000.0)
+
+    har_entry.timings = timing_to_timings(timing)
+    har_entry.time = calculate_time(har_entry.timings)
+
+
+def report(name: str, elapsed: float, count: int) -> None:
+    print(f"{name:>24}: {elapsed / count * 1e6:.2f}us/call")  # noqa: T001
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    values = [
+        f"Wed, {i % 28 + 1:02d} Oct {1970 + i % 60} 07:28:00 GMT"
+        for i in range(args.count)
+    ]
+    cookies = [f"id={i}; Path=/; Expires={value}" for i, value in enumerate(values)]
+
+    for name, func in [
+        ("dateutil", dateutil.parser.parse),
+        ("parse_http_date", parse_http_date),
+    ]:
+        start = time.perf_counter()
+        for value in values:
+            func(value)
+        report(name, time.perf_counter() - start, args.count)
+
+    start = time.perf_counter()
+    for cookie in cookies:
+        parse_cookie(cookie)
+    report("parse_cookie", time.perf_counter() - start, args.count)
+
+    now = time.time() * 1000.0
+    timings = [
+        {"startTime": now + i, "requestStart": 1.0, "responseStart": 2.0}
+        for i in range(args.count)
+    ]
+    page = dataclasses.har.Page(
+        started_date_time=datetime.fromtimestamp(now / 1000.0, timezone.utc),
+        id="page_0",
+        title="",
+        page_timings=dataclasses.har.PageTimings(),
+    )
+    entry = dataclasses.har.Entry(
+        started_date_time=page.started_date_time,
+        time=-1,
+        request=dataclasses.har.Request(
+            method="GET",
+            url="http://example.com/",
+            http_version="HTTP/1.1",
+            cookies=[],
+            headers=[],
+            query_string=[],
+            headers_size=-1,
+            body_size=0,
+        ),
+        response=dataclasses.har.Response(
+            status=200,
+            status_text="OK",
+            http_version="HTTP/1.1",
+            cookies=[],
+            headers=[],
+            content=dataclasses.har.Content(size=-1, mime_type="x-unknown"),
+            headers_size=-1,
+            body_size=-1,
+            redirect_url="",
+        ),
+        cache=dataclasses.har.Cache(),
+        timings=dataclasses.har.Timings(send=-1, wait=-1, receive=-1),
+    )
+
+    start = time.perf_counter()
+    for timing in timings:
+        previous_set_timings(page, entry, timing)
+    report("set_timings (datetime)", time.perf_counter() - start, args.count)
+
+    started = datetime_to_millis(page.started_date_time)
+    start = time.perf_counter()
+    for timing in timings:
+        started = set_timings(page, entry, timing, started)
+    report("set_timings (millis)", time.perf_counter() - start, args.count)
+
+
+if __name__ == "__main__":
+    main()
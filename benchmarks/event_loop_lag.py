@@ -0,0 +1,68 @@
+"""Measures event loop lag while base64-encoding large bodies.
+
+    python benchmarks/event_loop_lag.py --bodies 20 --size 8
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from playwright_har_tracer.utils import body_to_base64, run_body_task
+
+
+async def measure_lag(stop: asyncio.Event, interval: float = 0.001) -> List[float]:
+    lags: List[float] = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+    return lags
+
+
+async def run(
+    bodies: int, size: int, executor: Optional[ThreadPoolExecutor]
+) -> List[float]:
+    body = b"\x00" * size
+    stop = asyncio.Event()
+    ticker = asyncio.ensure_future(measure_lag(stop))
+
+    await asyncio.gather(
+        *[run_body_task(body_to_base64, body, executor=executor) for _ in range(bodies)]
+    )
+
+    stop.set()
+    return await ticker
+
+
+def report(name: str, lags: List[float], elapsed: float) -> None:
+    lags = sorted(lags) or [0.0]
+    p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+    print(  # noqa: T001
+        f"{name:>8}: elapsed={elapsed:.3f}s max_lag={lags[-1] * 1000:.1f}ms "
+        f"p99_lag={p99 * 1000:.1f}ms ticks={len(lags)}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bodies", type=int, default=20)
+    parser.add_argument("--size", type=int, default=8, help="body size in MB")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    size = args.size * 1024 * 1024
+
+    started = time.perf_counter()
+    lags = asyncio.run(run(args.bodies, size, None))
+    report("inline", lags, time.perf_counter() - started)
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        started = time.perf_counter()
+        lags = asyncio.run(run(args.bodies, size, executor))
+        report("executor", lags, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmarks merging, splitting, sharding and diffing of (large) HAR files.
+
+    python benchmarks/har_operations.py --entries 1000000 --files 4
+
+Each synthetic entry is roughly 1 KB, so 1,000,000 entries per file make a
+~1 GB HAR file. Peak RSS shows that memory stays bounded by the chunk size.
+"""
+
+import argparse
+import pathlib
+import resource
+import tempfile
+import time
+from typing import Any, Dict
+
+from playwright_har_tracer.diff import diff_har_files
+from playwright_har_tracer.operations import (
+    by_domain,
+    merge_har_files,
+    shard_har_file,
+    split_har_file,
+)
+from playwright_har_tracer.streaming import HarWriter, iter_log
+
+
+def make_entry(i: int, page: int) -> Dict[str, Any]:
+    return {
+        "pageref": f"page_{page}",
+        "startedDateTime": "2021-01-23T13:29:25.707+00:00",
+        "time": 12.5,
+        "request": {
+            "method": "GET",
+            "url": f"https://host{i % 100}.example.com/path/{i}?q={'x' * 64}",
+            "httpVersion": "HTTP/1.1",
+            "cookies": [],
+            "headers": [{"name": f"x-header-{j}", "value": "v" * 32} for j in range(8)],
+            "queryString": [{"name": "q", "value": "x" * 64}],
+            "headersSize": -1,
+            "bodySize": 0,
+        },
+        "response": {
+            "status": 200,
+            "statusText": "OK",
+            "httpVersion": "HTTP/1.1",
+            "cookies": [],
+            "headers": [],
+            "content": {"size": 0, "mimeType": "text/html"},
+            "headersSize": -1,
+            "bodySize": -1,
+            "redirectURL": "",
+        },
+        "cache": {},
+        "timings": {"send": 0, "wait": 10, "receive": 2.5},
+    }
+
+
+def generate(path: pathlib.Path, entries: int, pages: int) -> None:
+    with open(path, "w") as f, HarWriter(
+        f, creator={"name": "benchmark", "version": "0"}
+    ) as writer:
+        for page in range(pages):
+            writer.add_page(
+                {
+                    "startedDateTime": "2021-01-23T13:29:25.702+00:00",
+                    "id": f"page_{page}",
+                    "title": "",
+                    "pageTimings": {},
+                }
+            )
+        for i in range(entries):
+            writer.add_entry(make_entry(i, i % pages))
+
+
+def timed(name: str, func, *args, **kwargs) -> Any:
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - started
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{name:>8}: {elapsed:.2f}s (peak RSS {max_rss:.1f} MB)")  # noqa: T001
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--files", type=int, default=2)
+    parser.add_argument("--shards", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = pathlib.Path(tmp)
+        inputs = [directory / f"input_{i}.har" for i in range(args.files)]
+        for path in inputs:
+            timed("generate", generate, path, args.entries, args.pages)
+
+        size = sum(path.stat().st_size for path in inputs) / 1024 / 1024
+        print(f"input: {size:.1f} MB in {args.files} file(s)")  # noqa: T001
+
+        merged = directory / "merged.har"
+        timed("merge", merge_har_files, inputs, merged)
+        timed("split", split_har_file, merged, directory / "split", by_domain)
+        timed("shard", shard_har_file, merged, directory / "shards", args.shards)
+        if args.files > 1:
+            timed("diff", diff_har_files, inputs[0], inputs[1])
+
+        with open(merged) as f:
+            pages = sum(1 for name, _ in iter_log(f) if name == "pages")
+        assert pages == args.pages * args.files
+
+
+if __name__ == "__main__":
+    main()
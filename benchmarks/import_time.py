@@ -0,0 +1,44 @@
+"""Benchmarks the import time of the package and of the models.
+
+    python benchmarks/import_time.py --runs 10
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+STATEMENTS = [
+    "import playwright_har_tracer",
+    "from playwright_har_tracer.dataclasses.har import Har",
+    "from playwright_har_tracer import HarTracer",
+]
+
+
+def measure(statement: str) -> float:
+    # a fresh interpreter per run, as a worker process would be
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], check=True)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = statistics.median(measure("pass") for _ in range(args.runs))
+    print(f"{'interpreter startup':>56}: {baseline * 1000:.1f}ms")  # noqa: T001
+
+    for statement in STATEMENTS:
+        elapsed = statistics.median(measure(statement) for _ in range(args.runs))
+        print(f"{statement:>56}: +{(elapsed - baseline) * 1000:.1f}ms")  # noqa: T001
+
+    print(  # noqa: T001
+        "\nper module times: python -X importtime -c 'import playwright_har_tracer'"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmarks query string parsing on tracking-pixel style URLs.
+
+    python benchmarks/query_params.py --params 200 --iterations 2000
+"""
+
+import argparse
+import timeit
+from typing import List
+from urllib.parse import parse_qs, urlencode
+
+from playwright_har_tracer import dataclasses
+from playwright_har_tracer.utils import query_to_query_params
+
+
+def previous_query_to_query_params(
+    query: str,
+) -> List[dataclasses.har.QueryParameter]:
+    # the implementation based on parse_qs (duplicated keys are concatenated)
+    query_params: List[dataclasses.har.QueryParameter] = []
+    for name, values in parse_qs(query).items():
+        query_params.append(
+            dataclasses.har.QueryParameter(name=name, value="".join(values))
+        )
+    return query_params
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--params", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    query = urlencode(
+        [(f"ev{i % 50}", f"value-{i}-" + "x" * 32) for i in range(args.params)]
+    )
+    print(f"query length: {len(query)}")  # noqa: T001
+
+    for name, func in [
+        ("parse_qs", previous_query_to_query_params),
+        ("single-pass", query_to_query_params),
+    ]:
+        elapsed = timeit.timeit(lambda: func(query), number=args.iterations)
+        per_call = elapsed / args.iterations * 1e6
+        print(f"{name:>11}: {per_call:.1f}us/call")  # noqa: T001
+
+    for name, func in [
+        ("parse_qs", previous_query_to_query_params),
+        ("single-pass", query_to_query_params),
+    ]:
+        elapsed = timeit.timeit(lambda: func(""), number=args.iterations * 100)
+        per_call = elapsed / (args.iterations * 100) * 1e6
+        print(f"{name:>11}: {per_call:.3f}us/call (empty query)")  # noqa: T001
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,35 @@
-from .constants import __version__
-from .har_tracer import HarTracer
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
-__all__ = ["HarTracer", "__version__"]
+if TYPE_CHECKING:
+    from .constants import __version__
+    from .har_tracer import HarTracer
+    from .sync_har_tracer import SyncHarTracer
+
+__all__ = ["HarTracer", "SyncHarTracer", "__version__"]
+
+# the tracers (and Playwright) are imported on first use, so that workers
+# which only handle HARs don't pay for them
+_LAZY_ATTRIBUTES = {
+    "HarTracer": ".har_tracer",
+    "SyncHarTracer": ".sync_har_tracer",
+    "__version__": ".constants",
+}
+_LAZY_MODULES = {"dataclasses"}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_MODULES:
+        return importlib.import_module(f".{name}", __name__)
+
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | _LAZY_MODULES)
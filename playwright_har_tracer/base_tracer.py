@@ -0,0 +1,159 @@
+import copy
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+from . import dataclasses
+from .constants import CREATOR_NAME, HAR_VERSION, package_version
+from .index import HarIndex
+from .processors import Pipeline, Processor, remove_entry
+from .utils import BINARY_POST_DATA_MODES, finalize_page_timings
+
+
+class BaseHarTracer:
+    """The log bookkeeping shared by HarTracer and SyncHarTracer.
+
+    Keeps the context level log, the index and the entries which haven't gone
+    through completion (and the processors) yet. Subclasses record events and
+    run the enrichment, then complete entries and pages through it.
+    """
+
+    def __init__(
+        self,
+        browser_name: str,
+        browser_version: str,
+        *,
+        index: bool = False,
+        binary_post_data: str = "omit",
+        max_post_data_size: Optional[int] = None,
+        processors: Optional[Sequence[Processor]] = None,
+    ):
+        if binary_post_data not in BINARY_POST_DATA_MODES:
+            raise ValueError(
+                f"binary_post_data should be one of {BINARY_POST_DATA_MODES}"
+            )
+
+        self._index: Optional[HarIndex] = HarIndex() if index else None
+        self._binary_post_data = binary_post_data
+        self._max_post_data_size = max_post_data_size
+        self._pipeline: Optional[Pipeline] = (
+            Pipeline(processors) if processors else None
+        )
+
+        # entries which haven't gone through completion (and the processors)
+        self._unprocessed: Dict[int, dataclasses.har.Entry] = {}
+        self._last_page: int = 0
+
+        self._creator = dataclasses.har.Creator(
+            name=CREATOR_NAME, version=package_version()
+        )
+        self._browser = dataclasses.har.Browser(
+            name=browser_name, version=browser_version
+        )
+        self._log = self._new_log()
+
+    def _new_log(self) -> dataclasses.har.Log:
+        return dataclasses.har.Log(
+            version=HAR_VERSION,
+            creator=copy.copy(self._creator),
+            browser=copy.copy(self._browser),
+            pages=[],
+            entries=[],
+        )
+
+    @property
+    def index(self) -> Optional[HarIndex]:
+        return self._index
+
+    def _add_page(self, started: float) -> dataclasses.har.Page:
+        """Adds a page to the log, started at the epoch time in seconds."""
+        page_entry = dataclasses.har.Page(
+            started_date_time=datetime.fromtimestamp(started, timezone.utc),
+            id=f"page_{self._last_page}",
+            title="",
+            page_timings=dataclasses.har.PageTimings(on_content_load=-1, on_load=-1),
+        )
+        self._last_page += 1
+        self._log.pages.append(page_entry)
+        return page_entry
+
+    def _add_entry(
+        self,
+        har_entry: dataclasses.har.Entry,
+        page_entries: List[dataclasses.har.Entry],
+    ) -> None:
+        self._log.entries.append(har_entry)
+        page_entries.append(har_entry)
+        self._unprocessed[id(har_entry)] = har_entry
+
+    def _process_entry(
+        self,
+        har_entry: dataclasses.har.Entry,
+        page_entries: Optional[List[dataclasses.har.Entry]],
+    ) -> bool:
+        """Runs the processors on a completed entry and indexes it.
+
+        Returns False if the entry shouldn't be passed on, i.e. it's dropped
+        by the processors or it was handed off with its page already.
+        """
+        if self._unprocessed.pop(id(har_entry), None) is None:
+            # the entry was handed off with its page already
+            return False
+
+        if self._pipeline is not None and not self._pipeline.process(har_entry):
+            # drop the entry before it's indexed, passed on or serialized
+            remove_entry(self._log.entries, har_entry)
+            if page_entries is not None:
+                remove_entry(page_entries, har_entry)
+            return False
+
+        if self._index is not None:
+            self._index.add(har_entry)
+
+        return True
+
+    def _hand_off_page(
+        self,
+        page_entry: dataclasses.har.Page,
+        page_entries: List[dataclasses.har.Entry],
+    ) -> dataclasses.har.Har:
+        """Drops a closed page (and its entries) from the log and returns its HAR."""
+        finalize_page_timings(page_entry)
+
+        # drop the page and its entries from the context level log
+        entry_ids = {id(entry) for entry in page_entries}
+        self._log.pages = [page for page in self._log.pages if page is not page_entry]
+        self._log.entries = [
+            entry for entry in self._log.entries if id(entry) not in entry_ids
+        ]
+        if self._index is not None:
+            self._index.remove_page(page_entry.id)
+
+        # entries of requests which didn't complete are handed off as they are
+        for entry in list(page_entries):
+            if self._unprocessed.pop(id(entry), None) is None:
+                continue
+
+            entry._incomplete = True
+            if self._pipeline is not None and not self._pipeline.process(entry):
+                remove_entry(page_entries, entry)
+
+        log = self._new_log()
+        log.pages.append(page_entry)
+        log.entries.extend(page_entries)
+        return dataclasses.har.Har(log=log)
+
+    def _snapshot_log(self) -> dataclasses.har.Log:
+        """A copy of the log, with the pending entries processed as they are."""
+        log = copy.deepcopy(self._log)
+        if self._pipeline is not None and len(self._unprocessed) > 0:
+            # entries of pending (or abandoned) requests are processed as they
+            # are, on the copy so that they're completed as usual later on
+            log.entries = [
+                copied
+                for entry, copied in zip(self._log.entries, log.entries)
+                if id(entry) not in self._unprocessed or self._pipeline.process(copied)
+            ]
+        for page_entry in log.pages:
+            finalize_page_timings(page_entry)
+
+        return log
@@ -0,0 +1,161 @@
+import hashlib
+import mimetypes
+import mmap
+import os
+import pathlib
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple, Union
+
+DEFAULT_CHUNK_SIZE: int = 64 * 1024
+
+Body = Union[bytes, mmap.mmap, memoryview]
+
+
+def extension_for(mime_type: Optional[str]) -> str:
+    if mime_type is None:
+        return ".dat"
+
+    extension = mimetypes.guess_extension(mime_type.split(";")[0].strip())
+    return extension or ".dat"
+
+
+class BodyStore(ABC):
+    """Stores response bodies outside of HAR entries.
+
+    write() returns a reference which is kept in the entry's content._file.
+    """
+
+    @abstractmethod
+    def write(self, body: bytes, mime_type: Optional[str] = None) -> str:
+        """Stores a body and returns its reference."""
+
+    @abstractmethod
+    def read(self, name: str) -> bytes:
+        """Returns the body of a reference."""
+
+    def map(self, name: str) -> Body:
+        """Returns a body, memory-mapped if the store supports it."""
+        return self.read(name)
+
+
+class FileBodyStore(BodyStore):
+    """Writes each body into its own file, named by its SHA-1 digest.
+
+    Bodies are written in chunks of chunk_size bytes and identical bodies are
+    stored only once.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, pathlib.Path],
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size should be a positive integer")
+
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+
+    def write(self, body: bytes, mime_type: Optional[str] = None) -> str:
+        name = hashlib.sha1(body).hexdigest() + extension_for(mime_type)
+        path = self.directory / name
+        if path.exists():
+            return name
+
+        # write into a temporary file first so that a partial write is never
+        # picked up as a stored body. The same body may be written
+        # concurrently, so each write has its own temporary file.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=name, suffix=".tmp")
+        view = memoryview(body)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for offset in range(0, len(view), self.chunk_size):
+                    f.write(view[offset : offset + self.chunk_size])
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        return name
+
+    def read(self, name: str) -> bytes:
+        with open(self.directory / name, "rb") as f:
+            return f.read()
+
+    def map(self, name: str) -> Body:
+        with open(self.directory / name, "rb") as f:
+            # an empty file can't be mapped
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class SpoolBodyStore(BodyStore):
+    """Appends bodies to a single spool file.
+
+    References are "<offset>:<length>" in the spool, so entries keep neither
+    the body nor a file per body. map() returns a view of a memory map of the
+    spool, so that bodies are read back without copies (see HarWriter's
+    body_store). Writes are serialized, so the store can be written from
+    executor threads.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, pathlib.Path],
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size should be a positive integer")
+
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+
+    def write(self, body: bytes, mime_type: Optional[str] = None) -> str:
+        view = memoryview(body)
+        with self._lock:
+            offset = self._size
+            for start in range(0, len(view), self.chunk_size):
+                self._file.write(view[start : start + self.chunk_size])
+            self._size += len(view)
+
+        return f"{offset}:{len(view)}"
+
+    def span(self, name: str) -> Tuple[int, int]:
+        offset, _, length = name.partition(":")
+        return int(offset), int(length)
+
+    def read(self, name: str) -> bytes:
+        return bytes(self.map(name))
+
+    def map(self, name: str) -> Body:
+        offset, length = self.span(name)
+        if length == 0:
+            return b""
+
+        end = offset + length
+        with self._lock:
+            if self._mmap is None or end > len(self._mmap):
+                self._file.flush()
+                # views of the previous map keep it alive until released
+                with open(self.path, "rb") as f:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            return memoryview(self._mmap)[offset:end]
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+            self._mmap = None
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from playwright.async_api import BrowserContext, CDPSession, Error, Page
+
+from . import dataclasses
+from .utils import normalize_http_version
+
+logger = logging.getLogger(__name__)
+
+# records are matched by method and URL, so that e.g. a CORS preflight
+# (which Playwright doesn't report) isn't taken for the actual request
+RecordKey = Tuple[str, str]
+
+
+@dataclass
+class CDPRecord:
+    method: str
+    url: str
+    response: Optional[dataclasses.cdp.Response] = None
+    encoded_data_length: Optional[int] = None
+    finished: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class CDPNetworkCollector:
+    """Collects Network.* events of a page through a dedicated CDP session.
+
+    Records are matched to Playwright requests by method and URL (in order),
+    since Playwright does not expose CDP request IDs.
+    """
+
+    def __init__(self, timeout: float = 1.0) -> None:
+        self._timeout = timeout
+        self._session: Optional[CDPSession] = None
+        self._records: Dict[str, CDPRecord] = {}
+        self._queues: Dict[RecordKey, Deque[CDPRecord]] = defaultdict(deque)
+        self._arrivals: Dict[RecordKey, asyncio.Event] = defaultdict(asyncio.Event)
+        self._attached = asyncio.Event()
+
+    async def attach(self, context: BrowserContext, page: Page) -> None:
+        try:
+            session = await context.new_cdp_session(page)
+            session.on("Network.requestWillBeSent", self._on_request_will_be_sent)
+            session.on("Network.responseReceived", self._on_response_received)
+            session.on("Network.loadingFinished", self._on_loading_finished)
+            session.on("Network.loadingFailed", self._on_loading_failed)
+            await session.send("Network.enable")
+            self._session = session
+        except Error as e:
+            # e.g. the page was closed before the session was attached, the
+            # page's requests get their details from Playwright then
+            logger.debug("failed to attach a CDP session: %s", e)
+        finally:
+            # a failed attach must not keep waiters waiting
+            self._attached.set()
+
+    async def wait_attached(self) -> None:
+        await self._attached.wait()
+
+    async def detach(self) -> None:
+        if self._session is not None:
+            session, self._session = self._session, None
+            try:
+                await session.detach()
+            except Exception:
+                # the page (and the session) may have been closed already
+                pass
+
+        self._records.clear()
+        self._queues.clear()
+        self._arrivals.clear()
+
+    def _add_record(self, request_id: str, method: str, url: str) -> None:
+        record = CDPRecord(method=method, url=url)
+        self._records[request_id] = record
+        self._queues[(method, url)].append(record)
+        self._arrivals[(method, url)].set()
+
+    def _on_request_will_be_sent(self, params: Dict[str, Any]) -> None:
+        request_id: str = params["requestId"]
+
+        redirect_response = params.get("redirectResponse")
+        previous = self._records.pop(request_id, None)
+        if previous is not None and redirect_response is not None:
+            # a redirect reuses the request ID, the previous hop is finished here
+            previous.response = dataclasses.cdp.Response.from_dict(redirect_response)
+            previous.encoded_data_length = previous.response.encoded_data_length
+            previous.finished.set()
+
+        request = params["request"]
+        self._add_record(request_id, request["method"], request["url"])
+
+    def _on_response_received(self, params: Dict[str, Any]) -> None:
+        record = self._records.get(params["requestId"])
+        if record is not None:
+            record.response = dataclasses.cdp.Response.from_dict(params["response"])
+
+    def _on_loading_finished(self, params: Dict[str, Any]) -> None:
+        record = self._records.pop(params["requestId"], None)
+        if record is not None:
+            record.encoded_data_length = int(params.get("encodedDataLength", -1))
+            record.finished.set()
+
+    def _on_loading_failed(self, params: Dict[str, Any]) -> None:
+        record = self._records.pop(params["requestId"], None)
+        if record is not None:
+            record.finished.set()
+
+    def _pop(self, key: RecordKey) -> Optional[CDPRecord]:
+        queue = self._queues.get(key)
+        if queue is None or len(queue) == 0:
+            return None
+
+        record = queue.popleft()
+        if len(queue) == 0:
+            self._queues.pop(key, None)
+            self._arrivals.pop(key, None)
+        return record
+
+    def discard(self, method: str, url: str) -> None:
+        """Drops the record of a request which won't be taken (e.g. it failed)."""
+        self._pop((method, url))
+
+    async def take(self, method: str, url: str) -> Optional[CDPRecord]:
+        if self._attached.is_set() and self._session is None:
+            # no session (it couldn't be attached, or it's detached)
+            return None
+
+        key = (method, url)
+        queue = self._queues.get(key)
+        if queue is None or len(queue) == 0:
+            arrival = self._arrivals[key]
+            arrival.clear()
+            try:
+                await asyncio.wait_for(arrival.wait(), self._timeout)
+            except asyncio.TimeoutError:
+                # nothing arrived, so nobody else waits for the key either
+                if len(self._queues.get(key, ())) == 0:
+                    self._arrivals.pop(key, None)
+                return None
+
+        record = self._pop(key)
+        if record is None:
+            return None
+
+        try:
+            await asyncio.wait_for(record.finished.wait(), self._timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        return record
+
+
+def from_cache(response: dataclasses.cdp.Response) -> Optional[str]:
+    if response.from_disk_cache:
+        return "disk"
+
+    if response.from_prefetch_cache:
+        return "prefetch"
+
+    if response.from_service_worker:
+        return "service-worker"
+
+    return None
+
+
+def update_entry(har_entry: dataclasses.har.Entry, record: CDPRecord) -> None:
+    response = record.response
+    if response is None:
+        return
+
+    http_version = normalize_http_version(response.protocol)
+    har_entry.request.http_version = http_version
+    har_entry.response.http_version = http_version
+
+    if response.request_headers_text:
+        har_entry.request.headers_size = len(response.request_headers_text)
+
+    if response.headers_text:
+        har_entry.response.headers_size = len(response.headers_text)
+
+    if record.encoded_data_length is not None and record.encoded_data_length >= 0:
+        har_entry.response._transfer_size = record.encoded_data_length
+        if har_entry.response.headers_size >= 0:
+            har_entry.response.body_size = max(
+                record.encoded_data_length - har_entry.response.headers_size, 0
+            )
+
+    har_entry.connection = str(int(response.connection_id))
+    har_entry.response._from_cache = from_cache(response)
+
+    if response.remote_ip_address is not None:
+        har_entry.server_ip_address = response.remote_ip_address
+        har_entry._server_port = response.remote_port
+
+    if response.security_details is not None:
+        har_entry._security_details = dataclasses.har.SecurityDetails.from_dict(
+            response.security_details
+        )
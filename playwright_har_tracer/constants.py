@@ -1,11 +1,36 @@
-import importlib.metadata
+import functools
+from typing import Any
 
 NAME: str = "playwright-har-tracer"
 
-__version__ = importlib.metadata.version(NAME)
-
 HAR_VERSION: str = "1.2"
 CREATOR_NAME: str = NAME
-CREATOR_VERSION: str = __version__
 
 FALLBACK_HTTP_VERSION: str = "HTTP/1.1"
+
+# both timings are collected in a single evaluation after the load event, as
+# absolute timestamps in milliseconds
+PAGE_TIMINGS_SCRIPT: str = """() => {
+    const [navigation] = performance.getEntriesByType("navigation");
+    return {
+        title: document.title,
+        domContentLoaded: navigation ? performance.timeOrigin + navigation.domContentLoadedEventStart : -1,
+        loaded: navigation ? performance.timeOrigin + navigation.loadEventStart : -1,
+    };
+}"""
+
+
+@functools.lru_cache(maxsize=None)
+def package_version() -> str:
+    # importlib.metadata scans the installed distributions, so the version
+    # is looked up on first use
+    import importlib.metadata
+
+    return importlib.metadata.version(NAME)
+
+
+def __getattr__(name: str) -> Any:
+    if name in ("__version__", "CREATOR_VERSION"):
+        return package_version()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
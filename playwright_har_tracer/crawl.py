@@ -0,0 +1,399 @@
+"""A multiprocess crawl harness.
+
+URLs are handed out to worker processes through a queue. Each worker runs its
+own browser with a pool of contexts (each with a HarTracer), writes a HAR file
+per URL (with the pages it opened, e.g. popups) and reports it back. The HARs
+are merged into one (page IDs renumbered) in the order of the URLs.
+
+    python -m playwright_har_tracer.crawl urls.txt -o crawl.har --workers 4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import pathlib
+import queue
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .operations import Path, merge_har_files
+from .streaming import write_har
+
+BROWSER_NAMES = ("chromium", "firefox", "webkit")
+# how long the parent waits for a result before checking on the workers
+POLL_INTERVAL: float = 1.0
+
+
+@dataclass
+class CrawlOptions:
+    browser_name: str = "chromium"
+    # the number of contexts (i.e. pages crawled concurrently) per worker
+    contexts: int = 2
+    # the navigation timeout in seconds
+    timeout: float = 30.0
+    omit_content: bool = True
+
+
+@dataclass
+class PageResult:
+    index: int
+    url: str
+    # None if no HAR was written
+    path: Optional[str]
+    error: Optional[str] = None
+
+
+@dataclass
+class WorkerResult:
+    worker: int
+    pages: int
+    max_rss: Optional[int] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class CrawlReport:
+    # the number of pages with a HAR
+    pages: int
+    entries: int
+    elapsed: float
+    # (url, error) of pages which failed to load (or to be crawled at all)
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+    workers: List[WorkerResult] = field(default_factory=list)
+    max_rss: Optional[int] = None
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def worker_max_rss(self) -> Optional[int]:
+        values = [worker.max_rss for worker in self.workers if worker.max_rss]
+        return max(values) if values else None
+
+
+def max_rss() -> Optional[int]:
+    """The peak RSS of the current process in bytes (None if unknown)."""
+    try:
+        import resource
+    except ImportError:  # pragma: no cover
+        # Windows
+        return None
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def read_urls(fp: IO[str]) -> List[str]:
+    """Reads URLs, one per line. Blank lines and # comments are skipped."""
+    urls: List[str] = []
+    for line in fp:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            urls.append(line)
+
+    return urls
+
+
+async def crawl_slot(
+    browser: Any,
+    options: CrawlOptions,
+    work_dir: pathlib.Path,
+    urls: Any,
+    results: Any,
+) -> int:
+    # Playwright is imported in the workers only
+    from playwright.async_api import Error
+
+    from .har_tracer import HarTracer
+
+    context = await browser.new_context()
+    completed: "asyncio.Queue[Any]" = asyncio.Queue()
+    tracer = HarTracer(
+        context=context,
+        browser_name=options.browser_name,
+        omit_content=options.omit_content,
+        on_page_complete=completed.put,
+    )
+
+    # IDs of the pages opened during a visit (e.g. popups). The tracer's
+    # handler is registered first, so the pages are traced by then.
+    opened: List[Optional[str]] = []
+    context.on("page", lambda page: opened.append(tracer.page_id(page)))
+    # completed HARs by page ID, as pages complete in any order
+    hars: Dict[str, Any] = {}
+
+    async def visit(url: str) -> Tuple[Any, Optional[str]]:
+        opened.clear()
+        page = await context.new_page()
+        page_id = tracer.page_id(page)
+        if page_id is None:
+            raise RuntimeError("the page isn't traced")
+
+        error: Optional[str] = None
+        try:
+            await page.goto(url, timeout=options.timeout * 1000)
+        except Error as e:
+            error = str(e)
+
+        # the tracer completes a page's HAR once the page is closed, and
+        # closing a page may still let another one open
+        while len(context.pages) > 0:
+            for other in context.pages:
+                await other.close()
+
+        page_ids = [other for other in opened if other is not None]
+        while not all(other in hars for other in page_ids):
+            har = await completed.get()
+            hars[har.log.pages[0].id] = har
+
+        har = hars.pop(page_id)
+        for other in page_ids:
+            if other == page_id:
+                continue
+
+            popup = hars.pop(other)
+            har.log.pages.extend(popup.log.pages)
+            har.log.entries.extend(popup.log.entries)
+
+        return har, error
+
+    loop = asyncio.get_running_loop()
+    pages = 0
+    try:
+        while True:
+            item = await loop.run_in_executor(None, urls.get)
+            if item is None:
+                return pages
+
+            index, url = item
+            try:
+                har, error = await visit(url)
+
+                path = work_dir / f"{index}.har"
+                with open(path, "w") as f:
+                    write_har(har, f)
+            except Exception as e:
+                # the URL is reported rather than lost with the worker
+                error = f"{type(e).__name__}: {e}"
+                results.put(PageResult(index=index, url=url, path=None, error=error))
+                continue
+
+            results.put(PageResult(index=index, url=url, path=str(path), error=error))
+            pages += 1
+    finally:
+        await context.close()
+
+
+async def run_worker_async(
+    options: CrawlOptions, work_dir: pathlib.Path, urls: Any, results: Any
+) -> int:
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        browser = await getattr(p, options.browser_name).launch()
+        try:
+            counts = await asyncio.gather(
+                *[
+                    crawl_slot(browser, options, work_dir, urls, results)
+                    for _ in range(options.contexts)
+                ]
+            )
+        finally:
+            await browser.close()
+
+    return sum(counts)
+
+
+def run_worker(
+    worker: int, options: CrawlOptions, work_dir: str, urls: Any, results: Any
+) -> None:
+    pages = 0
+    error: Optional[str] = None
+    try:
+        pages = asyncio.run(
+            run_worker_async(options, pathlib.Path(work_dir), urls, results)
+        )
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+
+    results.put(
+        WorkerResult(worker=worker, pages=pages, max_rss=max_rss(), error=error)
+    )
+
+
+def unseen_pages(urls: List[str], pages: Iterable[PageResult]) -> List[PageResult]:
+    """Failed results of the URLs no worker reported on (e.g. as it died)."""
+    seen = {page.index for page in pages}
+    return [
+        PageResult(index=index, url=url, path=None, error="not crawled")
+        for index, url in enumerate(urls)
+        if index not in seen
+    ]
+
+
+def crawl(
+    urls: Iterable[str],
+    output: Path,
+    *,
+    workers: Optional[int] = None,
+    options: Optional[CrawlOptions] = None,
+    work_dir: Optional[Path] = None,
+) -> CrawlReport:
+    """Crawls URLs with worker processes and merges the HARs into output.
+
+    Per-page HARs are written into work_dir (a temporary directory, removed
+    afterwards, by default).
+    """
+    options = options or CrawlOptions()
+    if options.browser_name not in BROWSER_NAMES:
+        raise ValueError(f"browser_name should be one of {BROWSER_NAMES}")
+    if options.contexts <= 0:
+        raise ValueError("contexts should be a positive integer")
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 0:
+        raise ValueError("workers should be a positive integer")
+
+    if work_dir is None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            return _crawl(list(urls), output, workers, options, pathlib.Path(tmp_dir))
+
+    work_dir = pathlib.Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    return _crawl(list(urls), output, workers, options, work_dir)
+
+
+def _crawl(
+    urls: List[str],
+    output: Path,
+    workers: int,
+    options: CrawlOptions,
+    work_dir: pathlib.Path,
+) -> CrawlReport:
+    # Playwright doesn't survive a fork
+    ctx = multiprocessing.get_context("spawn")
+    url_queue = ctx.Queue()
+    result_queue = ctx.Queue()
+
+    for item in enumerate(urls):
+        url_queue.put(item)
+    # a sentinel per context
+    for _ in range(workers * options.contexts):
+        url_queue.put(None)
+
+    start = time.perf_counter()
+    processes = [
+        ctx.Process(
+            target=run_worker,
+            args=(worker, options, str(work_dir), url_queue, result_queue),
+            daemon=True,
+        )
+        for worker in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    pages: List[PageResult] = []
+    worker_results: List[WorkerResult] = []
+    while len(worker_results) < workers:
+        try:
+            result: Union[PageResult, WorkerResult] = result_queue.get(
+                timeout=POLL_INTERVAL
+            )
+        except queue.Empty:
+            # a worker which died without reporting is not waited for
+            if not any(process.is_alive() for process in processes):
+                break
+            continue
+
+        if isinstance(result, WorkerResult):
+            worker_results.append(result)
+        else:
+            pages.append(result)
+
+    for process in processes:
+        process.join()
+
+    pages.extend(unseen_pages(urls, pages))
+    pages.sort(key=lambda page: page.index)
+    paths = [page.path for page in pages if page.path is not None]
+    entries = merge_har_files(paths, output)
+    elapsed = time.perf_counter() - start
+
+    return CrawlReport(
+        pages=len(paths),
+        entries=entries,
+        elapsed=elapsed,
+        failed=[(page.url, page.error) for page in pages if page.error is not None],
+        workers=sorted(worker_results, key=lambda worker: worker.worker),
+        max_rss=max_rss(),
+    )
+
+
+def format_bytes(value: Optional[int]) -> str:
+    if value is None:
+        return "unknown"
+
+    return f"{value / 1024 / 1024:.1f}MiB"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Crawls URLs with worker processes into a single HAR."
+    )
+    parser.add_argument("urls", help="a file with a URL per line (- for stdin)")
+    parser.add_argument("-o", "--output", required=True, help="the HAR to write")
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("-c", "--contexts", type=int, default=2)
+    parser.add_argument("--browser", choices=BROWSER_NAMES, default="chromium")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--with-content", action="store_true")
+    parser.add_argument("--work-dir", help="where to keep the per-page HARs")
+    args = parser.parse_args(argv)
+
+    if args.urls == "-":
+        urls = read_urls(sys.stdin)
+    else:
+        with open(args.urls) as f:
+            urls = read_urls(f)
+
+    report = crawl(
+        urls,
+        args.output,
+        workers=args.workers,
+        options=CrawlOptions(
+            browser_name=args.browser,
+            contexts=args.contexts,
+            timeout=args.timeout,
+            omit_content=not args.with_content,
+        ),
+        work_dir=args.work_dir,
+    )
+
+    print(  # noqa: T001
+        f"{report.pages}/{len(urls)} pages, {report.entries} entries "
+        f"in {report.elapsed:.1f}s ({report.pages_per_second:.2f} pages/sec)"
+    )
+    print(  # noqa: T001
+        f"max RSS: {format_bytes(report.worker_max_rss)} per worker, "
+        f"{format_bytes(report.max_rss)} in the parent"
+    )
+    for url, error in report.failed:
+        print(f"failed: {url}: {error}", file=sys.stderr)  # noqa: T001
+    for worker in report.workers:
+        if worker.error is not None:
+            print(  # noqa: T001
+                f"worker {worker.worker} failed: {worker.error}", file=sys.stderr
+            )
+
+    return 0 if report.pages == len(urls) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,15 @@
-from . import cdp, har
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from . import cdp, har
 
 __all__ = ["har", "cdp"]
+
+
+def __getattr__(name: str) -> Any:
+    # the models are imported on first use
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
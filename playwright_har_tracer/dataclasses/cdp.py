@@ -1,9 +1,7 @@
 from dataclasses import dataclass, field
 from typing import Any, Dict, Optional
 
-from dataclasses_json.cfg import config
-
-from .mixin import CustomizedDataClassJsonMixin
+from .mixin import CustomizedDataClassJsonMixin, config
 
 
 @dataclass
@@ -30,3 +28,4 @@ class Response(CustomizedDataClassJsonMixin):
     timing: Optional[Dict[str, float]] = None
     protocol: Optional[str] = None
     headers_text: Optional[str] = None
+    security_details: Optional[Dict[str, Any]] = None
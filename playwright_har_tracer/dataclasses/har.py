@@ -2,10 +2,8 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import List, Optional, Union
 
-from dataclasses_json.cfg import config
-
 from ..encoders import datetime_encoder
-from .mixin import CustomizedDataClassJsonMixin
+from .mixin import CustomizedDataClassJsonMixin, config
 
 
 @dataclass
@@ -79,6 +77,11 @@ class PostData(CustomizedDataClassJsonMixin):
     mime_type: str
     params: List[Param]
     text: str
+    comment: Optional[str] = None
+
+    _encoding: Optional[str] = field(
+        default=None, metadata=config(field_name="_encoding")
+    )
 
 
 @dataclass
@@ -104,6 +107,8 @@ class Content(CustomizedDataClassJsonMixin):
     encoding: Optional[str] = None
     comment: Optional[str] = None
 
+    _file: Optional[str] = field(default=None, metadata=config(field_name="_file"))
+
 
 @dataclass
 class Response(CustomizedDataClassJsonMixin):
@@ -121,6 +126,12 @@ class Response(CustomizedDataClassJsonMixin):
     _transfer_size: Optional[int] = field(
         default=None, metadata=config(field_name="_transferSize")
     )
+    _failure_text: Optional[str] = field(
+        default=None, metadata=config(field_name="_failureText")
+    )
+    _from_cache: Optional[str] = field(
+        default=None, metadata=config(field_name="_fromCache")
+    )
 
 
 @dataclass
@@ -160,6 +171,7 @@ class Entry(CustomizedDataClassJsonMixin):
     server_ip_address: Optional[str] = field(
         default=None, metadata=config(field_name="serverIPAddress")
     )
+    connection: Optional[str] = None
     comment: Optional[str] = None
 
     _server_port: Optional[int] = field(
@@ -168,6 +180,9 @@ class Entry(CustomizedDataClassJsonMixin):
     _security_details: Optional[SecurityDetails] = field(
         default=None, metadata=config(field_name="_securityDetails")
     )
+    _incomplete: Optional[bool] = field(
+        default=None, metadata=config(field_name="_incomplete")
+    )
 
 
 @dataclass
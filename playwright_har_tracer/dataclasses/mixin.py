@@ -1,11 +1,273 @@
-from dataclasses_json import LetterCase, Undefined
-from dataclasses_json.api import DataClassJsonMixin
-from dataclasses_json.cfg import config
+import dataclasses
+import json
+import re
+from datetime import datetime, timezone
+from enum import Enum
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
 
+from ..encoders import datetime_decoder
 
-class CustomizedDataClassJsonMixin(DataClassJsonMixin):
-    dataclass_json_config = config(
-        letter_case=LetterCase.CAMEL,
-        undefined=Undefined.EXCLUDE,
-        exclude=lambda f: f is None,
-    )["dataclasses_json"]
+# field metadata is kept in the format of dataclasses_json, so that the models
+# stay usable with dataclasses_json (e.g. for marshmallow schemas)
+METADATA_KEY = "dataclasses_json"
+
+A = TypeVar("A", bound="CustomizedDataClassJsonMixin")
+
+
+def camelcase(name: str) -> str:
+    # the same conversion as dataclasses_json's LetterCase.CAMEL
+    name = re.sub(r"^[\-_.]", "", name)
+    if not name:
+        return name
+
+    return name[0].lower() + re.sub(
+        r"[\-_.\s]([a-z])", lambda matched: matched.group(1).upper(), name[1:]
+    )
+
+
+def config(
+    *,
+    encoder: Optional[Callable] = None,
+    decoder: Optional[Callable] = None,
+    field_name: Optional[str] = None,
+    letter_case: Optional[Callable[[str], str]] = None,
+    exclude: Optional[Callable[[Any], bool]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Field (or class) metadata, compatible with dataclasses_json.config()."""
+    options: Dict[str, Any] = {}
+    if encoder is not None:
+        options["encoder"] = encoder
+    if decoder is not None:
+        options["decoder"] = decoder
+    if field_name is not None:
+        # a renamed field is a letter case returning the name, as in
+        # dataclasses_json
+        options["letter_case"] = lambda _, name=field_name: name
+    elif letter_case is not None:
+        options["letter_case"] = letter_case
+    if exclude is not None:
+        options["exclude"] = exclude
+
+    return {METADATA_KEY: options}
+
+
+class FieldPlan(NamedTuple):
+    name: str
+    key: str
+    type_: Any
+    encoder: Optional[Callable]
+    decoder: Optional[Callable]
+    exclude: Optional[Callable[[Any], bool]]
+    default: Any
+
+
+# field plans are built once per class
+_plans: Dict[type, List[FieldPlan]] = {}
+
+
+def plan_for(cls: type) -> List[FieldPlan]:
+    plan = _plans.get(cls)
+    if plan is not None:
+        return plan
+
+    class_options = getattr(cls, "dataclass_json_config", None) or {}
+    hints = get_type_hints(cls)
+
+    plan = []
+    for field in dataclasses.fields(cls):
+        options = {**class_options, **field.metadata.get(METADATA_KEY, {})}
+        letter_case = options.get("letter_case")
+        if field.default is not dataclasses.MISSING:
+            default: Any = field.default
+        elif field.default_factory is not dataclasses.MISSING:  # type: ignore
+            default = field.default_factory  # type: ignore
+        else:
+            default = dataclasses.MISSING
+
+        plan.append(
+            FieldPlan(
+                name=field.name,
+                key=letter_case(field.name) if letter_case else field.name,
+                type_=hints.get(field.name, Any),
+                encoder=options.get("encoder"),
+                decoder=options.get("decoder"),
+                exclude=options.get("exclude"),
+                default=default,
+            )
+        )
+
+    _plans[cls] = plan
+    return plan
+
+
+def encode_json_value(value: Any) -> Any:
+    # the conversions of dataclasses_json's JSON encoder
+    if isinstance(value, datetime):
+        return value.timestamp()
+
+    if isinstance(value, Enum):
+        return value.value
+
+    return value
+
+
+def encode(value: Any, encode_json: bool) -> Any:
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return encode_dataclass(value, encode_json)
+
+    if isinstance(value, (list, tuple)):
+        return [encode(item, encode_json) for item in value]
+
+    if isinstance(value, Mapping):
+        return {
+            encode(key, encode_json): encode(item, encode_json)
+            for key, item in value.items()
+        }
+
+    return encode_json_value(value) if encode_json else value
+
+
+def encode_dataclass(obj: Any, encode_json: bool) -> Dict[str, Any]:
+    result: Dict[str, Any] = {}
+    for plan in plan_for(type(obj)):
+        value = getattr(obj, plan.name)
+        if plan.encoder is None:
+            value = encode(value, encode_json)
+
+        if plan.exclude is not None and plan.exclude(value):
+            continue
+
+        if plan.encoder is not None:
+            value = plan.encoder(value)
+            if encode_json:
+                value = encode(value, encode_json)
+
+        result[plan.key] = value
+
+    return result
+
+
+def decode_datetime(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+
+    if isinstance(value, str):
+        return cast(datetime, datetime_decoder(value))
+
+    # a timestamp, as dataclasses_json's encoder writes it
+    return datetime.fromtimestamp(value, tz=timezone.utc).astimezone()
+
+
+def decode(type_: Any, value: Any) -> Any:
+    if value is None or type_ is Any:
+        return value
+
+    origin = get_origin(type_)
+    if origin is Union:
+        args = [arg for arg in get_args(type_) if arg is not type(None)]  # noqa: E721
+        # only Optional[X] is resolved, other unions are kept as they are
+        return decode(args[0], value) if len(args) == 1 else value
+
+    if origin in (list, List):
+        (item_type,) = get_args(type_) or (Any,)
+        return [decode(item_type, item) for item in value]
+
+    if origin in (dict, Dict):
+        _, item_type = get_args(type_) or (Any, Any)
+        return {key: decode(item_type, item) for key, item in value.items()}
+
+    if isinstance(type_, type):
+        if dataclasses.is_dataclass(type_):
+            if isinstance(value, type_):
+                return value
+            return decode_dataclass(type_, value)
+
+        if issubclass(type_, datetime):
+            return decode_datetime(value)
+
+    return value
+
+
+def decode_dataclass(
+    cls: Type[Any], kvs: Mapping[str, Any], infer_missing: bool = False
+) -> Any:
+    kwargs: Dict[str, Any] = {}
+    for plan in plan_for(cls):
+        if plan.key in kvs:
+            value = kvs[plan.key]
+        elif plan.name in kvs:
+            value = kvs[plan.name]
+        elif plan.default is not dataclasses.MISSING:
+            # let the dataclass fill in the default
+            continue
+        elif infer_missing:
+            value = None
+        else:
+            # the dataclass raises a TypeError for the missing field
+            continue
+
+        if plan.decoder is not None and value is not None:
+            kwargs[plan.name] = plan.decoder(value)
+        else:
+            kwargs[plan.name] = decode(plan.type_, value)
+
+    # unknown keys are excluded
+    return cls(**kwargs)
+
+
+class CustomizedDataClassJsonMixin:
+    """Serializes dataclasses to and from HAR style JSON.
+
+    A native replacement of dataclasses_json's DataClassJsonMixin (which is
+    an optional dependency now): keys are camelCased (unless renamed with
+    config(field_name=...)), None values are excluded and unknown keys are
+    ignored.
+    """
+
+    dataclass_json_config: Optional[Dict[str, Any]] = {
+        "letter_case": camelcase,
+        "exclude": lambda f: f is None,
+    }
+
+    def to_dict(self, encode_json: bool = False) -> Dict[str, Any]:
+        return encode_dataclass(self, encode_json)
+
+    def to_json(self, **kwargs: Any) -> str:
+        return json.dumps(self.to_dict(encode_json=True), **kwargs)
+
+    @classmethod
+    def from_dict(cls: Type[A], kvs: Mapping[str, Any], *, infer_missing=False) -> A:
+        return decode_dataclass(cls, kvs, infer_missing)
+
+    @classmethod
+    def from_json(cls: Type[A], s: Union[str, bytes], **kwargs: Any) -> A:
+        return cls.from_dict(json.loads(s, **kwargs))
+
+    @classmethod
+    def schema(cls, **kwargs: Any) -> Any:
+        """Returns a marshmallow schema (requires dataclasses_json)."""
+        try:
+            from dataclasses_json.mm import build_schema
+        except ImportError as e:
+            raise ImportError(
+                "schema() requires dataclasses-json, install it with "
+                "pip install playwright-har-tracer[dataclasses-json]"
+            ) from e
+
+        schema_cls = build_schema(cls, CustomizedDataClassJsonMixin, False, False)
+        return schema_cls(**kwargs)
@@ -0,0 +1,182 @@
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from . import dataclasses
+from .operations import EntryLike, Path, entry_url
+from .streaming import iter_log
+from .utils import normalize_url
+
+DiffKey = Tuple[str, str]
+
+
+@dataclass
+class EntrySummary:
+    method: str
+    url: str
+    domain: str
+    status: int
+    body_size: int
+    transfer_size: int
+    time: float
+
+    @property
+    def key(self) -> DiffKey:
+        return (self.method, normalize_url(self.url))
+
+
+def known(value: Optional[float]) -> float:
+    # -1 (or None) stands for an unknown value
+    if value is None or value < 0:
+        return 0
+
+    return value
+
+
+def summarize(entry: EntryLike) -> EntrySummary:
+    url = entry_url(entry)
+    if isinstance(entry, dict):
+        request, response = entry["request"], entry["response"]
+        method = request["method"]
+        status = response["status"]
+        body_size = response["content"].get("size")
+        transfer_size = response.get("_transferSize")
+        time = entry.get("time")
+    else:
+        method = entry.request.method
+        status = entry.response.status
+        body_size = entry.response.content.size
+        transfer_size = entry.response._transfer_size
+        time = entry.time
+
+    return EntrySummary(
+        method=method,
+        url=url,
+        domain=urlparse(url).hostname or "",
+        status=status,
+        body_size=int(known(body_size)),
+        transfer_size=int(known(transfer_size)),
+        time=float(known(time)),
+    )
+
+
+@dataclass
+class DomainDiff:
+    requests_before: int = 0
+    requests_after: int = 0
+    body_size_before: int = 0
+    body_size_after: int = 0
+    transfer_size_before: int = 0
+    transfer_size_after: int = 0
+    time_before: float = 0.0
+    time_after: float = 0.0
+
+    @property
+    def requests_delta(self) -> int:
+        return self.requests_after - self.requests_before
+
+    @property
+    def body_size_delta(self) -> int:
+        return self.body_size_after - self.body_size_before
+
+    @property
+    def transfer_size_delta(self) -> int:
+        return self.transfer_size_after - self.transfer_size_before
+
+    @property
+    def time_delta(self) -> float:
+        return self.time_after - self.time_before
+
+    def add_before(self, summary: EntrySummary) -> None:
+        self.requests_before += 1
+        self.body_size_before += summary.body_size
+        self.transfer_size_before += summary.transfer_size
+        self.time_before += summary.time
+
+    def add_after(self, summary: EntrySummary) -> None:
+        self.requests_after += 1
+        self.body_size_after += summary.body_size
+        self.transfer_size_after += summary.transfer_size
+        self.time_after += summary.time
+
+
+@dataclass
+class HarDiff:
+    added: List[EntrySummary] = field(default_factory=list)
+    removed: List[EntrySummary] = field(default_factory=list)
+    # the number of entries found in both
+    matched: int = 0
+    domains: Dict[str, DomainDiff] = field(default_factory=dict)
+
+    @property
+    def added_domains(self) -> List[str]:
+        """Domains which only show up after."""
+        return sorted(
+            name for name, domain in self.domains.items() if domain.requests_before == 0
+        )
+
+    @property
+    def removed_domains(self) -> List[str]:
+        """Domains which only show up before."""
+        return sorted(
+            name for name, domain in self.domains.items() if domain.requests_after == 0
+        )
+
+
+def diff_entries(before: Iterable[EntryLike], after: Iterable[EntryLike]) -> HarDiff:
+    """Diffs two sequences of entries.
+
+    Entries are matched by method and normalized URL, repeated requests in
+    order of appearance. Only the summaries of the before entries are kept
+    in memory, the after entries are consumed one by one.
+    """
+    result = HarDiff()
+    domains: Dict[str, DomainDiff] = defaultdict(DomainDiff)
+
+    index: Dict[DiffKey, Deque[EntrySummary]] = defaultdict(deque)
+    for entry in before:
+        summary = summarize(entry)
+        index[summary.key].append(summary)
+        domains[summary.domain].add_before(summary)
+
+    for entry in after:
+        summary = summarize(entry)
+        domains[summary.domain].add_after(summary)
+
+        candidates = index.get(summary.key)
+        if candidates:
+            candidates.popleft()
+            result.matched += 1
+        else:
+            result.added.append(summary)
+
+    for candidates in index.values():
+        result.removed.extend(candidates)
+
+    result.domains = dict(domains)
+    return result
+
+
+def diff_hars(before: dataclasses.har.Har, after: dataclasses.har.Har) -> HarDiff:
+    return diff_entries(before.log.entries, after.log.entries)
+
+
+def iter_entries(
+    path: Path, *, chunk_size: Optional[int] = None
+) -> Iterator[EntryLike]:
+    kwargs = {} if chunk_size is None else {"chunk_size": chunk_size}
+    with open(path) as fp:
+        for name, value in iter_log(fp, **kwargs):
+            if name == "entries":
+                yield value
+
+
+def diff_har_files(
+    before: Path, after: Path, *, chunk_size: Optional[int] = None
+) -> HarDiff:
+    """Diffs two HAR files in a streaming fashion."""
+    return diff_entries(
+        iter_entries(before, chunk_size=chunk_size),
+        iter_entries(after, chunk_size=chunk_size),
+    )
@@ -7,3 +7,14 @@ def datetime_encoder(dt: Optional[datetime] = None) -> Optional[str]:
         return None
 
     return dt.isoformat()
+
+
+def datetime_decoder(value: Optional[str] = None) -> Optional[datetime]:
+    if value is None:
+        return None
+
+    # fromisoformat does not accept the "Z" suffix before Python 3.11
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+
+    return datetime.fromisoformat(value)
@@ -1,101 +1,301 @@
 import asyncio
-import base64
-import copy
-from datetime import datetime, timezone
-from typing import Dict, List, Optional, Union, cast
-from urllib.parse import urlparse
+import inspect
+import time
+from concurrent.futures import Executor
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Dict,
+    Optional,
+    Sequence,
+    Set,
+    TypeVar,
+    Union,
+    cast,
+)
 
-from playwright.async_api import BrowserContext, Page, Request, Response
+from playwright.async_api import BrowserContext, Error, Page, Request, Response
 
 from . import dataclasses
-from .constants import CREATOR_NAME, CREATOR_VERSION, FALLBACK_HTTP_VERSION, HAR_VERSION
+from .base_tracer import BaseHarTracer
+from .body_store import BodyStore
+from .cdp import CDPNetworkCollector, update_entry
+from .constants import PAGE_TIMINGS_SCRIPT
+from .page_state import PageState
+from .processors import Processor
+from .request_index import RequestIndex
+from .scheduler import Priority, Scheduler, SchedulerMetrics, body_priority
+from .stats import Stats
 from .utils import (
+    body_to_base64,
     calculate_request_body_size,
-    calculate_request_headers_size,
-    calculate_response_headers_size,
-    cookies_for_har,
-    datetime_to_millis,
-    dict_to_headers,
-    millis_to_roundish_millis,
+    calculate_time,
+    new_entry,
+    new_response,
     post_data_for_har,
-    query_to_query_params,
+    run_body_task,
+    set_headers,
+    set_page_timings,
+    set_request_sizes,
+    set_sizes,
+    set_timings,
+    timing_to_timings,
 )
 
+T = TypeVar("T")
+
+EntryCallback = Callable[[dataclasses.har.Entry], Optional[Awaitable[None]]]
+HarCallback = Callable[[dataclasses.har.Har], Optional[Awaitable[None]]]
 
-class HarTracer:
+
+class HarTracer(BaseHarTracer):
     def __init__(
         self,
         context: BrowserContext,
         browser_name: str,
         *,
         omit_content: bool = False,
+        on_entry_complete: Optional[EntryCallback] = None,
+        stream_entries: bool = False,
+        max_queued_entries: int = 1000,
+        on_page_complete: Optional[HarCallback] = None,
+        use_cdp: bool = False,
+        body_store: Optional[BodyStore] = None,
+        body_executor: Optional[Executor] = None,
+        body_inline_threshold: int = 64 * 1024,
+        max_in_flight: Optional[int] = None,
+        index: bool = False,
+        binary_post_data: str = "omit",
+        max_post_data_size: Optional[int] = None,
+        processors: Optional[Sequence[Processor]] = None,
+        stats: bool = False,
     ):
         if context.browser is None:
             raise ValueError
 
-        self._omit_content = omit_content
+        if use_cdp and browser_name != "chromium":
+            raise ValueError("use_cdp is only supported on Chromium")
 
-        self._page_entries: Dict[Page, dataclasses.har.Page] = {}
-        self._entries: Dict[int, dataclasses.har.Entry] = {}
-        self._last_page: int = 0
+        super().__init__(
+            browser_name,
+            context.browser.version,
+            index=index,
+            binary_post_data=binary_post_data,
+            max_post_data_size=max_post_data_size,
+            processors=processors,
+        )
+
+        self._context = context
+        self._omit_content = omit_content
+        self._use_cdp = use_cdp
+        self._body_store = body_store
+        self._body_executor = body_executor
+        self._body_inline_threshold = body_inline_threshold
+        self._stats = stats
+        self._page_stats: Dict[str, Stats] = {}
+        # stats of the pages handed off to on_page_complete
+        self._completed_stats = Stats()
+        self._on_entry_complete = on_entry_complete
+        self._on_page_complete = on_page_complete
+
+        # a bounded queue makes a slow consumer hold back entry completion
+        self._entry_queue: Optional[asyncio.Queue] = None
+        if stream_entries:
+            self._entry_queue = asyncio.Queue(maxsize=max_queued_entries)
+        self._stream_closed = False
+        self._stream_consumers = 0
+        self._stream_space = asyncio.Event()
+        self._dropped_entries = 0
+
+        self._pages: Dict[Page, PageState] = {}
+        self._requests = RequestIndex()
 
         self._loop = asyncio.get_event_loop()
-        self._tasks: List[asyncio.Task] = []
-
-        self._on_load_event = asyncio.Event()
-        self._on_dom_content_loaded_event = asyncio.Event()
-
-        self._log = dataclasses.har.Log(
-            version=HAR_VERSION,
-            creator=dataclasses.har.Creator(name=CREATOR_NAME, version=CREATOR_VERSION),
-            browser=dataclasses.har.Browser(
-                name=browser_name, version=context.browser.version
-            ),
-            pages=[],
-            entries=[],
-        )
+        self._tasks: Set[asyncio.Task] = set()
+        # _complete_page tasks, which a timed-out flush() doesn't cancel
+        self._page_tasks: Set[asyncio.Task] = set()
+        self._scheduler = Scheduler(max_in_flight)
 
         context.on("page", self.on_page)
 
+    def _post_data_for_har(
+        self, request: Request
+    ) -> Optional[dataclasses.har.PostData]:
+        return post_data_for_har(
+            request,
+            binary_post_data=self._binary_post_data,
+            max_post_data_size=self._max_post_data_size,
+        )
+
+    def _create_task(
+        self,
+        coro: Coroutine,
+        page_state: Optional[PageState] = None,
+        request: Optional[Request] = None,
+        priority: Optional[Priority] = None,
+    ) -> asyncio.Task:
+        record = self._requests.get(request) if request is not None else None
+        if record is not None:
+            coro = self._enrich(coro, record.entry)
+
+        # only enrichment calls go through the scheduler, waiters must not
+        # hold a slot
+        if priority is not None:
+            coro = self._scheduler.run(coro, priority)
+
+        task = self._loop.create_task(coro)
+        task.add_done_callback(self._on_task_done)
+        self._tasks.add(task)
+        if page_state is not None:
+            page_state.tasks.add(task)
+            task.add_done_callback(page_state.tasks.discard)
+        if record is not None:
+            record.tasks.append(task)
+        return task
+
+    async def _enrich(self, coro: Coroutine, har_entry: dataclasses.har.Entry) -> None:
+        try:
+            await coro
+        except Error:
+            # e.g. the page was closed while the entry was being enriched, the
+            # entry is kept as it is
+            har_entry._incomplete = True
+
+    @property
+    def scheduler_metrics(self) -> SchedulerMetrics:
+        return self._scheduler.metrics
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        # keep failed tasks around so that flush() raises their exceptions
+        if task.cancelled() or task.exception() is None:
+            self._tasks.discard(task)
+
+    async def _run_body_task(
+        self, func: Callable[..., T], body: bytes, *args: Any, blocking: bool = False
+    ) -> T:
+        return await run_body_task(
+            func,
+            body,
+            *args,
+            executor=self._body_executor,
+            inline_threshold=self._body_inline_threshold,
+            blocking=blocking,
+        )
+
+    async def _wait_entry_tasks(self, request: Request) -> None:
+        record = self._requests.get(request)
+        if record is None:
+            return
+
+        tasks = record.tasks
+        # tasks may be added while waiting (e.g. by the finished handler)
+        while True:
+            pending = [task for task in tasks if not task.done()]
+            if len(pending) == 0:
+                return
+            await asyncio.wait(pending)
+
+    def page_id(self, page: Page) -> Optional[str]:
+        """The ID of a page in the HAR (None if the page isn't traced)."""
+        page_state = self._pages.get(page)
+        return page_state.entry.id if page_state is not None else None
+
+    @property
+    def page_stats(self) -> Dict[str, Stats]:
+        """Stats of each page still in the log, keyed by page ID."""
+        return dict(self._page_stats)
+
+    @property
+    def stats(self) -> Optional[Stats]:
+        """Stats of the whole context (merged from the pages' ones)."""
+        if not self._stats:
+            return None
+
+        return Stats.merged([self._completed_stats, *self._page_stats.values()])
+
+    async def _complete_entry(
+        self, har_entry: dataclasses.har.Entry, page_state: Optional[PageState]
+    ) -> None:
+        page_entries = page_state.entries if page_state is not None else None
+        if not self._process_entry(har_entry, page_entries):
+            return
+
+        if self._on_entry_complete is not None:
+            result = self._on_entry_complete(har_entry)
+            if inspect.isawaitable(result):
+                await result
+
+        if self._entry_queue is not None:
+            await self._stream_entry(self._entry_queue, har_entry)
+
+    async def _stream_entry(
+        self, entry_queue: asyncio.Queue, har_entry: dataclasses.har.Entry
+    ) -> None:
+        # completion is held back only while someone iterates over entries(),
+        # otherwise flush() would wait for a queue nobody reads
+        while entry_queue.full() and self._stream_consumers > 0:
+            self._stream_space.clear()
+            await self._stream_space.wait()
+
+        try:
+            entry_queue.put_nowait(har_entry)
+        except asyncio.QueueFull:
+            # the entry is still in the HAR, it's just not streamed
+            self._dropped_entries += 1
+
+    @property
+    def dropped_entries(self) -> int:
+        """Entries not streamed, as the queue was full with no consumer."""
+        return self._dropped_entries
+
+    async def entries(self) -> AsyncIterator[dataclasses.har.Entry]:
+        if self._entry_queue is None:
+            raise ValueError("stream_entries should be enabled to stream entries")
+
+        self._stream_consumers += 1
+        try:
+            while True:
+                if self._stream_closed and self._entry_queue.empty():
+                    return
+
+                har_entry = await self._entry_queue.get()
+                self._stream_space.set()
+                if har_entry is None:
+                    return
+
+                yield har_entry
+        finally:
+            self._stream_consumers -= 1
+            # wake up producers, so that they stop waiting without a consumer
+            self._stream_space.set()
+
+    def _close_stream(self) -> None:
+        if self._entry_queue is None:
+            return
+
+        self._stream_closed = True
+        # a full queue is drained by the consumer, which stops once it's empty
+        try:
+            self._entry_queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
     def on_request(self, page: Page, request: Request) -> None:
-        page_entry = self._page_entries.get(page)
-        if page_entry is None:
+        page_state = self._pages.get(page)
+        if page_state is None:
             return
 
-        parsed_url = urlparse(request.url)
-
-        har_entry = dataclasses.har.Entry(
-            pageref=page_entry.id,
-            started_date_time=datetime.now(timezone.utc),
-            time=-1,
-            request=dataclasses.har.Request(
-                method=request.method,
-                url=request.url,
-                http_version=FALLBACK_HTTP_VERSION,
-                cookies=[],
-                headers=[],
-                query_string=query_to_query_params(parsed_url.query),
-                post_data=post_data_for_har(request),
-                headers_size=-1,
-                body_size=calculate_request_body_size(request) or 0,
-            ),
-            response=dataclasses.har.Response(
-                status=-1,
-                status_text="",
-                http_version=FALLBACK_HTTP_VERSION,
-                cookies=[],
-                headers=[],
-                content=dataclasses.har.Content(
-                    size=-1,
-                    mime_type="x-unknown",
-                ),
-                headers_size=-1,
-                body_size=-1,
-                redirect_url="",
-                _transfer_size=-1,
-            ),
-            cache=dataclasses.har.Cache(before_request=None, after_request=None),
-            timings=dataclasses.har.Timings(send=-1, wait=-1, receive=-1),
+        page_entry = page_state.entry
+
+        har_entry = new_entry(
+            page_entry.id,
+            request.method,
+            request.url,
+            self._post_data_for_har(request),
+            calculate_request_body_size(request),
         )
 
         async def update_mime_type_task():
@@ -104,121 +304,81 @@ class HarTracer:
                 or har_entry.response.content.mime_type
             )
 
-        self._tasks.append(self._loop.create_task(update_mime_type_task()))
+        from_entry = self._requests.redirect_source(request)
+        if from_entry is not None:
+            from_entry.response.redirect_url = request.url
 
-        redirected_from_request = request.redirected_from
-        if redirected_from_request is not None:
-            from_entry = self._entries.get(redirected_from_request.__hash__())
-            if from_entry is not None:
-                from_entry.response.redirect_url = request.url
+        self._add_entry(har_entry, page_state.entries)
+        self._requests.add(request, har_entry)
+        if page_state.stats is not None:
+            page_state.stats.add_request(request.url)
 
-        self._log.entries.append(har_entry)
-        self._entries[request.__hash__()] = har_entry
+        self._create_task(
+            update_mime_type_task(), page_state, request, Priority.HEADERS
+        )
 
-    async def on_response(self, page: Page, response: Response) -> None:
-        page_entry = self._page_entries.get(page)
-        if page_entry is None:
+    def on_response(self, page: Page, response: Response) -> None:
+        page_state = self._pages.get(page)
+        if page_state is None:
             return
 
+        page_entry = page_state.entry
+
         request = response.request
-        har_entry = self._entries.get(request.__hash__())
-        if har_entry is None:
+        record = self._requests.get(request)
+        if record is None:
             return
 
-        har_entry.response = dataclasses.har.Response(
-            status=response.status,
-            status_text=response.status_text,
-            http_version=FALLBACK_HTTP_VERSION,
-            cookies=[],
-            headers=[],
-            content=dataclasses.har.Content(
-                size=-1,
-                mime_type="x-unknown",
-            ),
-            headers_size=-1,
-            body_size=-1,
-            redirect_url="",
-            _transfer_size=-1,
-        )
+        har_entry = record.entry
+
+        har_entry.response = new_response(response.status, response.status_text)
 
         async def rewrite_headers_task():
             request_headers = await request.all_headers()
             response_headers = await response.all_headers()
-            # Rewrite provisional headers with actual
-            har_entry.request.headers = dict_to_headers(request_headers)
-            har_entry.request.cookies = cookies_for_har(
-                request_headers.get("cookie"), ";"
-            )
-            har_entry.request.post_data = post_data_for_har(request)
-
-            har_entry.response.status = response.status
-            har_entry.response.status_text = response.status_text
-            har_entry.response.cookies = cookies_for_har(
-                response_headers.get("set-cookie"), "\n"
-            )
-            har_entry.response.headers = dict_to_headers(response_headers)
+            set_headers(har_entry, request_headers, response_headers)
+            har_entry.request.post_data = self._post_data_for_har(request)
 
-            har_entry.response.content.mime_type = (
-                response_headers.get("content-type")
-                or har_entry.response.content.mime_type
-            )
+        self._create_task(rewrite_headers_task(), page_state, request, Priority.HEADERS)
 
-        self._tasks.append(self._loop.create_task(rewrite_headers_task()))
-
-        timing = response.request.timing
-        start_time = timing.get("startTime", 0.0)
-        if datetime_to_millis(page_entry.started_date_time) > start_time:
-            page_entry.started_date_time = datetime.fromtimestamp(start_time / 1000.0)
-
-        domain_lookup_start: Union[float, int] = timing.get("domainLookupStart", -1)
-        domain_lookup_end: Union[float, int] = timing.get("domainLookupEnd", -1)
-        dns = (
-            millis_to_roundish_millis(domain_lookup_end - domain_lookup_start)
-            if domain_lookup_end != -1
-            else -1
-        )
-
-        connect_start: Union[float, int] = timing.get("connectStart", -1)
-        connect_end: Union[float, int] = timing.get("connectEnd", -1)
-        connect = (
-            millis_to_roundish_millis(connect_end - connect_start)
-            if connect_end != -1
-            else -1
+        page_state.started = set_timings(
+            page_entry, har_entry, request.timing, page_state.started
         )
 
-        secure_connection_start: Union[float, int] = timing.get(
-            "secureConnectionStart", -1
-        )
-        ssl = (
-            millis_to_roundish_millis(connect_end - secure_connection_start)
-            if connect_end != -1
-            else -1
-        )
+        if page_state.cdp is None:
+            self._set_server_and_security_details(page_state, har_entry, response)
 
-        request_start: Union[float, int] = timing.get("requestStart", -1)
-        response_start: Union[float, int] = timing.get("responseStart", -1)
-        wait = (
-            millis_to_roundish_millis(response_start - request_start)
-            if response_start != -1
-            else -1
-        )
+        if self._omit_content is False and response.status == 200:
 
-        response_end: Union[float, int] = timing.get("responseEnd", -1)
-        receive = (
-            millis_to_roundish_millis(response_end - response_start)
-            if response_end != -1
-            else -1
-        )
+            async def on_response_task():
+                body = await response.body()
+                content = har_entry.response.content
+                content.size = len(body)
+
+                if self._body_store is not None:
+                    # keep only a reference to the stored body in the entry
+                    content._file = await self._run_body_task(
+                        self._body_store.write, body, content.mime_type, blocking=True
+                    )
+                    return
+
+                content.text = await self._run_body_task(body_to_base64, body)
+                content.encoding = "base64"
+
+            self._create_task(
+                on_response_task(),
+                page_state,
+                request,
+                body_priority(request.resource_type),
+            )
 
-        har_entry.timings = dataclasses.har.Timings(
-            dns=dns,
-            connect=connect,
-            ssl=ssl,
-            send=0,
-            wait=wait,
-            receive=receive,
-        )
-        har_entry.time = sum([dns, connect, ssl, wait, receive])
+    def _set_server_and_security_details(
+        self,
+        page_state: PageState,
+        har_entry: dataclasses.har.Entry,
+        response: Response,
+    ) -> None:
+        request = response.request
 
         # set server IP address and port
         async def set_server_ip_and_port():
@@ -231,7 +391,9 @@ class HarTracer:
                 )
                 har_entry._server_port = cast(Optional[int], server.get("port"))
 
-        self._tasks.append(self._loop.create_task(set_server_ip_and_port()))
+        self._create_task(
+            set_server_ip_and_port(), page_state, request, Priority.DETAILS
+        )
 
         # set security details
         async def set_security_details():
@@ -244,132 +406,255 @@ class HarTracer:
                     security_details
                 )
 
-        self._tasks.append(self._loop.create_task(set_security_details()))
-
-        if self._omit_content is False and response.status == 200:
-
-            async def on_response_task():
-                body = await response.body()
-                har_entry.response.content.text = base64.b64encode(body).decode(
-                    "utf8", "replace"
-                )
-                har_entry.response.content.encoding = "base64"
-
-            self._tasks.append(self._loop.create_task(on_response_task()))
+        self._create_task(set_security_details(), page_state, request, Priority.DETAILS)
 
     def on_request_finished(self, page: Page, request: Request):
-        har_entry = self._entries.get(request.__hash__())
-        if har_entry is None:
+        page_state = self._pages.get(page)
+        record = self._requests.get(request)
+        if record is None:
             return
 
+        har_entry = record.entry
+
+        if page_state is not None:
+            # the timing is complete (responseEnd is set) only at this point
+            page_state.started = set_timings(
+                page_state.entry, har_entry, request.timing, page_state.started
+            )
+            if page_state.stats is not None:
+                page_state.stats.add_timings(
+                    request.url, har_entry.timings, har_entry.time
+                )
+
         async def handle_finished_request():
             response = await request.response()
             if response is None:
                 return
 
-            response_headers = await response.all_headers()
-            request_headers = await request.all_headers()
-            # TODO
-            http_version = FALLBACK_HTTP_VERSION
-            transfer_size = -1
-            headers_size = calculate_response_headers_size(
-                http_version, response.status, response.status_text, response_headers
-            )
-            body_size = -1
-
-            har_entry.request.http_version = http_version
-            har_entry.response.body_size = body_size
-            har_entry.response.headers_size = headers_size
-            har_entry.response._transfer_size = transfer_size
-            har_entry.request.headers_size = calculate_request_headers_size(
-                request.method, request.url, http_version, request_headers
+            try:
+                set_request_sizes(
+                    har_entry, cast(Dict[str, int], await request.sizes())
+                )
+            except Error:
+                # e.g. the browser doesn't keep the raw headers
+                response_headers = await response.all_headers()
+                request_headers = await request.all_headers()
+                set_sizes(har_entry, request_headers, response_headers)
+
+            if page_state is not None and page_state.stats is not None:
+                # the body size as transferred, so that no body has to be fetched
+                page_state.stats.add_bytes(
+                    response.headers.get("content-type"), har_entry.response.body_size
+                )
+
+        sizes_task = self._create_task(
+            handle_finished_request(), page_state, request, Priority.SIZES
+        )
+
+        if page_state is not None and page_state.cdp is not None:
+            # waiting for CDP events doesn't hold a scheduler slot
+            self._create_task(
+                self._update_from_cdp(
+                    page_state, page_state.cdp, har_entry, request, sizes_task
+                ),
+                page_state,
+                request,
             )
 
-        self._tasks.append(self._loop.create_task(handle_finished_request()))
+        async def complete_entry_task():
+            await self._wait_entry_tasks(request)
+            self._requests.evict(request)
+            await self._complete_entry(har_entry, page_state)
+
+        self._create_task(complete_entry_task(), page_state)
+
+    async def _update_from_cdp(
+        self,
+        page_state: PageState,
+        cdp: CDPNetworkCollector,
+        har_entry: dataclasses.har.Entry,
+        request: Request,
+        sizes_task: asyncio.Task,
+    ) -> None:
+        cdp_record = await cdp.take(request.method, request.url)
+
+        # CDP data takes precedence over the sizes from Playwright
+        await asyncio.wait([sizes_task])
+
+        if cdp_record is not None and cdp_record.response is not None:
+            update_entry(har_entry, cdp_record)
+            return
+
+        # the session missed the request (e.g. it started before the session
+        # was attached), so the details are taken from Playwright
+        response = await request.response()
+        if response is not None:
+            self._set_server_and_security_details(page_state, har_entry, response)
+
+    def on_request_failed(self, page: Page, request: Request) -> None:
+        page_state = self._pages.get(page)
+        record = self._requests.get(request)
+        if record is None:
+            return
+
+        for task in record.tasks:
+            task.cancel()
+        self._requests.evict(request)
+        if page_state is not None and page_state.cdp is not None:
+            # otherwise the next request to the URL would take its record
+            page_state.cdp.discard(request.method, request.url)
+
+        har_entry = record.entry
+        har_entry.response._failure_text = request.failure
+        har_entry.timings = timing_to_timings(request.timing)
+        har_entry.time = calculate_time(har_entry.timings)
+
+        if page_state is not None and page_state.stats is not None:
+            page_state.stats.add_failure()
+
+        self._create_task(self._complete_entry(har_entry, page_state), page_state)
+
+    async def new_page(self) -> Page:
+        """Opens a page in the context.
+
+        With use_cdp, the page's CDP session is attached before it's returned,
+        so that the page's first navigation is covered by the session.
+        """
+        page = await self._context.new_page()
+        page_state = self._pages.get(page)
+        if page_state is not None and page_state.cdp is not None:
+            await page_state.cdp.wait_attached()
+
+        return page
 
     def on_page(self, page: Page) -> None:
-        page_entry = dataclasses.har.Page(
-            started_date_time=datetime.now(timezone.utc),
-            id=f"page_{self._last_page}",
-            title="",
-            page_timings=dataclasses.har.PageTimings(on_content_load=-1, on_load=-1),
-        )
-        self._last_page += 1
+        started = time.time()
+        page_entry = self._add_page(started)
+
+        page_state = PageState(entry=page_entry, started=started * 1000.0)
+        self._pages[page] = page_state
+        if self._stats:
+            page_state.stats = Stats()
+            self._page_stats[page_entry.id] = page_state.stats
 
-        self._page_entries[page] = page_entry
-        self._log.pages.append(page_entry)
+        if self._use_cdp:
+            page_state.cdp = CDPNetworkCollector()
+            self._create_task(page_state.cdp.attach(self._context, page), page_state)
 
         page.on("request", lambda request: self.on_request(page, request))
         page.on(
             "requestfinished", lambda request: self.on_request_finished(page, request)
         )
         page.on("response", lambda response: self.on_response(page, response))
+        page.on("requestfailed", lambda request: self.on_request_failed(page, request))
+        page.on("close", lambda: self.on_page_close(page))
 
-        def on_dom_content_loaded(page: Page) -> None:
-            async def on_dom_content_loaded_task():
-                result: Dict[str, Union[str, int]] = await page.main_frame.evaluate(
-                    """Promise.resolve({title: document.title, domContentLoaded: performance.timing.domContentLoadedEventStart})"""
-                )
-
-                title = str(result.get("title", ""))
-                page_entry.title = title
-
-                dom_content_loaded = int(result.get("domContentLoaded", 0))
-                page_entry.page_timings.on_content_load = dom_content_loaded
-
-                self._on_dom_content_loaded_event.set()
+        def on_load(page: Page) -> None:
+            async def on_load_task():
+                try:
+                    result: Dict[str, Union[str, float]] = (
+                        await page.main_frame.evaluate(PAGE_TIMINGS_SCRIPT)
+                    )
+                except Error:
+                    # the page was closed (or navigated away) before the
+                    # evaluation, so the page timings are left unset
+                    return
+                finally:
+                    page_state.on_load_event.set()
 
-            self._tasks.append(self._loop.create_task(on_dom_content_loaded_task()))
+                set_page_timings(page_entry, result)
 
-        async def wait_on_dom_content_loaded_task():
-            await self._on_dom_content_loaded_event.wait()
+            self._create_task(on_load_task(), page_state)
 
-        self._tasks.append(self._loop.create_task(wait_on_dom_content_loaded_task()))
+        async def wait_on_load_task():
+            await page_state.on_load_event.wait()
 
-        def on_load(page: Page) -> None:
-            async def on_load_task():
-                result: Dict[str, Union[str, int]] = await page.main_frame.evaluate(
-                    """Promise.resolve({title: document.title, loaded: performance.timing.loadEventStart})"""
-                )
+        self._create_task(wait_on_load_task(), page_state)
 
-                title = str(result.get("title", ""))
-                page_entry.title = title
+        page.on("load", lambda: on_load(page))
 
-                loaded = int(result.get("loaded", 0))
-                page_entry.page_timings.on_load = loaded
+    def on_page_close(self, page: Page) -> None:
+        page_state = self._pages.pop(page, None)
+        if page_state is None:
+            return
 
-                self._on_load_event.set()
+        # load events never fire on a closed page
+        page_state.release_waiters()
 
-            self._tasks.append(self._loop.create_task(on_load_task()))
+        task = self._create_task(self._complete_page(page_state))
+        self._page_tasks.add(task)
+        task.add_done_callback(self._page_tasks.discard)
 
-        async def wait_on_load_task():
-            await self._on_load_event.wait()
+    async def _complete_page(self, page_state: PageState) -> None:
+        await page_state.wait_tasks()
 
-        self._tasks.append(self._loop.create_task(wait_on_load_task()))
+        if page_state.cdp is not None:
+            await page_state.cdp.detach()
 
-        page.on("domcontentloaded", lambda: on_dom_content_loaded(page))
-        page.on("load", lambda: on_load(page))
+        if self._on_page_complete is None:
+            # the page stays in the log until flush()
+            return
 
-    async def flush(self) -> dataclasses.har.Har:
-        await asyncio.gather(*self._tasks)
-
-        for page_entry in self._log.pages:
-            on_content_load = page_entry.page_timings.on_content_load
-            if on_content_load is not None and float(on_content_load) >= 0.0:
-                page_entry.page_timings.on_content_load = float(
-                    on_content_load
-                ) - datetime_to_millis(page_entry.started_date_time)
-            else:
-                page_entry.page_timings.on_content_load = -1
-
-            on_load = page_entry.page_timings.on_load
-            if on_load is not None and float(on_load) >= 0.0:
-                page_entry.page_timings.on_load = float(on_load) - datetime_to_millis(
-                    page_entry.started_date_time
-                )
-            else:
-                page_entry.page_timings.on_load = -1
+        page_entry = page_state.entry
+        har = self._hand_off_page(page_entry, page_state.entries)
+
+        page_stats = self._page_stats.pop(page_entry.id, None)
+        if page_stats is not None:
+            self._completed_stats.merge(page_stats)
+
+        result = self._on_page_complete(har)
+        if inspect.isawaitable(result):
+            await result
+
+    async def _wait_tasks(self, timeout: float) -> int:
+        tasks = list(self._tasks)
+        if len(tasks) == 0:
+            return 0
+
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for record in self._requests:
+            if any(task in pending for task in record.tasks):
+                record.entry._incomplete = True
+
+        # closed pages are still completed (and handed off) once the tasks of
+        # their entries are cancelled
+        completing = {task for task in pending if task in self._page_tasks}
+        cancelled = pending - completing
+        for task in cancelled:
+            task.cancel()
+        # make sure that cancelled tasks don't outlive flush()
+        await asyncio.gather(*cancelled, return_exceptions=True)
+        if len(completing) > 0:
+            await asyncio.wait(completing)
+
+        for task in done | completing:
+            if not task.cancelled() and task.exception() is not None:
+                raise cast(BaseException, task.exception())
+
+        return len(cancelled)
+
+    async def _gather_tasks(self) -> None:
+        results = await asyncio.gather(*self._tasks, return_exceptions=True)
+        for result in results:
+            # a request failing meanwhile cancels its tasks, it's not an error
+            if isinstance(result, BaseException) and not isinstance(
+                result, asyncio.CancelledError
+            ):
+                raise result
+
+    async def flush(self, timeout: Optional[float] = None) -> dataclasses.har.Har:
+        abandoned = 0
+        if timeout is None:
+            await self._gather_tasks()
+        else:
+            abandoned = await self._wait_tasks(timeout)
+
+        # notify the end of the stream
+        self._close_stream()
+
+        log = self._snapshot_log()
+        if abandoned > 0:
+            log.comment = f"{abandoned} task(s) abandoned due to timeout"
 
-        log = copy.deepcopy(self._log)
         har = dataclasses.har.Har(log=log)
         return har
@@ -0,0 +1,187 @@
+import bisect
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from . import dataclasses
+from .utils import normalize_mime_type
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).hostname or ""
+
+
+class HarIndex:
+    """Incrementally built index over HAR entries.
+
+    Lookups by URL, host, page, MIME type and status are O(1), URL prefix
+    and time range lookups are O(log n) (plus the size of the result).
+    Adding an entry is O(1): the sorted indexes are sorted on the first
+    lookup after entries are added (entries arrive mostly in order, so it's
+    close to linear).
+    """
+
+    def __init__(self, entries: Optional[Iterable[dataclasses.har.Entry]] = None):
+        self._entries: List[dataclasses.har.Entry] = []
+
+        self._by_url: Dict[str, List[dataclasses.har.Entry]] = defaultdict(list)
+        self._sorted_urls: List[str] = []
+        self._by_host: Dict[str, List[dataclasses.har.Entry]] = defaultdict(list)
+        self._by_page: Dict[str, List[dataclasses.har.Entry]] = defaultdict(list)
+        self._by_mime_type: Dict[str, List[dataclasses.har.Entry]] = defaultdict(list)
+        self._by_status: Dict[int, List[dataclasses.har.Entry]] = defaultdict(list)
+
+        self._started: List[Tuple[float, dataclasses.har.Entry]] = []
+        self._started_keys: List[float] = []
+        self._started_entries: List[dataclasses.har.Entry] = []
+        self._sorted = True
+
+        for entry in entries or []:
+            self.add(entry)
+
+    @classmethod
+    def from_har(cls, har: dataclasses.har.Har) -> "HarIndex":
+        return cls(har.log.entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entry: dataclasses.har.Entry) -> None:
+        self._entries.append(entry)
+
+        url = entry.request.url
+        if url not in self._by_url:
+            self._sorted_urls.append(url)
+        self._by_url[url].append(entry)
+
+        self._by_host[host_of(url)].append(entry)
+        if entry.pageref is not None:
+            self._by_page[entry.pageref].append(entry)
+        self._by_mime_type[
+            normalize_mime_type(entry.response.content.mime_type)
+        ].append(entry)
+        self._by_status[entry.response.status].append(entry)
+
+        self._started.append((entry.started_date_time.timestamp(), entry))
+        self._sorted = False
+
+    def remove_page(self, pageref: str) -> None:
+        """Drops the entries of a page (e.g. once it's handed off)."""
+        removed = self._by_page.pop(pageref, None)
+        if not removed:
+            return
+
+        ids = {id(entry) for entry in removed}
+
+        def prune(buckets: Dict[Any, List[dataclasses.har.Entry]], key: Any) -> None:
+            kept = [entry for entry in buckets.get(key, []) if id(entry) not in ids]
+            if kept:
+                buckets[key] = kept
+            else:
+                buckets.pop(key, None)
+
+        urls = {entry.request.url for entry in removed}
+        for url in urls:
+            prune(self._by_url, url)
+        for host in {host_of(url) for url in urls}:
+            prune(self._by_host, host)
+        for mime_type in {
+            normalize_mime_type(entry.response.content.mime_type) for entry in removed
+        }:
+            prune(self._by_mime_type, mime_type)
+        for status in {entry.response.status for entry in removed}:
+            prune(self._by_status, status)
+
+        self._sorted_urls = [url for url in self._sorted_urls if url in self._by_url]
+        self._entries = [entry for entry in self._entries if id(entry) not in ids]
+        self._started = [item for item in self._started if id(item[1]) not in ids]
+        self._sorted = False
+
+    def _sort(self) -> None:
+        if self._sorted:
+            return
+
+        self._sorted_urls.sort()
+        # a stable sort keeps entries started at the same time in order
+        self._started.sort(key=lambda item: item[0])
+        self._started_keys = [key for key, _ in self._started]
+        self._started_entries = [entry for _, entry in self._started]
+        self._sorted = True
+
+    def by_url(self, url: str) -> List[dataclasses.har.Entry]:
+        return list(self._by_url.get(url, []))
+
+    def by_url_prefix(self, prefix: str) -> List[dataclasses.har.Entry]:
+        self._sort()
+        entries: List[dataclasses.har.Entry] = []
+        start = bisect.bisect_left(self._sorted_urls, prefix)
+        for url in self._sorted_urls[start:]:
+            if not url.startswith(prefix):
+                break
+            entries.extend(self._by_url[url])
+        return entries
+
+    def by_host(self, host: str) -> List[dataclasses.har.Entry]:
+        return list(self._by_host.get(host.lower(), []))
+
+    def by_page(self, pageref: str) -> List[dataclasses.har.Entry]:
+        return list(self._by_page.get(pageref, []))
+
+    def by_mime_type(self, mime_type: str) -> List[dataclasses.har.Entry]:
+        return list(self._by_mime_type.get(normalize_mime_type(mime_type), []))
+
+    def by_status(self, status: int) -> List[dataclasses.har.Entry]:
+        return list(self._by_status.get(status, []))
+
+    def between(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[dataclasses.har.Entry]:
+        """Returns entries started in [start, end), ordered by start time."""
+        self._sort()
+        lo = (
+            0
+            if start is None
+            else bisect.bisect_left(self._started_keys, start.timestamp())
+        )
+        hi = (
+            len(self._started_keys)
+            if end is None
+            else bisect.bisect_left(self._started_keys, end.timestamp())
+        )
+        return self._started_entries[lo:hi]
+
+    def query(
+        self,
+        *,
+        url_prefix: Optional[str] = None,
+        host: Optional[str] = None,
+        page: Optional[str] = None,
+        mime_type: Optional[str] = None,
+        status: Optional[int] = None,
+    ) -> List[dataclasses.har.Entry]:
+        """Returns entries matching all of the given conditions."""
+        candidates: List[List[dataclasses.har.Entry]] = []
+        if url_prefix is not None:
+            candidates.append(self.by_url_prefix(url_prefix))
+        if host is not None:
+            candidates.append(self._by_host.get(host.lower(), []))
+        if page is not None:
+            candidates.append(self._by_page.get(page, []))
+        if mime_type is not None:
+            candidates.append(
+                self._by_mime_type.get(normalize_mime_type(mime_type), [])
+            )
+        if status is not None:
+            candidates.append(self._by_status.get(status, []))
+
+        if len(candidates) == 0:
+            return list(self._entries)
+
+        # scan the smallest candidate list, filter it with the others
+        candidates.sort(key=len)
+        smallest, rest = candidates[0], candidates[1:]
+        others: List[Set[int]] = [{id(entry) for entry in c} for c in rest]
+        return [
+            entry for entry in smallest if all(id(entry) in other for other in others)
+        ]
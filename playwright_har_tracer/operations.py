@@ -0,0 +1,328 @@
+import copy
+import pathlib
+import re
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Union,
+)
+from urllib.parse import urlparse
+
+from . import dataclasses
+from .streaming import HarWriter, iter_log
+
+Path = Union[str, pathlib.Path]
+EntryLike = Union[Dict[str, Any], dataclasses.har.Entry]
+KeyFunc = Callable[[EntryLike], str]
+
+NO_PAGE = "no_page"
+
+
+def entry_pageref(entry: EntryLike) -> Optional[str]:
+    if isinstance(entry, dict):
+        return entry.get("pageref")
+
+    return entry.pageref
+
+
+def entry_url(entry: EntryLike) -> str:
+    if isinstance(entry, dict):
+        return entry["request"]["url"]
+
+    return entry.request.url
+
+
+def entry_started_date_time(entry: EntryLike) -> datetime:
+    if isinstance(entry, dict):
+        # fromisoformat does not accept the "Z" suffix before Python 3.11
+        return datetime.fromisoformat(entry["startedDateTime"].replace("Z", "+00:00"))
+
+    return entry.started_date_time
+
+
+def by_page(entry: EntryLike) -> str:
+    return entry_pageref(entry) or NO_PAGE
+
+
+def by_domain(entry: EntryLike) -> str:
+    return urlparse(entry_url(entry)).hostname or ""
+
+
+def by_time_window(seconds: float) -> KeyFunc:
+    if seconds <= 0:
+        raise ValueError("seconds should be a positive number")
+
+    def key(entry: EntryLike) -> str:
+        timestamp = entry_started_date_time(entry).timestamp()
+        return str(int(timestamp // seconds * seconds))
+
+    return key
+
+
+def by_shard(n: int) -> KeyFunc:
+    if n <= 0:
+        raise ValueError("n should be a positive integer")
+
+    def key(entry: EntryLike) -> str:
+        # keep the entries of a page together
+        value = entry_pageref(entry) or entry_url(entry)
+        return str(zlib.crc32(value.encode()) % n)
+
+    return key
+
+
+def file_name_for(key: str) -> str:
+    return (re.sub(r"[^A-Za-z0-9._-]", "_", key) or "_") + ".har"
+
+
+class PageIdMapper:
+    """Renumbers page IDs (page_0, page_1, ...) across multiple logs."""
+
+    def __init__(self) -> None:
+        self._last_page = 0
+        self._mapping: Dict[str, str] = {}
+
+    def next_source(self) -> None:
+        self._mapping = {}
+
+    def map(self, page_id: str) -> str:
+        new_id = self._mapping.get(page_id)
+        if new_id is None:
+            new_id = f"page_{self._last_page}"
+            self._last_page += 1
+            self._mapping[page_id] = new_id
+
+        return new_id
+
+
+def merge_hars(hars: Iterable[dataclasses.har.Har]) -> dataclasses.har.Har:
+    mapper = PageIdMapper()
+    log: Optional[dataclasses.har.Log] = None
+
+    for har in hars:
+        mapper.next_source()
+        if log is None:
+            log = dataclasses.har.Log(
+                version=har.log.version,
+                creator=copy.copy(har.log.creator),
+                browser=copy.copy(har.log.browser),
+                pages=[],
+                entries=[],
+            )
+
+        for page in har.log.pages:
+            page = copy.copy(page)
+            page.id = mapper.map(page.id)
+            log.pages.append(page)
+
+        for entry in har.log.entries:
+            entry = copy.copy(entry)
+            if entry.pageref is not None:
+                entry.pageref = mapper.map(entry.pageref)
+            log.entries.append(entry)
+
+    if log is None:
+        raise ValueError("hars should not be empty")
+
+    return dataclasses.har.Har(log=log)
+
+
+def split_har(har: dataclasses.har.Har, key: KeyFunc) -> Dict[str, dataclasses.har.Har]:
+    pages = {page.id: page for page in har.log.pages}
+    logs: Dict[str, dataclasses.har.Log] = {}
+    pagerefs: Dict[str, Set[str]] = {}
+
+    for entry in har.log.entries:
+        name = key(entry)
+        log = logs.get(name)
+        if log is None:
+            log = dataclasses.har.Log(
+                version=har.log.version,
+                creator=har.log.creator,
+                browser=har.log.browser,
+                pages=[],
+                entries=[],
+            )
+            logs[name] = log
+            pagerefs[name] = set()
+
+        log.entries.append(entry)
+        if entry.pageref is not None and entry.pageref not in pagerefs[name]:
+            pagerefs[name].add(entry.pageref)
+            page = pages.get(entry.pageref)
+            if page is not None:
+                log.pages.append(page)
+
+    return {name: dataclasses.har.Har(log=log) for name, log in logs.items()}
+
+
+def shard_har(har: dataclasses.har.Har, n: int) -> List[dataclasses.har.Har]:
+    shards = split_har(har, by_shard(n))
+    return [shards[str(i)] for i in range(n) if str(i) in shards]
+
+
+def merge_har_files(
+    paths: Iterable[Path], output: Path, *, chunk_size: Optional[int] = None
+) -> int:
+    """Merges HAR files into one in a streaming fashion.
+
+    Returns the number of merged entries.
+    """
+    kwargs = {} if chunk_size is None else {"chunk_size": chunk_size}
+    mapper = PageIdMapper()
+    writer: Optional[HarWriter] = None
+
+    with open(output, "w") as out:
+        for path in paths:
+            mapper.next_source()
+            header: Dict[str, Any] = {}
+            with open(path) as fp:
+                for name, value in iter_log(fp, **kwargs):
+                    if name not in ("pages", "entries"):
+                        header[name] = value
+                        continue
+
+                    if writer is None:
+                        writer = HarWriter(
+                            out,
+                            version=header.get("version", "1.2"),
+                            creator=header.get("creator"),
+                            browser=header.get("browser"),
+                        )
+
+                    if name == "pages":
+                        value["id"] = mapper.map(value["id"])
+                        writer.add_page(value)
+                    else:
+                        if value.get("pageref") is not None:
+                            value["pageref"] = mapper.map(value["pageref"])
+                        writer.add_entry(value)
+
+        if writer is None:
+            writer = HarWriter(out)
+        writer.close()
+
+    return writer.entries
+
+
+class _ReopeningFile:
+    """A file which can be closed and reopened (in append mode) transparently."""
+
+    def __init__(self, path: pathlib.Path, pool: "_FilePool"):
+        self.path = path
+        self._pool = pool
+        self.fp: Optional[IO[str]] = None
+        self._created = False
+
+    def write(self, data: str) -> int:
+        if self.fp is None:
+            self.fp = open(self.path, "a" if self._created else "w")
+            self._created = True
+            self._pool.opened(self)
+
+        self._pool.touch(self)
+        return self.fp.write(data)
+
+    def close(self) -> None:
+        if self.fp is not None:
+            self.fp.close()
+            self.fp = None
+
+
+class _FilePool:
+    def __init__(self, max_open_files: int):
+        self._max_open_files = max_open_files
+        self._open: "OrderedDict[int, _ReopeningFile]" = OrderedDict()
+
+    def opened(self, file: _ReopeningFile) -> None:
+        self._open[id(file)] = file
+        while len(self._open) > self._max_open_files:
+            _, oldest = self._open.popitem(last=False)
+            oldest.close()
+
+    def touch(self, file: _ReopeningFile) -> None:
+        self._open.move_to_end(id(file))
+
+    def close(self, file: _ReopeningFile) -> None:
+        self._open.pop(id(file), None)
+        file.close()
+
+
+def split_har_file(
+    path: Path,
+    output_dir: Path,
+    key: KeyFunc,
+    *,
+    max_open_files: int = 64,
+    chunk_size: Optional[int] = None,
+) -> Dict[str, pathlib.Path]:
+    """Splits a HAR file into one file per key in a streaming fashion.
+
+    Only pages are kept in memory. Returns a mapping of keys to output paths.
+    """
+    kwargs = {} if chunk_size is None else {"chunk_size": chunk_size}
+    output_dir = pathlib.Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    pool = _FilePool(max_open_files)
+    files: Dict[str, _ReopeningFile] = {}
+    writers: Dict[str, HarWriter] = {}
+    pagerefs: Dict[str, Set[str]] = {}
+    pages: Dict[str, Dict[str, Any]] = {}
+    header: Dict[str, Any] = {}
+
+    with open(path) as fp:
+        for name, value in iter_log(fp, **kwargs):
+            if name == "pages":
+                pages[value["id"]] = value
+                continue
+
+            if name != "entries":
+                header[name] = value
+                continue
+
+            split_key = key(value)
+            writer = writers.get(split_key)
+            if writer is None:
+                file = _ReopeningFile(output_dir / file_name_for(split_key), pool)
+                files[split_key] = file
+                writer = HarWriter(
+                    file,  # type: ignore
+                    version=header.get("version", "1.2"),
+                    creator=header.get("creator"),
+                    browser=header.get("browser"),
+                )
+                writers[split_key] = writer
+                pagerefs[split_key] = set()
+
+            writer.add_entry(value)
+            pageref = value.get("pageref")
+            if pageref is not None:
+                pagerefs[split_key].add(pageref)
+
+    for split_key, writer in writers.items():
+        for pageref in sorted(pagerefs[split_key]):
+            page = pages.get(pageref)
+            if page is not None:
+                writer.add_page(page)
+
+        writer.close()
+        pool.close(files[split_key])
+
+    return {split_key: file.path for split_key, file in files.items()}
+
+
+def shard_har_file(
+    path: Path, output_dir: Path, n: int, *, chunk_size: Optional[int] = None
+) -> List[pathlib.Path]:
+    shards = split_har_file(path, output_dir, by_shard(n), chunk_size=chunk_size)
+    return [shards[str(i)] for i in range(n) if str(i) in shards]
@@ -0,0 +1,29 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import List, Optional, Set
+
+from . import dataclasses
+from .cdp import CDPNetworkCollector
+from .stats import Stats
+
+
+@dataclass
+class PageState:
+    entry: dataclasses.har.Page
+    # the page start in epoch milliseconds, so that it is compared as is
+    started: float = 0.0
+    entries: List[dataclasses.har.Entry] = field(default_factory=list)
+    tasks: Set[asyncio.Task] = field(default_factory=set)
+    on_load_event: asyncio.Event = field(default_factory=asyncio.Event)
+    cdp: Optional[CDPNetworkCollector] = None
+    stats: Optional[Stats] = None
+
+    def release_waiters(self) -> None:
+        self.on_load_event.set()
+
+    async def wait_tasks(self) -> None:
+        while True:
+            pending = [task for task in self.tasks if not task.done()]
+            if len(pending) == 0:
+                return
+            await asyncio.wait(pending)
@@ -0,0 +1,189 @@
+import re
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable, List, Optional, Pattern, Sequence, Union
+from urllib.parse import quote_plus, unquote_plus, urlsplit, urlunsplit
+
+from . import dataclasses
+
+REDACTED = "[REDACTED]"
+SENSITIVE_HEADERS = ("authorization", "cookie", "proxy-authorization", "set-cookie")
+
+
+class Processor(ABC):
+    """Processes a completed entry in place.
+
+    process() returns False to drop the entry.
+    """
+
+    @abstractmethod
+    def process(self, entry: dataclasses.har.Entry) -> bool:
+        """Processes an entry, returning False to drop it."""
+
+
+class Pipeline(Processor):
+    """Runs processors in order, stopping at the first one dropping the entry."""
+
+    def __init__(self, processors: Iterable[Processor]):
+        self.processors: List[Processor] = list(processors)
+
+    def process(self, entry: dataclasses.har.Entry) -> bool:
+        for processor in self.processors:
+            if not processor.process(entry):
+                return False
+
+        return True
+
+
+class Filter(Processor):
+    """Keeps entries matching a predicate."""
+
+    def __init__(self, predicate: Callable[[dataclasses.har.Entry], bool]):
+        self.predicate = predicate
+
+    def process(self, entry: dataclasses.har.Entry) -> bool:
+        return self.predicate(entry)
+
+
+class DropURLs(Filter):
+    """Drops entries whose URL matches (re.search) any of the patterns."""
+
+    def __init__(self, patterns: Iterable[Union[str, Pattern[str]]]):
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        super().__init__(
+            lambda entry: not any(
+                pattern.search(entry.request.url) for pattern in self.patterns
+            )
+        )
+
+
+def redact_headers(
+    headers: List[dataclasses.har.Header], names: Sequence[str], replacement: str
+) -> None:
+    for header in headers:
+        if header.name.lower() in names:
+            header.value = replacement
+
+
+def redact_cookies(
+    cookies: List[dataclasses.har.Cookie],
+    names: Optional[Sequence[str]],
+    replacement: str,
+) -> None:
+    for cookie in cookies:
+        if names is None or cookie.name in names:
+            cookie.value = replacement
+
+
+class RedactHeaders(Processor):
+    """Replaces the values of request and response headers (case-insensitive).
+
+    Redacting cookie (or set-cookie) redacts the parsed cookies too.
+    """
+
+    def __init__(
+        self, names: Iterable[str] = SENSITIVE_HEADERS, replacement: str = REDACTED
+    ):
+        self.names = [name.lower() for name in names]
+        self.replacement = replacement
+
+    def process(self, entry: dataclasses.har.Entry) -> bool:
+        redact_headers(entry.request.headers, self.names, self.replacement)
+        redact_headers(entry.response.headers, self.names, self.replacement)
+        if "cookie" in self.names:
+            redact_cookies(entry.request.cookies, None, self.replacement)
+        if "set-cookie" in self.names:
+            redact_cookies(entry.response.cookies, None, self.replacement)
+        return True
+
+
+class RedactCookies(Processor):
+    """Replaces the values of cookies (all of them by default)."""
+
+    def __init__(
+        self, names: Optional[Iterable[str]] = None, replacement: str = REDACTED
+    ):
+        self.names = list(names) if names is not None else None
+        self.replacement = replacement
+
+    def process(self, entry: dataclasses.har.Entry) -> bool:
+        redact_cookies(entry.request.cookies, self.names, self.replacement)
+        redact_cookies(entry.response.cookies, self.names, self.replacement)
+        return True
+
+
+class RedactQueryParams(Processor):
+    """Replaces the values of query parameters, in queryString and the URL."""
+
+    def __init__(self, names: Iterable[str], replacement: str = REDACTED):
+        self.names = set(names)
+        self.replacement = replacement
+
+    def process(self, entry: dataclasses.har.Entry) -> bool:
+        request = entry.request
+        if not any(param.name in self.names for param in request.query_string):
+            return True
+
+        for param in request.query_string:
+            if param.name in self.names:
+                param.value = self.replacement
+
+        parsed = urlsplit(request.url)
+        parts = parsed.query.split("&")
+        for i, part in enumerate(parts):
+            raw_name = part.split("=", 1)[0]
+            if unquote_plus(raw_name) in self.names:
+                parts[i] = f"{raw_name}={quote_plus(self.replacement)}"
+        request.url = urlunsplit(parsed._replace(query="&".join(parts)))
+        return True
+
+
+class TruncateBodies(Processor):
+    """Truncates response bodies to max_size bytes."""
+
+    def __init__(self, max_size: int):
+        if max_size < 0:
+            raise ValueError("max_size should not be negative")
+
+        self.max_size = max_size
+
+    def process(self, entry: dataclasses.har.Entry) -> bool:
+        content = entry.response.content
+        if content.text is None:
+            return True
+
+        if content.encoding == "base64":
+            # 4 characters encode 3 bytes
+            max_length = self.max_size // 3 * 4
+        else:
+            max_length = self.max_size
+
+        if len(content.text) > max_length:
+            content.text = content.text[:max_length]
+            content.comment = f"truncated to {self.max_size} bytes"
+
+        return True
+
+
+class Annotate(Processor):
+    """Sets the comment of entries to the result of a function (if any)."""
+
+    def __init__(self, func: Callable[[dataclasses.har.Entry], Optional[str]]):
+        self.func = func
+
+    def process(self, entry: dataclasses.har.Entry) -> bool:
+        comment = self.func(entry)
+        if comment is not None:
+            entry.comment = comment
+        return True
+
+
+def remove_entry(
+    entries: List[dataclasses.har.Entry], entry: dataclasses.har.Entry
+) -> bool:
+    # entries complete shortly after they are added, so scan from the end
+    for i in range(len(entries) - 1, -1, -1):
+        if entries[i] is entry:
+            del entries[i]
+            return True
+
+    return False
@@ -0,0 +1,178 @@
+import base64
+import hashlib
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from playwright.async_api import BrowserContext, Request, Route
+from playwright.sync_api import Request as SyncRequest
+from playwright.sync_api import Route as SyncRoute
+
+from . import dataclasses
+from .body_store import BodyStore
+from .utils import normalize_url
+
+# bodies are served decoded, so these no longer apply
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+NOT_FOUND_MODES = ("abort", "continue")
+
+ReplayKey = Tuple[str, str, Optional[str]]
+
+
+def body_hash(body: Optional[bytes]) -> Optional[str]:
+    if not body:
+        return None
+
+    return hashlib.sha1(body).hexdigest()
+
+
+def post_data_to_bytes(
+    post_data: Optional[dataclasses.har.PostData],
+) -> Optional[bytes]:
+    if post_data is None:
+        return None
+
+    if post_data._encoding == "base64":
+        return base64.b64decode(post_data.text)
+
+    return post_data.text.encode("utf8")
+
+
+@dataclass
+class ReplayMiss:
+    method: str
+    url: str
+
+
+class HarReplayer:
+    """Serves the responses of a HAR through Playwright's routing.
+
+    Entries are looked up by method, normalized URL and (with
+    match_body=True) a hash of the post data, falling back to the method
+    and URL alone. Repeated requests are served the matching entries in
+    capture order, then the last one over and over.
+
+    Bodies are decoded (or read from a body store, with content._file) on
+    demand, so that nothing is held per body. Requests without a matching
+    entry are aborted (or continued to the network with not_found="continue")
+    and recorded in misses.
+    """
+
+    def __init__(
+        self,
+        har: dataclasses.har.Har,
+        *,
+        body_store: Optional[BodyStore] = None,
+        match_body: bool = False,
+        not_found: str = "abort",
+    ):
+        if not_found not in NOT_FOUND_MODES:
+            raise ValueError(f"not_found should be one of {NOT_FOUND_MODES}")
+
+        self.body_store = body_store
+        self.match_body = match_body
+        self.not_found = not_found
+        self.misses: List[ReplayMiss] = []
+
+        self._entries: Dict[ReplayKey, List[dataclasses.har.Entry]] = defaultdict(list)
+        self._served: Dict[ReplayKey, int] = defaultdict(int)
+
+        for entry in har.log.entries:
+            # failed requests have nothing to replay
+            if entry.response.status <= 0:
+                continue
+
+            method, url = entry.request.method, normalize_url(entry.request.url)
+            self._entries[(method, url, None)].append(entry)
+            if match_body:
+                digest = body_hash(post_data_to_bytes(entry.request.post_data))
+                if digest is not None:
+                    self._entries[(method, url, digest)].append(entry)
+
+    def __len__(self) -> int:
+        return sum(
+            len(entries) for key, entries in self._entries.items() if key[2] is None
+        )
+
+    def lookup(
+        self, method: str, url: str, post_data: Optional[bytes] = None
+    ) -> Optional[dataclasses.har.Entry]:
+        url = normalize_url(url)
+        keys: List[ReplayKey] = [(method, url, None)]
+        if self.match_body:
+            digest = body_hash(post_data)
+            if digest is not None:
+                keys.insert(0, (method, url, digest))
+
+        for key in keys:
+            entries = self._entries.get(key)
+            if not entries:
+                continue
+
+            served = self._served[key]
+            self._served[key] = served + 1
+            return entries[min(served, len(entries) - 1)]
+
+        return None
+
+    def response_body(self, entry: dataclasses.har.Entry) -> bytes:
+        content = entry.response.content
+        if content._file is not None and self.body_store is not None:
+            return self.body_store.read(content._file)
+
+        if content.text is None:
+            return b""
+
+        if content.encoding == "base64":
+            return base64.b64decode(content.text)
+
+        return content.text.encode("utf8")
+
+    def _fulfill_args(
+        self, request: Union[Request, SyncRequest]
+    ) -> Optional[Dict[str, Any]]:
+        entry = self.lookup(request.method, request.url, request.post_data_buffer)
+        if entry is None:
+            self.misses.append(ReplayMiss(method=request.method, url=request.url))
+            return None
+
+        headers: Dict[str, str] = {}
+        for header in entry.response.headers:
+            name = header.name.lower()
+            if name in DROPPED_HEADERS:
+                continue
+
+            if name in headers:
+                separator = "\n" if name == "set-cookie" else ", "
+                headers[name] = headers[name] + separator + header.value
+            else:
+                headers[name] = header.value
+
+        return {
+            "status": entry.response.status,
+            "headers": headers,
+            "body": self.response_body(entry),
+        }
+
+    async def handle(self, route: Route, request: Request) -> None:
+        """A route handler for the async API."""
+        args = self._fulfill_args(request)
+        if args is not None:
+            await route.fulfill(**args)
+        elif self.not_found == "continue":
+            await route.continue_()
+        else:
+            await route.abort()
+
+    def handle_sync(self, route: SyncRoute, request: SyncRequest) -> None:
+        """A route handler for the sync API."""
+        args = self._fulfill_args(request)
+        if args is not None:
+            route.fulfill(**args)
+        elif self.not_found == "continue":
+            route.continue_()
+        else:
+            route.abort()
+
+    async def attach(self, context: BrowserContext) -> None:
+        await context.route("**/*", self.handle)
@@ -0,0 +1,71 @@
+import asyncio
+import weakref
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+
+from playwright.async_api import Request
+
+from . import dataclasses
+
+
+@dataclass
+class RequestRecord:
+    entry: dataclasses.har.Entry
+    tasks: List[asyncio.Task] = field(default_factory=list)
+
+
+def is_redirect(entry: dataclasses.har.Entry) -> bool:
+    return 300 <= entry.response.status < 400
+
+
+class RequestIndex:
+    """Tracks in-flight requests and their HAR entries.
+
+    Requests are weakly referenced, so the index never keeps a request alive
+    on its own. A record is evicted once its request is finished (or failed)
+    and enriched. Entries of redirect responses are kept (weakly) until the
+    next request of the redirect chain shows up.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: "weakref.WeakKeyDictionary[Request, RequestRecord]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._redirects: "weakref.WeakKeyDictionary[Request, dataclasses.har.Entry]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    def __contains__(self, request: Request) -> bool:
+        return request in self._in_flight
+
+    def __iter__(self) -> Iterator[RequestRecord]:
+        return iter(list(self._in_flight.values()))
+
+    def add(self, request: Request, entry: dataclasses.har.Entry) -> RequestRecord:
+        record = RequestRecord(entry=entry)
+        self._in_flight[request] = record
+        return record
+
+    def get(self, request: Request) -> Optional[RequestRecord]:
+        return self._in_flight.get(request)
+
+    def redirect_source(self, request: Request) -> Optional[dataclasses.har.Entry]:
+        redirected_from = request.redirected_from
+        if redirected_from is None:
+            return None
+
+        record = self._in_flight.get(redirected_from)
+        if record is not None:
+            return record.entry
+
+        return self._redirects.pop(redirected_from, None)
+
+    def evict(self, request: Request) -> Optional[RequestRecord]:
+        record = self._in_flight.pop(request, None)
+        if record is not None and is_redirect(record.entry):
+            self._redirects[request] = record.entry
+
+        return record
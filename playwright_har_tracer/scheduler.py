@@ -0,0 +1,127 @@
+import asyncio
+import heapq
+import itertools
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Coroutine, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    HEADERS = 0
+    SIZES = 1
+    DETAILS = 2
+    BODY = 3
+    MEDIA_BODY = 4
+
+
+MEDIA_RESOURCE_TYPES = {"media", "image", "font"}
+
+
+def body_priority(resource_type: str) -> Priority:
+    if resource_type in MEDIA_RESOURCE_TYPES:
+        return Priority.MEDIA_BODY
+
+    return Priority.BODY
+
+
+@dataclass
+class SchedulerMetrics:
+    max_in_flight: Optional[int]
+    in_flight: int
+    queue_depth: int
+    max_queue_depth: int
+    completed: int
+
+
+class PrioritySemaphore:
+    """A semaphore which wakes up waiters in priority order (lowest first)."""
+
+    def __init__(self, value: int):
+        if value <= 0:
+            raise ValueError("value should be a positive integer")
+
+        self._value = value
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self.waiting = 0
+
+    def locked(self) -> bool:
+        return self._value == 0
+
+    async def acquire(self, priority: int) -> None:
+        if self._value > 0 and self.waiting == 0:
+            self._value -= 1
+            return
+
+        future = asyncio.get_event_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        self.waiting += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # the slot was handed over just before the cancellation
+                self.release()
+            raise
+        finally:
+            self.waiting -= 1
+
+    def release(self) -> None:
+        while len(self._waiters) > 0:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+
+        self._value += 1
+
+
+class Scheduler:
+    """Bounds the number of enrichment calls in flight.
+
+    With max_in_flight=None, coroutines run without any limit.
+    """
+
+    def __init__(self, max_in_flight: Optional[int] = None):
+        self.max_in_flight = max_in_flight
+        self._semaphore: Optional[PrioritySemaphore] = (
+            PrioritySemaphore(max_in_flight) if max_in_flight is not None else None
+        )
+        self._in_flight = 0
+        self._max_queue_depth = 0
+        self._completed = 0
+
+    async def run(self, coro: Coroutine[None, None, T], priority: int) -> T:
+        semaphore = self._semaphore
+        if semaphore is not None:
+            if semaphore.locked() or semaphore.waiting > 0:
+                self._max_queue_depth = max(
+                    self._max_queue_depth, semaphore.waiting + 1
+                )
+            try:
+                await semaphore.acquire(priority)
+            except BaseException:
+                # never started, so close it to avoid a "never awaited" warning
+                coro.close()
+                raise
+
+        self._in_flight += 1
+        try:
+            return await coro
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+            if semaphore is not None:
+                semaphore.release()
+
+    @property
+    def metrics(self) -> SchedulerMetrics:
+        return SchedulerMetrics(
+            max_in_flight=self.max_in_flight,
+            in_flight=self._in_flight,
+            queue_depth=self._semaphore.waiting if self._semaphore is not None else 0,
+            max_queue_depth=self._max_queue_depth,
+            completed=self._completed,
+        )
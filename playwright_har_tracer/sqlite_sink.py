@@ -0,0 +1,386 @@
+import base64
+import hashlib
+import json
+import pathlib
+import sqlite3
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from . import dataclasses
+from .encoders import datetime_decoder
+from .streaming import HarWriter
+
+BODY_MODES = (None, "blob", "hash")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id TEXT PRIMARY KEY,
+    started_date_time TEXT NOT NULL,
+    title TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    pageref TEXT,
+    started_date_time TEXT NOT NULL,
+    time REAL NOT NULL,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    mime_type TEXT,
+    server_ip_address TEXT,
+    transfer_size INTEGER,
+    blocked REAL,
+    dns REAL,
+    connect REAL,
+    ssl REAL,
+    send REAL,
+    wait REAL,
+    receive REAL,
+    body BLOB,
+    body_hash TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_pageref ON entries (pageref);
+CREATE INDEX IF NOT EXISTS entries_url ON entries (url);
+CREATE TABLE IF NOT EXISTS headers (
+    entry_id INTEGER NOT NULL,
+    direction TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS headers_entry_id ON headers (entry_id, position);
+CREATE TABLE IF NOT EXISTS cookies (
+    entry_id INTEGER NOT NULL,
+    direction TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cookies_entry_id ON cookies (entry_id, position);
+CREATE TABLE IF NOT EXISTS bodies (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+"""
+
+DATETIME_FIELDS = ("startedDateTime", "expires")
+
+
+def decode_datetimes(data: Any) -> Any:
+    if isinstance(data, list):
+        return [decode_datetimes(item) for item in data]
+
+    if isinstance(data, dict):
+        return {
+            key: (
+                datetime_decoder(value)
+                if key in DATETIME_FIELDS and isinstance(value, str)
+                else decode_datetimes(value)
+            )
+            for key, value in data.items()
+        }
+
+    return data
+
+
+def body_to_bytes(content: Dict[str, Any]) -> Optional[bytes]:
+    text = content.get("text")
+    if text is None:
+        return None
+
+    if content.get("encoding") == "base64":
+        return base64.b64decode(text)
+
+    return text.encode("utf8")
+
+
+def bytes_to_body(body: bytes, content: Dict[str, Any]) -> None:
+    if content.get("encoding") == "base64":
+        content["text"] = base64.b64encode(body).decode("utf8")
+    else:
+        content["text"] = body.decode("utf8", "replace")
+
+
+class ChildRows:
+    """Hands out (entry_id, direction, *columns) rows, ordered by entry ID."""
+
+    def __init__(self, rows: Iterator[Tuple[Any, ...]]):
+        self._rows = rows
+        self._next: Optional[Tuple[Any, ...]] = next(self._rows, None)
+
+    def take(self, entry_id: int) -> Dict[str, List[Tuple[Any, ...]]]:
+        children: Dict[str, List[Tuple[Any, ...]]] = {"request": [], "response": []}
+        # rows of entries which don't exist (anymore) are skipped
+        while self._next is not None and self._next[0] < entry_id:
+            self._next = next(self._rows, None)
+
+        while self._next is not None and self._next[0] == entry_id:
+            children[self._next[1]].append(self._next[2:])
+            self._next = next(self._rows, None)
+
+        return children
+
+
+class SQLiteSink:
+    """Stores HAR pages and entries in a SQLite database.
+
+    Rows are inserted in batches (executemany in a single transaction) and the
+    database runs in WAL mode. Bodies are dropped (bodies=None), stored in the
+    entry row (bodies="blob") or deduplicated by SHA-256 (bodies="hash").
+
+    add_entry() can be used as HarTracer's on_entry_complete callback.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, pathlib.Path],
+        *,
+        batch_size: int = 500,
+        bodies: Optional[str] = "hash",
+    ):
+        if bodies not in BODY_MODES:
+            raise ValueError(f"bodies should be one of {BODY_MODES}")
+
+        self.batch_size = batch_size
+        self.bodies = bodies
+
+        self._connection = sqlite3.connect(str(path))
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+        row = self._connection.execute("SELECT MAX(id) FROM entries").fetchone()
+        self._last_entry_id: int = row[0] or 0
+
+        self._entries: List[Tuple[Any, ...]] = []
+        self._headers: List[Tuple[Any, ...]] = []
+        self._cookies: List[Tuple[Any, ...]] = []
+        self._bodies: List[Tuple[str, bytes]] = []
+        self._pages: List[Tuple[Any, ...]] = []
+
+    def set_log_info(
+        self,
+        *,
+        version: str = "1.2",
+        creator: Optional[dataclasses.har.Creator] = None,
+        browser: Optional[dataclasses.har.Browser] = None,
+    ) -> None:
+        rows = [("version", json.dumps(version))]
+        if creator is not None:
+            rows.append(("creator", creator.to_json()))
+        if browser is not None:
+            rows.append(("browser", browser.to_json()))
+
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", rows
+            )
+
+    def add_page(self, page: dataclasses.har.Page) -> None:
+        data = page.to_dict(encode_json=True)
+        self._pages.append(
+            (page.id, data["startedDateTime"], page.title, json.dumps(data))
+        )
+        self._maybe_flush()
+
+    def add_entry(self, entry: dataclasses.har.Entry) -> None:
+        self._last_entry_id += 1
+        entry_id = self._last_entry_id
+
+        data = entry.to_dict(encode_json=True)
+        request, response = data["request"], data["response"]
+        for direction, message in (("request", request), ("response", response)):
+            for position, header in enumerate(message.pop("headers", [])):
+                self._headers.append(
+                    (entry_id, direction, position, header["name"], header["value"])
+                )
+            for position, cookie in enumerate(message.pop("cookies", [])):
+                self._cookies.append(
+                    (
+                        entry_id,
+                        direction,
+                        position,
+                        cookie["name"],
+                        cookie["value"],
+                        json.dumps(cookie),
+                    )
+                )
+
+        content = response["content"]
+        body = body_to_bytes(content)
+        content.pop("text", None)
+
+        blob: Optional[bytes] = None
+        body_hash: Optional[str] = None
+        if body is not None and self.bodies == "blob":
+            blob = body
+        elif body is not None and self.bodies == "hash":
+            body_hash = hashlib.sha256(body).hexdigest()
+            self._bodies.append((body_hash, body))
+        elif body is not None:
+            # the body is dropped, so is its encoding
+            content.pop("encoding", None)
+
+        timings = data["timings"]
+        self._entries.append(
+            (
+                entry_id,
+                entry.pageref,
+                data["startedDateTime"],
+                entry.time,
+                entry.request.method,
+                entry.request.url,
+                entry.response.status,
+                entry.response.content.mime_type,
+                entry.server_ip_address,
+                entry.response._transfer_size,
+                timings.get("blocked"),
+                timings.get("dns"),
+                timings.get("connect"),
+                timings.get("ssl"),
+                timings.get("send"),
+                timings.get("wait"),
+                timings.get("receive"),
+                blob,
+                body_hash,
+                json.dumps(data),
+            )
+        )
+        self._maybe_flush()
+
+    def add_har(self, har: dataclasses.har.Har) -> None:
+        for page in har.log.pages:
+            self.add_page(page)
+
+        for entry in har.log.entries:
+            self.add_entry(entry)
+
+    def _maybe_flush(self) -> None:
+        if len(self._entries) + len(self._pages) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)", self._pages
+            )
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO bodies VALUES (?, ?)", self._bodies
+            )
+            self._connection.executemany(
+                "INSERT INTO entries VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._entries,
+            )
+            self._connection.executemany(
+                "INSERT INTO headers VALUES (?, ?, ?, ?, ?)", self._headers
+            )
+            self._connection.executemany(
+                "INSERT INTO cookies VALUES (?, ?, ?, ?, ?, ?)", self._cookies
+            )
+
+        self._pages = []
+        self._bodies = []
+        self._entries = []
+        self._headers = []
+        self._cookies = []
+
+    def close(self) -> None:
+        self.flush()
+        self._connection.close()
+
+    def __enter__(self) -> "SQLiteSink":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def execute(self, sql: str, parameters: Tuple[Any, ...] = ()) -> sqlite3.Cursor:
+        self.flush()
+        return self._connection.execute(sql, parameters)
+
+    def _meta(self) -> Dict[str, Any]:
+        return {
+            key: json.loads(value)
+            for key, value in self._connection.execute("SELECT key, value FROM meta")
+        }
+
+    def iter_pages(self) -> Iterator[Dict[str, Any]]:
+        self.flush()
+        for (data,) in self._connection.execute("SELECT data FROM pages ORDER BY id"):
+            yield json.loads(data)
+
+    def iter_entries(self) -> Iterator[Dict[str, Any]]:
+        """Yields entries (in the raw HAR form) in insertion order."""
+        self.flush()
+        # headers and cookies are read with a query each, ordered by entry ID,
+        # and merged with the entries as they are streamed
+        headers = ChildRows(
+            self._connection.execute(
+                "SELECT entry_id, direction, name, value FROM headers "
+                "ORDER BY entry_id, position"
+            )
+        )
+        cookies = ChildRows(
+            self._connection.execute(
+                "SELECT entry_id, direction, data FROM cookies "
+                "ORDER BY entry_id, position"
+            )
+        )
+        rows = self._connection.execute(
+            "SELECT entries.id, entries.data, entries.body, bodies.data "
+            "FROM entries LEFT JOIN bodies ON entries.body_hash = bodies.hash "
+            "ORDER BY entries.id"
+        )
+        for entry_id, data, blob, hashed in rows:
+            entry = json.loads(data)
+
+            entry_headers = headers.take(entry_id)
+            entry_cookies = cookies.take(entry_id)
+            for direction in ("request", "response"):
+                entry[direction]["headers"] = [
+                    {"name": name, "value": value}
+                    for name, value in entry_headers[direction]
+                ]
+                entry[direction]["cookies"] = [
+                    json.loads(cookie) for (cookie,) in entry_cookies[direction]
+                ]
+
+            body = blob if blob is not None else hashed
+            if body is not None:
+                bytes_to_body(body, entry["response"]["content"])
+
+            yield entry
+
+    def export(self, path: Union[str, pathlib.Path]) -> None:
+        """Writes the database out as a HAR file in a streaming fashion."""
+        meta = self._meta()
+        with open(path, "w") as f, HarWriter(
+            f,
+            version=meta.get("version", "1.2"),
+            creator=meta.get("creator"),
+            browser=meta.get("browser"),
+        ) as writer:
+            for page in self.iter_pages():
+                writer.add_page(page)
+            for entry in self.iter_entries():
+                writer.add_entry(entry)
+
+    def to_har(self) -> dataclasses.har.Har:
+        meta = self._meta()
+        data = {
+            "log": {
+                "version": meta.get("version", "1.2"),
+                "creator": meta.get("creator", {"name": "", "version": ""}),
+                "browser": meta.get("browser", {"name": "", "version": ""}),
+                "pages": list(self.iter_pages()),
+                "entries": list(self.iter_entries()),
+            }
+        }
+        return dataclasses.har.Har.from_dict(decode_datetimes(data))
@@ -0,0 +1,186 @@
+import heapq
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from . import dataclasses
+from .utils import normalize_mime_type
+
+TIMING_PHASES = ("blocked", "dns", "connect", "ssl", "send", "wait", "receive")
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class QuantileSketch:
+    """A mergeable quantile sketch with relative accuracy guarantees.
+
+    Values are counted in logarithmically sized buckets (as in DDSketch), so
+    a quantile is off by at most relative_accuracy and two sketches with the
+    same accuracy are merged by adding up their buckets.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy should be between 0 and 1")
+
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: Counter = Counter()
+        self._zero_count = 0
+
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        if value < 0:
+            raise ValueError("value should not be negative")
+
+        if value == 0:
+            self._zero_count += 1
+        else:
+            self._buckets[math.ceil(math.log(value) / self._log_gamma)] += 1
+
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("sketches should have the same relative_accuracy")
+
+        self._buckets.update(other._buckets)
+        self._zero_count += other._zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not 0 <= q <= 1:
+            raise ValueError("q should be between 0 and 1")
+
+        if self.count == 0:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self._zero_count
+        if rank < seen:
+            return 0.0
+
+        for key in sorted(self._buckets):
+            seen += self._buckets[key]
+            if rank < seen:
+                value = 2 * self._gamma**key / (self._gamma + 1)
+                # the bucket estimate may fall just outside the observed range
+                return min(max(value, self.min), self.max)
+
+        return self.max
+
+
+class Stats:
+    """Aggregates of a set of entries, updated one entry at a time.
+
+    Keeps request counts per domain, bytes per MIME type, sketches of the
+    timing phases and the total time, and the slowest resources. Stats are
+    mergeable, so per-page stats add up to per-context ones.
+    """
+
+    def __init__(self, *, relative_accuracy: float = 0.01, slowest: int = 10):
+        self.relative_accuracy = relative_accuracy
+        self.slowest_size = slowest
+
+        self.requests = 0
+        self.failed = 0
+        self.requests_by_domain: Counter = Counter()
+        self.bytes_by_mime_type: Counter = Counter()
+        self.timings: Dict[str, QuantileSketch] = {
+            phase: QuantileSketch(relative_accuracy)
+            for phase in TIMING_PHASES + ("time",)
+        }
+        # a min heap of (time, url), so the fastest of the slowest is evicted
+        self._slowest: List[Tuple[float, str]] = []
+
+    def add_request(self, url: str) -> None:
+        self.requests += 1
+        self.requests_by_domain[urlparse(url).hostname or ""] += 1
+
+    def add_failure(self) -> None:
+        self.failed += 1
+
+    def add_bytes(self, mime_type: Optional[str], size: int) -> None:
+        if size >= 0:
+            self.bytes_by_mime_type[normalize_mime_type(mime_type)] += size
+
+    def add_timings(
+        self, url: str, timings: dataclasses.har.Timings, time: float
+    ) -> None:
+        for phase in TIMING_PHASES:
+            value = getattr(timings, phase)
+            # -1 stands for a phase which doesn't apply
+            if value is not None and value >= 0:
+                self.timings[phase].add(value)
+
+        if time < 0:
+            return
+
+        self.timings["time"].add(time)
+        if len(self._slowest) < self.slowest_size:
+            heapq.heappush(self._slowest, (time, url))
+        elif self.slowest_size > 0 and time > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (time, url))
+
+    def add_entry(self, entry: dataclasses.har.Entry) -> None:
+        self.add_request(entry.request.url)
+        if entry.response._failure_text is not None:
+            self.add_failure()
+        self.add_bytes(entry.response.content.mime_type, entry.response.content.size)
+        self.add_timings(entry.request.url, entry.timings, entry.time)
+
+    @property
+    def slowest(self) -> List[Tuple[float, str]]:
+        """The slowest resources as (time, url), slowest first."""
+        return sorted(self._slowest, reverse=True)
+
+    def merge(self, other: "Stats") -> None:
+        self.requests += other.requests
+        self.failed += other.failed
+        self.requests_by_domain.update(other.requests_by_domain)
+        self.bytes_by_mime_type.update(other.bytes_by_mime_type)
+        for phase, sketch in self.timings.items():
+            sketch.merge(other.timings[phase])
+
+        self._slowest = heapq.nlargest(
+            self.slowest_size, self._slowest + other._slowest
+        )
+        heapq.heapify(self._slowest)
+
+    @classmethod
+    def merged(
+        cls,
+        stats: Iterable["Stats"],
+        *,
+        relative_accuracy: float = 0.01,
+        slowest: int = 10,
+    ) -> "Stats":
+        result = cls(relative_accuracy=relative_accuracy, slowest=slowest)
+        for item in stats:
+            result.merge(item)
+        return result
+
+    def summary(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> Dict[str, Any]:
+        quantiles = list(quantiles)
+        return {
+            "requests": self.requests,
+            "failed": self.failed,
+            "requestsByDomain": dict(self.requests_by_domain),
+            "bytesByMimeType": dict(self.bytes_by_mime_type),
+            "timings": {
+                phase: {f"p{q * 100:g}": sketch.quantile(q) for q in quantiles}
+                for phase, sketch in self.timings.items()
+            },
+            "slowest": [{"time": time, "url": url} for time, url in self.slowest],
+        }
@@ -0,0 +1,252 @@
+import base64
+import json
+import mmap
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from . import dataclasses
+from .body_store import Body, BodyStore
+
+DEFAULT_CHUNK_SIZE: int = 1024 * 1024
+# a multiple of 3, so that the chunks are encoded without padding
+BASE64_CHUNK_SIZE: int = 3 * 256 * 1024
+# stands for a body streamed from a body store
+BODY_PLACEHOLDER: str = "\x00body\x00"
+
+ARRAY_FIELDS = ("pages", "entries")
+WHITESPACE = " \t\n\r"
+
+JSONLike = Union[Dict[str, Any], "dataclasses.mixin.CustomizedDataClassJsonMixin"]
+
+
+class _Buffer:
+    def __init__(self, fp: IO[str], chunk_size: int):
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+
+        # read at least as much as is buffered so that a large value is
+        # decoded in O(log n) attempts
+        chunk = self._fp.read(max(self._chunk_size, len(self.buf) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found!r}")
+
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+
+            # a number at the end of the buffer might be truncated
+            if end == len(self.buf) and self.fill():
+                continue
+
+            self.pos = end
+            return value
+
+
+def iter_log(
+    fp: IO[str], *, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Tuple[str, Any]]:
+    """Iterates over the fields of a HAR file's log without loading it whole.
+
+    Yields (name, value) pairs. The items of pages and entries are yielded one
+    by one as ("pages", page) and ("entries", entry) in raw (dict) form.
+    """
+    buffer = _Buffer(fp, chunk_size)
+
+    buffer.expect("{")
+    while buffer.peek() != "}":
+        key = buffer.value()
+        buffer.expect(":")
+        if key != "log":
+            buffer.value()
+        else:
+            yield from _iter_log_object(buffer)
+
+        if buffer.peek() == ",":
+            buffer.pos += 1
+
+    buffer.expect("}")
+
+
+def _iter_log_object(buffer: _Buffer) -> Iterator[Tuple[str, Any]]:
+    buffer.expect("{")
+    while buffer.peek() != "}":
+        key = buffer.value()
+        buffer.expect(":")
+        if key in ARRAY_FIELDS:
+            buffer.expect("[")
+            while buffer.peek() != "]":
+                yield key, buffer.value()
+                if buffer.peek() == ",":
+                    buffer.pos += 1
+            buffer.expect("]")
+        else:
+            yield key, buffer.value()
+
+        if buffer.peek() == ",":
+            buffer.pos += 1
+
+    buffer.expect("}")
+
+
+def to_jsonable(obj: JSONLike) -> Dict[str, Any]:
+    if isinstance(obj, dict):
+        return obj
+
+    return obj.to_dict(encode_json=True)
+
+
+def with_body_placeholder(data: Dict[str, Any]) -> Dict[str, Any]:
+    # copies only the containers on the way to the content
+    response = data["response"]
+    content = dict(response["content"])
+    del content["_file"]
+    content["text"] = BODY_PLACEHOLDER
+    content["encoding"] = "base64"
+    return {**data, "response": {**response, "content": content}}
+
+
+class HarWriter:
+    """Writes a HAR file incrementally.
+
+    Entries are written as soon as they are added. Pages are buffered (they
+    are small) and written after the entries when the writer is closed.
+
+    With a body_store, bodies stored in it (content._file) are inlined as
+    base64. They are encoded in chunks straight from the store's (memory
+    mapped) view, so no copy of a whole body is made.
+    """
+
+    def __init__(
+        self,
+        fp: IO[str],
+        *,
+        version: str = "1.2",
+        creator: Optional[JSONLike] = None,
+        browser: Optional[JSONLike] = None,
+        comment: Optional[str] = None,
+        body_store: Optional[BodyStore] = None,
+    ):
+        self._fp = fp
+        self._body_store = body_store
+        self._pages: List[Dict[str, Any]] = []
+        self._entries = 0
+        self._closed = False
+
+        header: Dict[str, Any] = {"version": version}
+        if creator is not None:
+            header["creator"] = to_jsonable(creator)
+        if browser is not None:
+            header["browser"] = to_jsonable(browser)
+        if comment is not None:
+            header["comment"] = comment
+
+        self._fp.write('{"log": ')
+        # drop the closing brace to continue the object
+        self._fp.write(json.dumps(header)[:-1])
+        self._fp.write(', "entries": [')
+
+    @property
+    def entries(self) -> int:
+        return self._entries
+
+    def add_page(self, page: JSONLike) -> None:
+        self._pages.append(to_jsonable(page))
+
+    def add_entry(self, entry: JSONLike) -> None:
+        if self._entries > 0:
+            self._fp.write(", ")
+
+        data = to_jsonable(entry)
+        name = data.get("response", {}).get("content", {}).get("_file")
+        if self._body_store is None or name is None:
+            self._fp.write(json.dumps(data))
+        else:
+            prefix, suffix = json.dumps(with_body_placeholder(data)).split(
+                json.dumps(BODY_PLACEHOLDER), 1
+            )
+            self._fp.write(prefix + '"')
+            self._write_base64(self._body_store.map(name))
+            self._fp.write('"' + suffix)
+
+        self._entries += 1
+
+    def _write_base64(self, body: Body) -> None:
+        view = memoryview(body)
+        try:
+            for start in range(0, len(view), BASE64_CHUNK_SIZE):
+                chunk = base64.b64encode(view[start : start + BASE64_CHUNK_SIZE])
+                self._fp.write(chunk.decode("ascii"))
+        finally:
+            view.release()
+            if isinstance(body, mmap.mmap):
+                body.close()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+
+        self._closed = True
+        self._fp.write('], "pages": ')
+        self._fp.write(json.dumps(self._pages))
+        self._fp.write("}}")
+
+    def __enter__(self) -> "HarWriter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def write_har(
+    har: dataclasses.har.Har, fp: IO[str], *, body_store: Optional[BodyStore] = None
+) -> None:
+    """Writes a HAR, inlining the bodies of body_store (see HarWriter)."""
+    log = har.log
+    with HarWriter(
+        fp,
+        version=log.version,
+        creator=log.creator,
+        browser=log.browser,
+        comment=log.comment,
+        body_store=body_store,
+    ) as writer:
+        for page in log.pages:
+            writer.add_page(page)
+        for entry in log.entries:
+            writer.add_entry(entry)
@@ -0,0 +1,420 @@
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass, field
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
+
+from playwright.sync_api import BrowserContext, Error, Page, Request, Response
+
+from . import dataclasses
+from .base_tracer import BaseHarTracer
+from .body_store import BodyStore
+from .constants import PAGE_TIMINGS_SCRIPT
+from .processors import Processor
+from .request_index import RequestIndex
+from .scheduler import Priority, body_priority
+from .utils import (
+    body_to_base64,
+    calculate_request_body_size,
+    calculate_time,
+    new_entry,
+    new_response,
+    post_data_for_har,
+    set_headers,
+    set_page_timings,
+    set_request_sizes,
+    set_sizes,
+    set_timings,
+    timing_to_timings,
+)
+
+EntryCallback = Callable[[dataclasses.har.Entry], None]
+HarCallback = Callable[[dataclasses.har.Har], None]
+Step = Tuple[Priority, Callable[[], None]]
+# what runs instead of a deferred job once flush() times out (None drops the
+# job, the job itself runs it anyway), and the job
+Job = Tuple[Optional[Callable[[], None]], Callable[[], None]]
+
+
+@dataclass
+class SyncPageState:
+    entry: dataclasses.har.Page
+    # the page start in epoch milliseconds, so that it is compared as is
+    started: float = 0.0
+    entries: List[dataclasses.har.Entry] = field(default_factory=list)
+
+
+class SyncHarTracer(BaseHarTracer):
+    """HarTracer for the sync API.
+
+    Event handlers only record what the events carry. Enrichment calls
+    (headers, sizes, server details, bodies, page timings) are deferred to a
+    work queue which is run by drain(), entries() and flush(), so the sync
+    event dispatch is never blocked by a round trip to the browser.
+
+    Enrichment runs on the calling thread (the sync API can't be used from
+    another thread), so call drain() between page operations to keep the
+    queue short and to read bodies before their pages are closed. An entry
+    whose enrichment fails (e.g. the page is already closed) is marked as
+    incomplete.
+    """
+
+    def __init__(
+        self,
+        context: BrowserContext,
+        browser_name: str,
+        *,
+        omit_content: bool = False,
+        on_entry_complete: Optional[EntryCallback] = None,
+        stream_entries: bool = False,
+        on_page_complete: Optional[HarCallback] = None,
+        body_store: Optional[BodyStore] = None,
+        index: bool = False,
+        binary_post_data: str = "omit",
+        max_post_data_size: Optional[int] = None,
+        processors: Optional[Sequence[Processor]] = None,
+    ):
+        if context.browser is None:
+            raise ValueError
+
+        super().__init__(
+            browser_name,
+            context.browser.version,
+            index=index,
+            binary_post_data=binary_post_data,
+            max_post_data_size=max_post_data_size,
+            processors=processors,
+        )
+
+        self._context = context
+        self._omit_content = omit_content
+        self._body_store = body_store
+        self._on_entry_complete = on_entry_complete
+        self._on_page_complete = on_page_complete
+
+        self._completed: Optional[Deque[dataclasses.har.Entry]] = None
+        if stream_entries:
+            self._completed = deque()
+
+        self._pages: Dict[Page, SyncPageState] = {}
+        self._requests = RequestIndex()
+        self._steps: "weakref.WeakKeyDictionary[Request, List[Step]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._work: Deque[Job] = deque()
+
+        context.on("page", self.on_page)
+
+    def _post_data_for_har(
+        self, request: Request
+    ) -> Optional[dataclasses.har.PostData]:
+        return post_data_for_har(
+            request,  # type: ignore
+            binary_post_data=self._binary_post_data,
+            max_post_data_size=self._max_post_data_size,
+        )
+
+    @property
+    def pending(self) -> int:
+        """The number of deferred jobs waiting for drain()."""
+        return len(self._work)
+
+    def _add_step(
+        self, request: Request, priority: Priority, step: Callable[[], None]
+    ) -> None:
+        steps = self._steps.get(request)
+        if steps is not None:
+            steps.append((priority, step))
+
+    def _complete_entry(
+        self,
+        har_entry: dataclasses.har.Entry,
+        page_state: Optional[SyncPageState],
+    ) -> None:
+        page_entries = page_state.entries if page_state is not None else None
+        if not self._process_entry(har_entry, page_entries):
+            return
+
+        if self._on_entry_complete is not None:
+            self._on_entry_complete(har_entry)
+
+        if self._completed is not None:
+            self._completed.append(har_entry)
+
+    def _run_entry(
+        self,
+        har_entry: dataclasses.har.Entry,
+        page_state: Optional[SyncPageState],
+        steps: List[Step],
+    ) -> None:
+        for _, step in sorted(steps, key=lambda step: step[0]):
+            try:
+                step()
+            except Error:
+                har_entry._incomplete = True
+
+        self._complete_entry(har_entry, page_state)
+
+    def _abandon_entry(
+        self,
+        har_entry: dataclasses.har.Entry,
+        page_state: Optional[SyncPageState],
+    ) -> None:
+        # the entry is completed as it is, without its enrichment
+        har_entry._incomplete = True
+        self._complete_entry(har_entry, page_state)
+
+    def _run_job(self) -> None:
+        _, job = self._work.popleft()
+        job()
+
+    def drain(self, max_jobs: Optional[int] = None) -> int:
+        """Runs deferred jobs (all of them by default).
+
+        Returns the number of jobs run.
+        """
+        count = 0
+        while len(self._work) > 0 and (max_jobs is None or count < max_jobs):
+            self._run_job()
+            count += 1
+        return count
+
+    def entries(self) -> Iterator[dataclasses.har.Entry]:
+        """Yields completed entries, running deferred jobs as it goes.
+
+        Stops once the work queue is empty.
+        """
+        if self._completed is None:
+            raise ValueError("stream_entries should be enabled to stream entries")
+
+        while True:
+            while len(self._completed) > 0:
+                yield self._completed.popleft()
+
+            if len(self._work) == 0:
+                return
+
+            self._run_job()
+
+    def on_request(self, page: Page, request: Request) -> None:
+        page_state = self._pages.get(page)
+        if page_state is None:
+            return
+
+        har_entry = new_entry(
+            page_state.entry.id,
+            request.method,
+            request.url,
+            self._post_data_for_har(request),
+            calculate_request_body_size(request),  # type: ignore
+        )
+
+        from_entry = self._requests.redirect_source(request)  # type: ignore
+        if from_entry is not None:
+            from_entry.response.redirect_url = request.url
+
+        self._add_entry(har_entry, page_state.entries)
+        self._requests.add(request, har_entry)  # type: ignore
+        self._steps[request] = []
+
+    def on_response(self, page: Page, response: Response) -> None:
+        page_state = self._pages.get(page)
+        if page_state is None:
+            return
+
+        request = response.request
+        record = self._requests.get(request)  # type: ignore
+        if record is None:
+            return
+
+        har_entry = record.entry
+        har_entry.response = new_response(response.status, response.status_text)
+        page_state.started = set_timings(
+            page_state.entry, har_entry, request.timing, page_state.started
+        )
+
+        def rewrite_headers() -> None:
+            set_headers(har_entry, request.all_headers(), response.all_headers())
+            har_entry.request.post_data = self._post_data_for_har(request)
+
+        self._add_step(request, Priority.HEADERS, rewrite_headers)
+
+        def set_server_and_security_details() -> None:
+            server = cast(Optional[Dict[str, Union[str, int]]], response.server_addr())
+            if server is not None:
+                har_entry.server_ip_address = cast(
+                    Optional[str], server.get("ipAddress")
+                )
+                har_entry._server_port = cast(Optional[int], server.get("port"))
+
+            security_details = cast(
+                Optional[Dict[str, Union[str, int, float]]],
+                response.security_details(),
+            )
+            if security_details is not None:
+                har_entry._security_details = dataclasses.har.SecurityDetails.from_dict(
+                    security_details
+                )
+
+        self._add_step(request, Priority.DETAILS, set_server_and_security_details)
+
+        if self._omit_content is False and response.status == 200:
+
+            def set_body() -> None:
+                body = response.body()
+                content = har_entry.response.content
+                content.size = len(body)
+
+                if self._body_store is not None:
+                    # keep only a reference to the stored body in the entry
+                    content._file = self._body_store.write(body, content.mime_type)
+                    return
+
+                content.text = body_to_base64(body)
+                content.encoding = "base64"
+
+            self._add_step(request, body_priority(request.resource_type), set_body)
+
+    def on_request_finished(self, page: Page, request: Request) -> None:
+        record = self._requests.get(request)  # type: ignore
+        if record is None:
+            return
+
+        har_entry = record.entry
+
+        page_state = self._pages.get(page)
+        if page_state is not None:
+            # the timing is complete (responseEnd is set) only at this point
+            page_state.started = set_timings(
+                page_state.entry,
+                har_entry,
+                request.timing,
+                page_state.started,
+            )
+
+        def update_sizes() -> None:
+            response = request.response()
+            if response is None:
+                return
+
+            try:
+                set_request_sizes(har_entry, cast(Dict[str, int], request.sizes()))
+            except Error:
+                # e.g. the browser doesn't keep the raw headers
+                set_sizes(har_entry, request.all_headers(), response.all_headers())
+
+        self._add_step(request, Priority.SIZES, update_sizes)
+
+        steps = self._steps.pop(request, [])
+        self._requests.evict(request)  # type: ignore
+        self._work.append(
+            (
+                lambda: self._abandon_entry(har_entry, page_state),
+                lambda: self._run_entry(har_entry, page_state, steps),
+            )
+        )
+
+    def on_request_failed(self, page: Page, request: Request) -> None:
+        record = self._requests.get(request)  # type: ignore
+        if record is None:
+            return
+
+        page_state = self._pages.get(page)
+
+        # nothing left to enrich
+        self._steps.pop(request, None)
+        self._requests.evict(request)  # type: ignore
+
+        har_entry = record.entry
+        har_entry.response._failure_text = request.failure
+        har_entry.timings = timing_to_timings(request.timing)
+        har_entry.time = calculate_time(har_entry.timings)
+
+        # there's nothing to enrich, so it's never abandoned
+        def complete_entry() -> None:
+            self._complete_entry(har_entry, page_state)
+
+        self._work.append((complete_entry, complete_entry))
+
+    def on_page(self, page: Page) -> None:
+        started = time.time()
+        page_entry = self._add_page(started)
+
+        page_state = SyncPageState(entry=page_entry, started=started * 1000.0)
+        self._pages[page] = page_state
+
+        page.on("request", lambda request: self.on_request(page, request))
+        page.on(
+            "requestfinished", lambda request: self.on_request_finished(page, request)
+        )
+        page.on("response", lambda response: self.on_response(page, response))
+        page.on("requestfailed", lambda request: self.on_request_failed(page, request))
+        page.on("close", lambda: self.on_page_close(page))
+
+        def update_page_timings() -> None:
+            try:
+                result: Dict[str, Union[str, float]] = page.main_frame.evaluate(
+                    PAGE_TIMINGS_SCRIPT
+                )
+            except Error:
+                # the page was closed (or navigated away) before the
+                # evaluation, so the page timings are left unset
+                return
+
+            set_page_timings(page_entry, result)
+
+        page.on("load", lambda: self._work.append((None, update_page_timings)))
+
+    def on_page_close(self, page: Page) -> None:
+        page_state = self._pages.pop(page, None)
+        if page_state is None:
+            return
+
+        # pages are completed (and handed off) even once flush() times out
+        def complete_page() -> None:
+            self._complete_page(page_state)
+
+        self._work.append((complete_page, complete_page))
+
+    def _complete_page(self, page_state: SyncPageState) -> None:
+        if self._on_page_complete is None:
+            # the page stays in the log until flush()
+            return
+
+        self._on_page_complete(
+            self._hand_off_page(page_state.entry, page_state.entries)
+        )
+
+    def flush(self, timeout: Optional[float] = None) -> dataclasses.har.Har:
+        abandoned = 0
+        if timeout is None:
+            self.drain()
+        else:
+            deadline = time.monotonic() + timeout
+            while len(self._work) > 0 and time.monotonic() < deadline:
+                self._run_job()
+
+            while len(self._work) > 0:
+                on_abandon, job = self._work.popleft()
+                if on_abandon is not job:
+                    abandoned += 1
+                if on_abandon is not None:
+                    on_abandon()
+
+        log = self._snapshot_log()
+        if abandoned > 0:
+            log.comment = f"{abandoned} job(s) abandoned due to timeout"
+
+        har = dataclasses.har.Har(log=log)
+        return har
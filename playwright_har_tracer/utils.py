@@ -1,14 +1,38 @@
+import asyncio
+import base64
 import re
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from urllib.parse import parse_qs, urlparse
-
-import dateutil.parser
-from playwright.async_api import Request
+from concurrent.futures import Executor
+from datetime import datetime, timedelta, timezone
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+from urllib.parse import unquote_plus, urlparse, urlsplit, urlunsplit
 
 from . import dataclasses
 from .constants import FALLBACK_HTTP_VERSION
 
+if TYPE_CHECKING:
+    from playwright.async_api import Request, ResourceTiming
+
+T = TypeVar("T")
+
+MONTHS = {
+    month: i + 1
+    for i, month in enumerate("Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec".split())
+}
+RFC1123_DATE_PATTERN = re.compile(
+    r"(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun), (\d{2}) ([A-Z][a-z]{2}) (\d{4}) "
+    r"(\d{2}):(\d{2}):(\d{2}) GMT"
+)
+
 
 def millis_to_roundish_millis(value: float) -> int:
     return int(int(value * 1000) / 1000)
@@ -18,21 +42,122 @@ def datetime_to_millis(dt: datetime) -> float:
     return dt.timestamp() * 1000.0
 
 
-def query_to_query_params(query: str) -> List[dataclasses.har.QueryParameter]:
-    query_params: List[dataclasses.har.QueryParameter] = []
+def timing_to_timings(timing: "ResourceTiming") -> dataclasses.har.Timings:
+    domain_lookup_start: Union[float, int] = timing.get("domainLookupStart", -1)
+    domain_lookup_end: Union[float, int] = timing.get("domainLookupEnd", -1)
+    dns = (
+        millis_to_roundish_millis(domain_lookup_end - domain_lookup_start)
+        if domain_lookup_end != -1
+        else -1
+    )
+
+    connect_start: Union[float, int] = timing.get("connectStart", -1)
+    connect_end: Union[float, int] = timing.get("connectEnd", -1)
+    connect = (
+        millis_to_roundish_millis(connect_end - connect_start)
+        if connect_end != -1
+        else -1
+    )
+
+    secure_connection_start: Union[float, int] = timing.get("secureConnectionStart", -1)
+    # -1 on plain HTTP connections
+    ssl = (
+        millis_to_roundish_millis(connect_end - secure_connection_start)
+        if connect_end != -1 and secure_connection_start != -1
+        else -1
+    )
+
+    request_start: Union[float, int] = timing.get("requestStart", -1)
+    response_start: Union[float, int] = timing.get("responseStart", -1)
+    wait = (
+        millis_to_roundish_millis(response_start - request_start)
+        if response_start != -1
+        else -1
+    )
 
-    parsed_query_params = parse_qs(query)
-    for name, values in parsed_query_params.items():
-        value = "".join(values)
-        query_params.append(dataclasses.har.QueryParameter(name=name, value=value))
+    response_end: Union[float, int] = timing.get("responseEnd", -1)
+    receive = (
+        millis_to_roundish_millis(response_end - response_start)
+        if response_end != -1
+        else -1
+    )
+
+    return dataclasses.har.Timings(
+        dns=dns,
+        connect=connect,
+        ssl=ssl,
+        send=0,
+        wait=wait,
+        receive=receive,
+    )
+
+
+def calculate_time(timings: dataclasses.har.Timings) -> Union[int, float]:
+    return sum(
+        [
+            timings.dns or 0,
+            timings.connect or 0,
+            # ssl doesn't apply (-1) to plain HTTP connections
+            max(timings.ssl or 0, 0),
+            timings.wait,
+            timings.receive,
+        ]
+    )
 
-    return query_params
+
+def finalize_page_timings(page_entry: dataclasses.har.Page) -> None:
+    # convert absolute timestamps into offsets from the page start
+    started = datetime_to_millis(page_entry.started_date_time)
+
+    on_content_load = page_entry.page_timings.on_content_load
+    if on_content_load is not None and float(on_content_load) >= 0.0:
+        page_entry.page_timings.on_content_load = float(on_content_load) - started
+    else:
+        page_entry.page_timings.on_content_load = -1
+
+    on_load = page_entry.page_timings.on_load
+    if on_load is not None and float(on_load) >= 0.0:
+        page_entry.page_timings.on_load = float(on_load) - started
+    else:
+        page_entry.page_timings.on_load = -1
+
+
+def parse_query(query: str) -> List[Tuple[str, str]]:
+    # equivalent to parse_qsl(query, keep_blank_values=True), but unquotes
+    # only the fields which need it
+    pairs: List[Tuple[str, str]] = []
+    for field in query.split("&"):
+        if not field:
+            continue
+
+        name, _, value = field.partition("=")
+        if "%" in name or "+" in name:
+            name = unquote_plus(name)
+        if "%" in value or "+" in value:
+            value = unquote_plus(value)
+        pairs.append((name, value))
+
+    return pairs
+
+
+def query_to_query_params(query: str) -> List[dataclasses.har.QueryParameter]:
+    # keep the original order, duplicated keys and blank values
+    if not query:
+        return []
+
+    return [
+        dataclasses.har.QueryParameter(name=name, value=value)
+        for name, value in parse_query(query)
+    ]
 
 
 def form_data_to_params(data: str) -> List[dataclasses.har.Param]:
-    params = query_to_query_params(data)
+    if not data:
+        return []
+
     return [
-        dataclasses.har.Param(name=param.name, value=param.value) for param in params
+        dataclasses.har.Param(name=name, value=value)
+        for name, value in parse_query(data)
     ]
 
 
@@ -42,6 +167,40 @@ def dict_to_headers(dict_: Dict[str, str]) -> List[dataclasses.har.Header]:
     ]
 
 
+def parse_http_date(value: str) -> Optional[datetime]:
+    """Parses an RFC 1123 date (e.g. "Wed, 21 Oct 2015 07:28:00 GMT").
+
+    Returns None for other formats.
+    """
+    match = RFC1123_DATE_PATTERN.fullmatch(value)
+    if match is None:
+        return None
+
+    day, month, year, hour, minute, second = match.groups()
+    if month not in MONTHS:
+        return None
+
+    try:
+        return datetime(
+            int(year),
+            MONTHS[month],
+            int(day),
+            int(hour),
+            int(minute),
+            int(second),
+            tzinfo=timezone.utc,
+        )
+    except ValueError:
+        return None
+
+
+def parse_obsolete_date(value: str) -> datetime:
+    # dateutil handles the obsolete formats, it is imported only when needed
+    import dateutil.parser
+
+    return dateutil.parser.parse(value)
+
+
 def parse_cookie(c: str) -> dataclasses.har.Cookie:
     cookie = dataclasses.har.Cookie(name="", value="")
 
@@ -66,7 +225,7 @@ def parse_cookie(c: str) -> dataclasses.har.Cookie:
             cookie.domain = value
 
         if name == "Expires":
-            cookie.expires = dateutil.parser.parse(value)
+            cookie.expires = parse_http_date(value) or parse_obsolete_date(value)
 
         if name == "HttpOnly":
             cookie.http_only = True
@@ -97,45 +256,192 @@ def cookies_for_har(
     return [parse_cookie(c) for c in header.split(separator)]
 
 
-def post_data_for_har(request: Request) -> Optional[dataclasses.har.PostData]:
+TEXTUAL_MIME_TYPES = {
+    "application/graphql",
+    "application/javascript",
+    "application/json",
+    "application/x-www-form-urlencoded",
+    "application/xml",
+}
+BINARY_POST_DATA_MODES = ("omit", "base64")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+MULTIPART_PARAM_PATTERN = re.compile(
+    r';\s*([\w*-]+)\s*=\s*(?:"((?:[^"\\]|\\.)*)"|([^;]*))'
+)
+
+
+def normalize_mime_type(mime_type: Optional[str]) -> str:
+    if mime_type is None:
+        return ""
+
+    return mime_type.split(";")[0].strip().lower()
+
+
+def normalize_url(url: str) -> str:
+    """Normalizes a URL for lookups.
+
+    The scheme and host are lowercased, default ports and the fragment are
+    dropped and query parameters are sorted.
+    """
+    parsed = urlsplit(url)
+    scheme = parsed.scheme.lower()
+    host = parsed.hostname or ""
+    if ":" in host:
+        host = f"[{host}]"
+
+    port = parsed.port
+    netloc = (
+        host if port is None or DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+    )
+    query = "&".join(sorted(part for part in parsed.query.split("&") if part))
+    return urlunsplit((scheme, netloc, parsed.path or "/", query, ""))
+
+
+def is_textual_mime_type(mime_type: str) -> bool:
+    mime_type = normalize_mime_type(mime_type)
+    return (
+        mime_type.startswith("text/")
+        or mime_type in TEXTUAL_MIME_TYPES
+        or mime_type.endswith("+json")
+        or mime_type.endswith("+xml")
+    )
+
+
+def header_params(value: str) -> Dict[str, str]:
+    """Parses the parameters of a header value (e.g. '; name="a"; filename=b')."""
+    params: Dict[str, str] = {}
+    for match in MULTIPART_PARAM_PATTERN.finditer(value):
+        name, quoted, token = match.groups()
+        params[name.lower()] = (
+            re.sub(r"\\(.)", r"\1", quoted) if quoted is not None else token.strip()
+        )
+    return params
+
+
+def multipart_to_params(body: bytes, boundary: str) -> List[dataclasses.har.Param]:
+    """Parses a multipart/form-data body into params.
+
+    Only the part headers and the values of non-file fields are copied out of
+    the body, file parts are reported with their file name and content type.
+    """
+    delimiter = b"--" + boundary.encode("utf8")
+    view = memoryview(body)
+    params: List[dataclasses.har.Param] = []
+
+    position = body.find(delimiter)
+    while position != -1:
+        start = position + len(delimiter)
+        if body.startswith(b"--", start):
+            # the close delimiter
+            break
+
+        headers_end = body.find(b"\r\n\r\n", start)
+        if headers_end == -1:
+            break
+
+        end = body.find(b"\r\n" + delimiter, headers_end + 4)
+        if end == -1:
+            break
+
+        headers: Dict[str, str] = {}
+        for line in (
+            bytes(view[start:headers_end]).decode("utf8", "replace").split("\r\n")
+        ):
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+
+        disposition = header_params(headers.get("content-disposition", ""))
+        name = disposition.get("name", "")
+        file_name = disposition.get("filename")
+        if file_name is not None:
+            params.append(
+                dataclasses.har.Param(
+                    name=name,
+                    file_name=file_name,
+                    content_type=headers.get(
+                        "content-type", "application/octet-stream"
+                    ),
+                )
+            )
+        else:
+            params.append(
+                dataclasses.har.Param(
+                    name=name,
+                    value=str(view[headers_end + 4 : end], "utf8", "replace"),
+                )
+            )
+
+        position = end + 2
+
+    return params
+
+
+def post_data_for_har(
+    request: "Request",
+    *,
+    binary_post_data: str = "omit",
+    max_post_data_size: Optional[int] = None,
+) -> Optional[dataclasses.har.PostData]:
+    """Converts the post data of a request.
+
+    Only textual post data is decoded. Binary post data is omitted or base64
+    encoded (binary_post_data="base64"). Both are truncated to
+    max_post_data_size bytes (if it's set).
+    """
     post_data = request.post_data_buffer
     if post_data is None:
         return None
 
     content_type = request.headers.get("content-type", "application/octet-stream")
-    text = (
-        ""
-        if content_type == "application/octet-stream"
-        else post_data.decode("utf8", "replace")
-    )
-    result = dataclasses.har.PostData(mime_type=content_type, text=text, params=[])
+    result = dataclasses.har.PostData(mime_type=content_type, text="", params=[])
+
+    mime_type = normalize_mime_type(content_type)
+    if mime_type == "multipart/form-data":
+        boundary = header_params(content_type).get("boundary")
+        if boundary:
+            result.params.extend(multipart_to_params(post_data, boundary))
+
+    textual = is_textual_mime_type(mime_type)
+    if not textual and binary_post_data == "omit":
+        return result
+
+    data: Union[bytes, memoryview] = post_data
+    if max_post_data_size is not None and len(post_data) > max_post_data_size:
+        data = memoryview(post_data)[:max_post_data_size]
+        result.comment = f"truncated to {max_post_data_size} of {len(post_data)} bytes"
+
+    if textual:
+        result.text = str(data, "utf8", "replace")
+    else:
+        result.text = base64.b64encode(data).decode("ascii")
+        result._encoding = "base64"
 
-    if content_type == "application/x-www-form-urlencoded":
-        form_data = post_data.decode("utf8", "replace")
-        result.params.extend(form_data_to_params(form_data))
+    if mime_type == "application/x-www-form-urlencoded":
+        result.params.extend(form_data_to_params(result.text))
 
     return result
 
 
+def headers_length(headers: Dict[str, str]) -> int:
+    # the length of "name: value\r\n" lines
+    return sum(len(key) + len(value) + 4 for key, value in headers.items())
+
+
 def calculate_response_headers_size(
     protocol: str, status: int, status_text: str, headers: Dict[str, str]
 ) -> int:
-    raw_headers = f"{protocol} {status} {status_text}\r\n"
-    for key, value in headers.items():
-        raw_headers += f"{key}: {value}\r\n"
-    raw_headers += "\r\n"
-    return len(raw_headers)
+    status_line = f"{protocol} {status} {status_text}\r\n"
+    return len(status_line) + headers_length(headers) + 2
 
 
 def calculate_request_headers_size(
     method: str, url: str, http_version: str, headers: Dict[str, str]
 ) -> int:
     parsed = urlparse(url)
-    raw_headers = f"{method} {parsed.path} {http_version}\r\n"
-    for key, value in headers.items():
-        raw_headers += f"{key}: {value}\r\n"
-
-    return len(raw_headers)
+    request_line = f"{method} {parsed.path} {http_version}\r\n"
+    return len(request_line) + headers_length(headers)
 
 
 def normalize_http_version(http_version: Optional[str] = None) -> str:
@@ -145,12 +451,190 @@ def normalize_http_version(http_version: Optional[str] = None) -> str:
     if http_version == "http/1.1":
         return "HTTP/1.1"
 
+    if http_version == "h2":
+        return "HTTP/2.0"
+
+    if http_version == "h3":
+        return "HTTP/3.0"
+
     return http_version
 
 
-def calculate_request_body_size(request: Request) -> Optional[int]:
+def calculate_request_body_size(request: "Request") -> Optional[int]:
     post_data = request.post_data_buffer
     if post_data is None:
         return None
 
-    return len(post_data.decode("utf8", "replace"))
+    return len(post_data)
+
+
+def new_response(status: int = -1, status_text: str = "") -> dataclasses.har.Response:
+    return dataclasses.har.Response(
+        status=status,
+        status_text=status_text,
+        http_version=FALLBACK_HTTP_VERSION,
+        cookies=[],
+        headers=[],
+        content=dataclasses.har.Content(
+            size=-1,
+            mime_type="x-unknown",
+        ),
+        headers_size=-1,
+        body_size=-1,
+        redirect_url="",
+        _transfer_size=-1,
+    )
+
+
+def new_entry(
+    pageref: str,
+    method: str,
+    url: str,
+    post_data: Optional[dataclasses.har.PostData],
+    body_size: Optional[int],
+) -> dataclasses.har.Entry:
+    return dataclasses.har.Entry(
+        pageref=pageref,
+        started_date_time=datetime.now(timezone.utc),
+        time=-1,
+        request=dataclasses.har.Request(
+            method=method,
+            url=url,
+            http_version=FALLBACK_HTTP_VERSION,
+            cookies=[],
+            headers=[],
+            query_string=query_to_query_params(urlparse(url).query),
+            post_data=post_data,
+            headers_size=-1,
+            body_size=body_size or 0,
+        ),
+        response=new_response(),
+        cache=dataclasses.har.Cache(before_request=None, after_request=None),
+        timings=dataclasses.har.Timings(send=-1, wait=-1, receive=-1),
+    )
+
+
+def set_headers(
+    har_entry: dataclasses.har.Entry,
+    request_headers: Dict[str, str],
+    response_headers: Dict[str, str],
+) -> None:
+    # rewrite provisional headers with actual
+    har_entry.request.headers = dict_to_headers(request_headers)
+    har_entry.request.cookies = cookies_for_har(request_headers.get("cookie"), ";")
+
+    har_entry.response.cookies = cookies_for_har(
+        response_headers.get("set-cookie"), "\n"
+    )
+    har_entry.response.headers = dict_to_headers(response_headers)
+
+    har_entry.response.content.mime_type = (
+        response_headers.get("content-type") or har_entry.response.content.mime_type
+    )
+
+
+def set_sizes(
+    har_entry: dataclasses.har.Entry,
+    request_headers: Dict[str, str],
+    response_headers: Dict[str, str],
+) -> None:
+    """Sets the sizes computed from the headers.
+
+    A fallback for set_request_sizes, as the headers Playwright reports are
+    not necessarily the ones sent over the wire.
+    """
+    request, response = har_entry.request, har_entry.response
+
+    request.headers_size = calculate_request_headers_size(
+        request.method, request.url, request.http_version, request_headers
+    )
+    response.headers_size = calculate_response_headers_size(
+        response.http_version, response.status, response.status_text, response_headers
+    )
+    response.body_size = content_length(response_headers)
+    response._transfer_size = (
+        response.headers_size + response.body_size if response.body_size >= 0 else -1
+    )
+
+
+def set_request_sizes(har_entry: dataclasses.har.Entry, sizes: Dict[str, int]) -> None:
+    """Sets the sizes reported by Playwright's request.sizes()."""
+    request, response = har_entry.request, har_entry.response
+
+    request.headers_size = sizes["requestHeadersSize"]
+    request.body_size = sizes["requestBodySize"]
+    response.headers_size = sizes["responseHeadersSize"]
+    # the encoded (i.e. compressed) body size
+    response.body_size = sizes["responseBodySize"]
+    response._transfer_size = (
+        response.headers_size + response.body_size
+        if response.headers_size >= 0 and response.body_size >= 0
+        else -1
+    )
+
+
+def content_length(headers: Dict[str, str]) -> int:
+    try:
+        return int(headers.get("content-length", -1))
+    except ValueError:
+        return -1
+
+
+def set_timings(
+    page_entry: dataclasses.har.Page,
+    har_entry: dataclasses.har.Entry,
+    timing: "ResourceTiming",
+    page_started: Optional[float] = None,
+) -> float:
+    """Sets the timings of an entry from a Playwright request timing.
+
+    The page start (in epoch milliseconds, computed from the page entry if
+    not given) is moved back to the request start if the request started
+    earlier. Returns the page start, so that callers can keep it around.
+    """
+    if page_started is None:
+        page_started = datetime_to_millis(page_entry.started_date_time)
+
+    start_time = timing.get("startTime", -1)
+    if 0 < start_time < page_started:
+        page_entry.started_date_time = datetime.fromtimestamp(
+            start_time / 1000.0, timezone.utc
+        )
+        page_started = start_time
+
+    har_entry.timings = timing_to_timings(timing)
+    har_entry.time = calculate_time(har_entry.timings)
+    return page_started
+
+
+def set_page_timings(
+    page_entry: dataclasses.har.Page, result: Dict[str, Union[str, float]]
+) -> None:
+    page_entry.title = str(result.get("title", ""))
+    page_entry.page_timings.on_content_load = float(result.get("domContentLoaded", -1))
+    page_entry.page_timings.on_load = float(result.get("loaded", -1))
+
+
+def body_to_base64(body: bytes) -> str:
+    return base64.b64encode(body).decode("utf8", "replace")
+
+
+async def run_body_task(
+    func: Callable[..., T],
+    body: bytes,
+    *args: Any,
+    executor: Optional[Executor] = None,
+    inline_threshold: int = 0,
+    blocking: bool = False,
+) -> T:
+    # a blocking func (e.g. disk I/O) never runs on the event loop, it runs in
+    # the loop's default executor when no executor is given
+    if executor is None and not blocking:
+        return func(body, *args)
+
+    # small bodies are cheaper to process inline than to hand over to a thread
+    if not blocking and len(body) < inline_threshold:
+        return func(body, *args)
+
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(executor, func, body, *args)
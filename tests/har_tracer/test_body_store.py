@@ -0,0 +1,79 @@
+import base64
+import io
+import json
+import pathlib
+
+import pytest
+from playwright.async_api import async_playwright
+from pytest_httpserver.httpserver import HTTPServer
+
+from playwright_har_tracer import HarTracer
+from playwright_har_tracer.body_store import FileBodyStore, SpoolBodyStore
+from playwright_har_tracer.streaming import write_har
+
+
+@pytest.mark.asyncio
+async def test_har_tracer_with_body_store(
+    httpserver: HTTPServer, test_html: str, tmp_path: pathlib.Path
+):
+    httpserver.expect_oneshot_request("/foo", method="GET").respond_with_data(
+        response_data=test_html, status=200, headers={"content-type": "text/html"}
+    )
+
+    store = FileBodyStore(tmp_path)
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context()
+        tracer = HarTracer(
+            context=context, browser_name=p.chromium.name, body_store=store
+        )
+
+        page = await context.new_page()
+        await page.goto(httpserver.url_for("/foo"))
+        har = await tracer.flush()
+
+        await context.close()
+        await browser.close()
+
+    content = har.log.entries[0].response.content
+    assert content.text is None
+    assert content._file is not None
+    assert content.size == len(test_html.encode())
+    assert store.read(content._file).decode() == test_html
+
+
+@pytest.mark.asyncio
+async def test_har_tracer_with_spool_body_store(
+    httpserver: HTTPServer, test_html: str, tmp_path: pathlib.Path
+):
+    httpserver.expect_oneshot_request("/foo", method="GET").respond_with_data(
+        response_data=test_html, status=200, headers={"content-type": "text/html"}
+    )
+
+    store = SpoolBodyStore(tmp_path / "bodies.spool")
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context()
+        tracer = HarTracer(
+            context=context, browser_name=p.chromium.name, body_store=store
+        )
+
+        page = await context.new_page()
+        await page.goto(httpserver.url_for("/foo"))
+        har = await tracer.flush()
+
+        await context.close()
+        await browser.close()
+
+    content = har.log.entries[0].response.content
+    assert content.text is None
+    assert content._file == f"0:{len(test_html.encode())}"
+
+    fp = io.StringIO()
+    write_har(har, fp, body_store=store)
+    store.close()
+
+    written = json.loads(fp.getvalue())["log"]["entries"][0]["response"]["content"]
+    assert base64.b64decode(written["text"]).decode() == test_html
@@ -0,0 +1,59 @@
+import pytest
+from playwright.async_api import async_playwright
+from pytest_httpserver.httpserver import HTTPServer
+
+from playwright_har_tracer import HarTracer
+
+
+@pytest.mark.asyncio
+async def test_har_tracer_with_cdp(httpserver: HTTPServer, test_html: str):
+    httpserver.expect_request("/foo", method="GET").respond_with_data(
+        response_data=test_html, status=200, headers={"content-type": "text/html"}
+    )
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context()
+        tracer = HarTracer(context=context, browser_name=p.chromium.name, use_cdp=True)
+
+        # the CDP session is attached before the first navigation
+        page = await tracer.new_page()
+        await page.goto(httpserver.url_for("/foo"))
+        har = await tracer.flush()
+
+        await context.close()
+        await browser.close()
+
+    assert len(har.log.entries) == 1
+    entry = har.log.entries[0]
+    assert entry.request.http_version == "HTTP/1.1"
+    assert entry.response._transfer_size is not None
+    assert entry.response._transfer_size > len(test_html)
+    assert entry.response.body_size == len(test_html)
+    assert entry.connection is not None
+    assert entry.server_ip_address == "127.0.0.1"
+    assert entry._server_port == httpserver.port
+
+
+@pytest.mark.asyncio
+async def test_har_tracer_with_cdp_fallback(httpserver: HTTPServer, test_html: str):
+    httpserver.expect_request("/foo", method="GET").respond_with_data(
+        response_data=test_html, status=200, headers={"content-type": "text/html"}
+    )
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context()
+        tracer = HarTracer(context=context, browser_name=p.chromium.name, use_cdp=True)
+
+        # the session may be attached after the navigation started
+        page = await context.new_page()
+        await page.goto(httpserver.url_for("/foo"))
+        har = await tracer.flush()
+
+        await context.close()
+        await browser.close()
+
+    entry = har.log.entries[0]
+    assert entry.server_ip_address == "127.0.0.1"
+    assert entry._server_port == httpserver.port
@@ -0,0 +1,84 @@
+import json
+import pathlib
+
+from pytest_httpserver.httpserver import HTTPServer
+
+from playwright_har_tracer.crawl import CrawlOptions, crawl, main
+
+
+def expect_pages(httpserver: HTTPServer, n: int):
+    for i in range(n):
+        httpserver.expect_request(f"/{i}", method="GET").respond_with_data(
+            response_data=f"<html><head><title>{i}</title></head></html>",
+            status=200,
+            headers={"content-type": "text/html"},
+        )
+
+
+def test_crawl(httpserver: HTTPServer, tmp_path: pathlib.Path):
+    expect_pages(httpserver, 6)
+    urls = [httpserver.url_for(f"/{i}") for i in range(6)]
+    output = tmp_path / "crawl.har"
+
+    report = crawl(
+        urls + ["http://localhost:1/"],
+        output,
+        workers=2,
+        options=CrawlOptions(contexts=2, timeout=10.0),
+    )
+
+    assert report.pages == 7
+    assert [url for url, _ in report.failed] == ["http://localhost:1/"]
+    assert len(report.workers) == 2
+    assert sum(worker.pages for worker in report.workers) == 7
+    assert report.pages_per_second > 0
+
+    with open(output) as f:
+        log = json.load(f)["log"]
+
+    # pages are merged in the order of the URLs with unique IDs
+    assert [page["id"] for page in log["pages"]] == [f"page_{i}" for i in range(7)]
+    assert [page["title"] for page in log["pages"][:6]] == [str(i) for i in range(6)]
+    first_urls = {}
+    for entry in log["entries"]:
+        first_urls.setdefault(entry["pageref"], entry["request"]["url"])
+    assert [first_urls[f"page_{i}"] for i in range(6)] == urls
+    assert report.entries == len(log["entries"])
+
+
+def test_crawl_with_popup(httpserver: HTTPServer, tmp_path: pathlib.Path):
+    expect_pages(httpserver, 2)
+    httpserver.expect_request("/popup", method="GET").respond_with_data(
+        response_data="<html><script>window.open('/0')</script></html>",
+        status=200,
+        headers={"content-type": "text/html"},
+    )
+    urls = [httpserver.url_for("/popup"), httpserver.url_for("/1")]
+    output = tmp_path / "crawl.har"
+
+    report = crawl(urls, output, workers=1, options=CrawlOptions(contexts=1))
+
+    assert report.pages == 2
+    assert report.failed == []
+
+    with open(output) as f:
+        log = json.load(f)["log"]
+
+    # the popup is kept with the page which opened it
+    assert len(log["pages"]) == 3
+    first_urls = {}
+    for entry in log["entries"]:
+        first_urls.setdefault(entry["pageref"], entry["request"]["url"])
+    assert first_urls["page_0"] == urls[0]
+    assert first_urls["page_2"] == urls[1]
+
+
+def test_main(httpserver: HTTPServer, tmp_path: pathlib.Path):
+    expect_pages(httpserver, 2)
+    urls = tmp_path / "urls.txt"
+    urls.write_text("\n".join(httpserver.url_for(f"/{i}") for i in range(2)))
+    output = tmp_path / "crawl.har"
+
+    assert main([str(urls), "-o", str(output), "-w", "1", "-c", "1"]) == 0
+    with open(output) as f:
+        assert len(json.load(f)["log"]["pages"]) == 2
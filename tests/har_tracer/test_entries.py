@@ -0,0 +1,111 @@
+import asyncio
+from typing import List
+
+import pytest
+from playwright.async_api import async_playwright
+from pytest_httpserver.httpserver import HTTPServer
+
+from playwright_har_tracer import HarTracer, dataclasses
+
+
+@pytest.mark.asyncio
+async def test_on_entry_complete(httpserver: HTTPServer, test_html: str):
+    httpserver.expect_oneshot_request("/foo", method="GET").respond_with_data(
+        response_data=test_html, status=200, headers={"content-type": "text/html"}
+    )
+
+    completed: List[dataclasses.har.Entry] = []
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context()
+        tracer = HarTracer(
+            context=context,
+            browser_name=p.chromium.name,
+            on_entry_complete=completed.append,
+        )
+
+        page = await context.new_page()
+        await page.goto(httpserver.url_for("/foo"))
+
+        har = await tracer.flush()
+
+        await context.close()
+        await browser.close()
+
+    assert len(completed) == 1
+    assert completed[0].request.url == har.log.entries[0].request.url
+    assert completed[0].response.status == 200
+    assert completed[0].response.content.text is not None
+
+
+@pytest.mark.asyncio
+async def test_entries(httpserver: HTTPServer, test_html: str):
+    httpserver.expect_oneshot_request("/foo", method="GET").respond_with_data(
+        response_data=test_html, status=200, headers={"content-type": "text/html"}
+    )
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context()
+        tracer = HarTracer(
+            context=context,
+            browser_name=p.chromium.name,
+            stream_entries=True,
+            max_queued_entries=1,
+        )
+
+        async def consume() -> List[dataclasses.har.Entry]:
+            return [entry async for entry in tracer.entries()]
+
+        consumer = asyncio.ensure_future(consume())
+
+        page = await context.new_page()
+        await page.goto(httpserver.url_for("/foo"))
+
+        await tracer.flush()
+        streamed = await consumer
+
+        await context.close()
+        await browser.close()
+
+    assert len(streamed) == 1
+    assert streamed[0].request.url == httpserver.url_for("/foo")
+    assert streamed[0].response.headers != []
+
+
+@pytest.mark.asyncio
+async def test_entries_without_consumer(httpserver: HTTPServer):
+    httpserver.expect_request("/foo", method="GET").respond_with_data(
+        response_data="<img src='/a.png'><img src='/b.png'>",
+        status=200,
+        headers={"content-type": "text/html"},
+    )
+    for path in ("/a.png", "/b.png"):
+        httpserver.expect_request(path, method="GET").respond_with_data(
+            response_data="", status=200, headers={"content-type": "image/png"}
+        )
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context()
+        tracer = HarTracer(
+            context=context,
+            browser_name=p.chromium.name,
+            stream_entries=True,
+            max_queued_entries=1,
+        )
+
+        page = await context.new_page()
+        await page.goto(httpserver.url_for("/foo"))
+
+        # the entries are consumed only after flush()
+        har = await asyncio.wait_for(tracer.flush(), timeout=10.0)
+        streamed = [entry async for entry in tracer.entries()]
+
+        await context.close()
+        await browser.close()
+
+    assert len(har.log.entries) == 3
+    assert len(streamed) == 1
+    assert tracer.dropped_entries == 2
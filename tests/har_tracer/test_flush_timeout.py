@@ -0,0 +1,118 @@
+import asyncio
+import time
+from typing import List
+
+import pytest
+from playwright.async_api import async_playwright
+from pytest_httpserver.httpserver import HTTPServer
+
+from playwright_har_tracer import HarTracer, dataclasses
+from tests.utils import page_with_har_tracer
+
+
+async def generate_har(httpserver: HTTPServer) -> dataclasses.har.Har:
+    httpserver.expect_oneshot_request("/foo", method="GET").respond_with_data(
+        response_data="<img src='/hang.png'>",
+        status=200,
+        headers={"content-type": "text/html"},
+    )
+
+    async def hang(route):
+        # never fulfilled, so the load event never fires
+        await asyncio.sleep(3600)
+
+    async with page_with_har_tracer() as (page, tracer):
+        await page.route("**/hang.png", hang)
+        await page.goto(httpserver.url_for("/foo"), wait_until="domcontentloaded")
+
+        har = await asyncio.wait_for(tracer.flush(timeout=1.0), timeout=10.0)
+        return har
+
+
+@pytest.mark.asyncio
+async def test_flush_with_timeout(httpserver: HTTPServer):
+    har = await generate_har(httpserver)
+
+    assert har.log.comment is not None
+    assert "abandoned" in har.log.comment
+
+    page = har.log.pages[0]
+    assert page.page_timings.on_load == -1
+
+    assert har.log.entries[0].response.status == 200
+
+
+@pytest.mark.asyncio
+async def test_flush_with_timeout_and_full_stream(httpserver: HTTPServer):
+    httpserver.expect_request("/foo", method="GET").respond_with_data(
+        response_data="<img src='/a.png'><img src='/b.png'>",
+        status=200,
+        headers={"content-type": "text/html"},
+    )
+    for path in ("/a.png", "/b.png"):
+        httpserver.expect_request(path, method="GET").respond_with_data(
+            response_data="", status=200, headers={"content-type": "image/png"}
+        )
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context()
+        # nobody consumes the stream, so the queue fills up
+        tracer = HarTracer(
+            context=context,
+            browser_name=p.chromium.name,
+            stream_entries=True,
+            max_queued_entries=1,
+        )
+
+        page = await context.new_page()
+        await page.goto(httpserver.url_for("/foo"))
+
+        started = time.monotonic()
+        har = await asyncio.wait_for(tracer.flush(timeout=1.0), timeout=10.0)
+        elapsed = time.monotonic() - started
+
+        await context.close()
+        await browser.close()
+
+    assert elapsed < 5.0
+    assert len(har.log.entries) == 3
+    assert [task for task in tracer._tasks if not task.done()] == []
+
+
+@pytest.mark.asyncio
+async def test_flush_with_timeout_completes_closed_pages(
+    httpserver: HTTPServer, test_html: str
+):
+    httpserver.expect_request("/foo", method="GET").respond_with_data(
+        response_data=test_html, status=200, headers={"content-type": "text/html"}
+    )
+
+    async def hang(entry: dataclasses.har.Entry):
+        await asyncio.sleep(3600)
+
+    hars: List[dataclasses.har.Har] = []
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context()
+        # the page's completion waits for a callback which never returns
+        tracer = HarTracer(
+            context=context,
+            browser_name=p.chromium.name,
+            on_entry_complete=hang,
+            on_page_complete=hars.append,
+        )
+
+        page = await context.new_page()
+        await page.goto(httpserver.url_for("/foo"))
+        await page.close()
+
+        await asyncio.wait_for(tracer.flush(timeout=1.0), timeout=10.0)
+
+        await context.close()
+        await browser.close()
+
+    # the closed page is still handed off
+    assert len(hars) == 1
+    assert len(hars[0].log.entries) == 1
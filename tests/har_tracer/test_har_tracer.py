@@ -87,6 +87,14 @@ async def test_har_tracer(httpserver: HTTPServer, test_html: str):
     headers = headers_to_dict(entry.response.headers)
     assert headers.get("content-type") == "text/html"
 
+    # assert sizes
+    assert entry.request.headers_size > 0
+    assert entry.response.headers_size > 0
+    assert entry.response.body_size == len(test_html)
+    assert entry.response._transfer_size == (
+        entry.response.headers_size + entry.response.body_size
+    )
+
     # assert content
     assert entry.response.content.encoding == "base64"
     assert entry.response.content.mime_type == "text/html"
@@ -0,0 +1,73 @@
+from typing import List
+
+import pytest
+from playwright.async_api import async_playwright
+from pytest_httpserver.httpserver import HTTPServer
+
+from playwright_har_tracer import HarTracer, dataclasses
+
+
+@pytest.mark.asyncio
+async def test_on_page_complete(httpserver: HTTPServer, test_html: str):
+    httpserver.expect_request("/foo", method="GET").respond_with_data(
+        response_data=test_html, status=200, headers={"content-type": "text/html"}
+    )
+
+    hars: List[dataclasses.har.Har] = []
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context()
+        tracer = HarTracer(
+            context=context,
+            browser_name=p.chromium.name,
+            on_page_complete=hars.append,
+            index=True,
+        )
+
+        for _ in range(2):
+            page = await context.new_page()
+            await page.goto(httpserver.url_for("/foo"))
+            await page.close()
+
+        har = await tracer.flush()
+
+        await context.close()
+        await browser.close()
+
+    assert [h.log.pages[0].id for h in hars] == ["page_0", "page_1"]
+    for h in hars:
+        assert len(h.log.entries) == 1
+        assert h.log.entries[0].pageref == h.log.pages[0].id
+
+    # closed pages are dropped from the context level log and the index
+    assert har.log.pages == []
+    assert har.log.entries == []
+    assert tracer.index is not None
+    assert len(tracer.index) == 0
+
+
+@pytest.mark.asyncio
+async def test_page_closed_before_load(httpserver: HTTPServer, test_html: str):
+    httpserver.expect_request("/foo", method="GET").respond_with_data(
+        response_data=test_html, status=200, headers={"content-type": "text/html"}
+    )
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context()
+        tracer = HarTracer(context=context, browser_name=p.chromium.name)
+
+        page = await context.new_page()
+        await page.goto(httpserver.url_for("/foo"), wait_until="commit")
+        await page.close()
+
+        har = await tracer.flush()
+
+        await context.close()
+        await browser.close()
+
+    assert len(har.log.pages) == 1
+    assert har.log.pages[0].page_timings.on_load == -1
+    # enrichment failing on the closed page doesn't keep failed tasks around
+    assert tracer._tasks == set()
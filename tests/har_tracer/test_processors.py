@@ -0,0 +1,100 @@
+import asyncio
+from typing import List
+
+import pytest
+from playwright.async_api import async_playwright
+from pytest_httpserver.httpserver import HTTPServer
+
+from playwright_har_tracer import HarTracer, dataclasses
+from playwright_har_tracer.processors import (
+    DropURLs,
+    RedactHeaders,
+    RedactQueryParams,
+)
+
+
+@pytest.mark.asyncio
+async def test_processors(httpserver: HTTPServer):
+    httpserver.expect_request("/foo", method="GET").respond_with_data(
+        response_data="<html><body><img src='/beacon'></body></html>",
+        status=200,
+        headers={"content-type": "text/html", "set-cookie": "sid=secret"},
+    )
+    httpserver.expect_request("/beacon", method="GET").respond_with_data(
+        response_data="", status=200, headers={"content-type": "image/gif"}
+    )
+
+    completed: List[dataclasses.har.Entry] = []
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context()
+        tracer = HarTracer(
+            context=context,
+            browser_name=p.chromium.name,
+            on_entry_complete=completed.append,
+            processors=[DropURLs([r"/beacon$"]), RedactHeaders()],
+        )
+
+        page = await context.new_page()
+        await page.goto(httpserver.url_for("/foo"))
+        har = await tracer.flush()
+
+        await context.close()
+        await browser.close()
+
+    assert [entry.request.url for entry in har.log.entries] == [
+        httpserver.url_for("/foo")
+    ]
+    assert completed == har.log.entries
+
+    headers = {h.name: h.value for h in har.log.entries[0].response.headers}
+    assert headers["set-cookie"] == "[REDACTED]"
+    assert har.log.entries[0].response.cookies[0].value == "[REDACTED]"
+
+
+PENDING_HTML = "<img src='/a.png?token=secret'><img src='/beacon.png'>"
+
+
+@pytest.mark.asyncio
+async def test_processors_with_pending_requests(httpserver: HTTPServer):
+    httpserver.expect_request("/foo", method="GET").respond_with_data(
+        response_data=PENDING_HTML, status=200, headers={"content-type": "text/html"}
+    )
+
+    async def hang(route):
+        # never fulfilled, so the requests stay pending
+        await asyncio.sleep(3600)
+
+    hars: List[dataclasses.har.Har] = []
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context()
+        tracer = HarTracer(
+            context=context,
+            browser_name=p.chromium.name,
+            on_page_complete=hars.append,
+            processors=[DropURLs([r"/beacon\.png$"]), RedactQueryParams(["token"])],
+        )
+
+        page = await context.new_page()
+        await page.route("**/*.png*", hang)
+        await page.goto(httpserver.url_for("/foo"), wait_until="domcontentloaded")
+
+        flushed = await asyncio.wait_for(tracer.flush(timeout=1.0), timeout=10.0)
+
+        await page.close()
+        await tracer.flush()
+
+        await context.close()
+        await browser.close()
+
+    expected = [
+        httpserver.url_for("/foo"),
+        httpserver.url_for("/a.png?token=%5BREDACTED%5D"),
+    ]
+    # both the flushed log and the handed off page are processed
+    assert [entry.request.url for entry in flushed.log.entries] == expected
+    assert len(hars) == 1
+    assert [entry.request.url for entry in hars[0].log.entries] == expected
@@ -0,0 +1,48 @@
+import pathlib
+
+import pytest
+from playwright.async_api import async_playwright
+from pytest_httpserver.httpserver import HTTPServer
+
+from playwright_har_tracer import HarTracer
+from playwright_har_tracer.body_store import FileBodyStore
+from playwright_har_tracer.replay import HarReplayer
+
+
+@pytest.mark.asyncio
+async def test_replay(httpserver: HTTPServer, test_html: str, tmp_path: pathlib.Path):
+    # the server answers only once, the replay must not hit it
+    httpserver.expect_oneshot_request("/foo", method="GET").respond_with_data(
+        response_data=test_html, status=200, headers={"content-type": "text/html"}
+    )
+
+    store = FileBodyStore(tmp_path)
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+
+        context = await browser.new_context()
+        tracer = HarTracer(
+            context=context, browser_name=p.chromium.name, body_store=store
+        )
+        page = await context.new_page()
+        await page.goto(httpserver.url_for("/foo"))
+        har = await tracer.flush()
+        await context.close()
+
+        replayer = HarReplayer(har, body_store=store)
+        context = await browser.new_context()
+        await replayer.attach(context)
+        page = await context.new_page()
+        response = await page.goto(httpserver.url_for("/foo"))
+        assert response is not None
+        assert response.status == 200
+        assert await page.title() == "Document"
+
+        with pytest.raises(Exception):
+            await page.goto(httpserver.url_for("/bar"))
+
+        await context.close()
+        await browser.close()
+
+    assert [miss.url for miss in replayer.misses] == [httpserver.url_for("/bar")]
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+from pytest_httpserver.httpserver import HTTPServer
+
+from playwright_har_tracer import dataclasses
+from tests.utils import page_with_har_tracer
+
+
+async def generate_har(httpserver: HTTPServer) -> dataclasses.har.Har:
+    httpserver.expect_oneshot_request("/foo", method="GET").respond_with_data(
+        response_data="<img src='/blocked.png'>",
+        status=200,
+        headers={"content-type": "text/html"},
+    )
+
+    async with page_with_har_tracer() as (page, tracer):
+        await page.route("**/blocked.png", lambda route: route.abort())
+        await page.goto(httpserver.url_for("/foo"))
+
+        har = await tracer.flush()
+        return har
+
+
+@pytest.mark.asyncio
+async def test_request_failed(httpserver: HTTPServer):
+    har = await generate_har(httpserver)
+
+    entries = har.log.entries
+    assert len(entries) == 2
+
+    failed = entries[1]
+    assert failed.request.url == httpserver.url_for("/blocked.png")
+    assert failed.response.status == -1
+    assert failed.response._failure_text is not None
+
+
+@pytest.mark.asyncio
+async def test_request_failed_during_flush(httpserver: HTTPServer):
+    httpserver.expect_oneshot_request("/foo", method="GET").respond_with_data(
+        response_data="<img src='/blocked.png'>",
+        status=200,
+        headers={"content-type": "text/html"},
+    )
+
+    async def abort_later(route):
+        # the request (and its pending tasks) fails while flush() is waiting
+        await asyncio.sleep(0.5)
+        await route.abort()
+
+    async with page_with_har_tracer() as (page, tracer):
+        await page.route("**/blocked.png", abort_later)
+        await page.goto(httpserver.url_for("/foo"), wait_until="domcontentloaded")
+
+        har = await asyncio.wait_for(tracer.flush(), timeout=10.0)
+
+    assert len(har.log.entries) == 2
+    assert har.log.entries[0].response.status == 200
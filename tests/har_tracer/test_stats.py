@@ -0,0 +1,88 @@
+from typing import List
+
+import pytest
+from playwright.async_api import async_playwright
+from pytest_httpserver.httpserver import HTTPServer
+from werkzeug import Response
+
+from playwright_har_tracer import HarTracer, dataclasses
+
+
+@pytest.mark.asyncio
+async def test_stats(httpserver: HTTPServer, test_html: str):
+    httpserver.expect_request("/foo", method="GET").respond_with_data(
+        response_data=test_html, status=200, headers={"content-type": "text/html"}
+    )
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context()
+        tracer = HarTracer(
+            context=context,
+            browser_name=p.chromium.name,
+            omit_content=True,
+            stats=True,
+        )
+
+        for _ in range(2):
+            page = await context.new_page()
+            await page.goto(httpserver.url_for("/foo"))
+
+        await tracer.flush()
+
+        await context.close()
+        await browser.close()
+
+    assert list(tracer.page_stats.keys()) == ["page_0", "page_1"]
+    assert tracer.page_stats["page_0"].requests == 1
+
+    stats = tracer.stats
+    assert stats is not None
+    assert stats.requests == 2
+    assert stats.requests_by_domain == {"localhost": 2}
+    assert stats.bytes_by_mime_type == {"text/html": 2 * len(test_html.encode())}
+    assert stats.timings["time"].count == 2
+
+
+@pytest.mark.asyncio
+async def test_stats_with_page_complete(httpserver: HTTPServer, test_html: str):
+    # a chunked response has no content-length
+    httpserver.expect_request("/foo", method="GET").respond_with_response(
+        Response(
+            iter([test_html.encode()]),
+            status=200,
+            headers={"content-type": "text/html"},
+        )
+    )
+
+    hars: List[dataclasses.har.Har] = []
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context()
+        tracer = HarTracer(
+            context=context,
+            browser_name=p.chromium.name,
+            omit_content=True,
+            stats=True,
+            on_page_complete=hars.append,
+        )
+
+        for _ in range(2):
+            page = await context.new_page()
+            await page.goto(httpserver.url_for("/foo"))
+            await page.close()
+
+        await tracer.flush()
+
+        await context.close()
+        await browser.close()
+
+    assert len(hars) == 2
+    # handed off pages are dropped from page_stats, but not from stats
+    assert tracer.page_stats == {}
+
+    stats = tracer.stats
+    assert stats is not None
+    assert stats.requests == 2
+    assert stats.bytes_by_mime_type == {"text/html": 2 * len(test_html.encode())}
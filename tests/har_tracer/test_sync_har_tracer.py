@@ -0,0 +1,159 @@
+from typing import List
+
+from playwright.sync_api import sync_playwright
+from pytest_httpserver.httpserver import HTTPServer
+
+from playwright_har_tracer import SyncHarTracer, dataclasses
+from playwright_har_tracer.processors import DropURLs, RedactQueryParams
+
+
+def test_sync_har_tracer(httpserver: HTTPServer, test_html: str):
+    httpserver.expect_request("/foo", method="GET").respond_with_data(
+        response_data=test_html, status=200, headers={"content-type": "text/html"}
+    )
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch()
+        context = browser.new_context()
+        tracer = SyncHarTracer(context=context, browser_name=p.chromium.name)
+
+        page = context.new_page()
+        page.goto(httpserver.url_for("/foo"))
+
+        # enrichment is deferred until drain() or flush()
+        assert tracer.pending > 0
+
+        har = tracer.flush()
+        assert tracer.pending == 0
+
+        context.close()
+        browser.close()
+
+    assert len(har.log.pages) == 1
+    page_entry = har.log.pages[0]
+    assert page_entry.title == "Document"
+    assert page_entry.page_timings.on_load is not None
+    assert float(page_entry.page_timings.on_load) > 0.0
+
+    assert len(har.log.entries) == 1
+    entry = har.log.entries[0]
+    assert entry.response.status == 200
+    assert entry.response.content.mime_type == "text/html"
+    assert entry.response.content.text is not None
+    assert entry.response.headers_size > 0
+    assert entry._incomplete is None
+
+
+def test_entries(httpserver: HTTPServer, test_html: str):
+    httpserver.expect_request("/foo", method="GET").respond_with_data(
+        response_data=test_html, status=200, headers={"content-type": "text/html"}
+    )
+
+    completed: List[dataclasses.har.Entry] = []
+    hars: List[dataclasses.har.Har] = []
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch()
+        context = browser.new_context()
+        tracer = SyncHarTracer(
+            context=context,
+            browser_name=p.chromium.name,
+            on_entry_complete=completed.append,
+            on_page_complete=hars.append,
+            stream_entries=True,
+        )
+
+        page = context.new_page()
+        page.goto(httpserver.url_for("/foo"))
+
+        streamed = list(tracer.entries())
+
+        page.close()
+        har = tracer.flush()
+
+        context.close()
+        browser.close()
+
+    assert [entry.request.url for entry in streamed] == [httpserver.url_for("/foo")]
+    assert completed == streamed
+
+    assert len(hars) == 1
+    assert hars[0].log.entries == streamed
+    assert har.log.entries == []
+
+
+def test_processors_with_pending_requests(httpserver: HTTPServer):
+    httpserver.expect_request("/foo", method="GET").respond_with_data(
+        response_data="<img src='/a.png?token=secret'><img src='/beacon.png'>",
+        status=200,
+        headers={"content-type": "text/html"},
+    )
+
+    hars: List[dataclasses.har.Har] = []
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch()
+        context = browser.new_context()
+        tracer = SyncHarTracer(
+            context=context,
+            browser_name=p.chromium.name,
+            on_page_complete=hars.append,
+            processors=[DropURLs([r"/beacon\.png$"]), RedactQueryParams(["token"])],
+        )
+
+        page = context.new_page()
+        # never fulfilled, so the requests stay pending
+        page.route("**/*.png*", lambda route: None)
+        page.goto(httpserver.url_for("/foo"), wait_until="domcontentloaded")
+
+        flushed = tracer.flush()
+
+        page.close()
+        tracer.flush()
+
+        context.close()
+        browser.close()
+
+    expected = [
+        httpserver.url_for("/foo"),
+        httpserver.url_for("/a.png?token=%5BREDACTED%5D"),
+    ]
+    # both the flushed log and the handed off page are processed
+    assert [entry.request.url for entry in flushed.log.entries] == expected
+    assert len(hars) == 1
+    assert [entry.request.url for entry in hars[0].log.entries] == expected
+
+
+def test_flush_with_timeout(httpserver: HTTPServer, test_html: str):
+    httpserver.expect_request("/foo", method="GET").respond_with_data(
+        response_data=test_html, status=200, headers={"content-type": "text/html"}
+    )
+
+    hars: List[dataclasses.har.Har] = []
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch()
+        context = browser.new_context()
+        tracer = SyncHarTracer(
+            context=context, browser_name=p.chromium.name, on_page_complete=hars.append
+        )
+
+        page = context.new_page()
+        page.goto(httpserver.url_for("/foo"))
+        page.close()
+
+        # no job runs in time
+        har = tracer.flush(timeout=0)
+
+        context.close()
+        browser.close()
+
+    assert har.log.comment is not None
+    assert "abandoned" in har.log.comment
+
+    # the closed page is still handed off, with its entry as it is
+    assert len(hars) == 1
+    assert len(hars[0].log.entries) == 1
+    assert hars[0].log.entries[0]._incomplete is True
+    assert tracer.pending == 0
+    assert tracer._unprocessed == {}
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from playwright_har_tracer.base_tracer import BaseHarTracer
+from playwright_har_tracer.processors import DropURLs
+from tests.utils import make_entry
+
+
+def make_tracer(**kwargs) -> BaseHarTracer:
+    return BaseHarTracer("chromium", "0", processors=[DropURLs(["drop"])], **kwargs)
+
+
+def test_invalid_binary_post_data():
+    with pytest.raises(ValueError):
+        BaseHarTracer("chromium", "0", binary_post_data="raw")
+
+
+def test_process_entry():
+    tracer = make_tracer(index=True)
+    page_entry = tracer._add_page(time.time())
+    assert page_entry.id == "page_0"
+
+    kept, dropped = make_entry(), make_entry()
+    dropped.request.url = "http://example.com/drop"
+    page_entries = []
+    for entry in (kept, dropped):
+        entry.pageref = page_entry.id
+        tracer._add_entry(entry, page_entries)
+
+    assert tracer._process_entry(kept, page_entries) is True
+    assert tracer._process_entry(dropped, page_entries) is False
+    assert tracer._log.entries == [kept]
+    assert page_entries == [kept]
+    assert tracer.index is not None
+    assert len(tracer.index) == 1
+
+    # completed once only
+    assert tracer._process_entry(kept, page_entries) is False
+
+
+def test_hand_off_page():
+    tracer = make_tracer()
+    page_entry = tracer._add_page(time.time())
+    other_page_entry = tracer._add_page(time.time())
+
+    completed, pending, dropped = make_entry(), make_entry(), make_entry()
+    dropped.request.url = "http://example.com/drop"
+    page_entries = []
+    for entry in (completed, pending, dropped):
+        tracer._add_entry(entry, page_entries)
+    tracer._process_entry(completed, page_entries)
+
+    har = tracer._hand_off_page(page_entry, page_entries)
+    assert har.log.pages == [page_entry]
+    assert har.log.entries == [completed, pending]
+    assert pending._incomplete is True
+    assert completed._incomplete is not True
+
+    assert tracer._log.pages == [other_page_entry]
+    assert tracer._log.entries == []
+    # the entries handed off with the page aren't completed afterwards
+    assert tracer._process_entry(pending, page_entries) is False
+
+
+def test_snapshot_log():
+    tracer = make_tracer()
+    tracer._add_page(time.time())
+
+    pending, dropped = make_entry(), make_entry()
+    dropped.request.url = "http://example.com/drop"
+    page_entries = []
+    for entry in (pending, dropped):
+        tracer._add_entry(entry, page_entries)
+
+    log = tracer._snapshot_log()
+    assert [entry.request.url for entry in log.entries] == ["http://example.com"]
+    assert log.entries[0] is not pending
+
+    # the entries are still completed as usual later on
+    assert len(tracer._log.entries) == 2
+    assert tracer._process_entry(pending, page_entries) is True
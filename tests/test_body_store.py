@@ -0,0 +1,113 @@
+import hashlib
+import pathlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import pytest
+
+from playwright_har_tracer.body_store import (
+    BodyStore,
+    FileBodyStore,
+    SpoolBodyStore,
+    extension_for,
+)
+
+
+@pytest.mark.parametrize(
+    "mime_type,expected",
+    [
+        (None, ".dat"),
+        ("text/html; charset=UTF-8", ".html"),
+        ("application/json", ".json"),
+        ("x-unknown", ".dat"),
+    ],
+)
+def test_extension_for(mime_type, expected):
+    assert extension_for(mime_type) == expected
+
+
+def test_file_body_store(tmp_path: pathlib.Path):
+    store = FileBodyStore(tmp_path, chunk_size=3)
+    body = b"<html><body>foo</body></html>"
+
+    name = store.write(body, "text/html")
+    assert name == hashlib.sha1(body).hexdigest() + ".html"
+    assert store.read(name) == body
+
+    # identical bodies are stored once
+    assert store.write(body, "text/html") == name
+    assert [p.name for p in tmp_path.iterdir()] == [name]
+
+
+def test_file_body_store_with_invalid_chunk_size(tmp_path: pathlib.Path):
+    with pytest.raises(ValueError):
+        FileBodyStore(tmp_path, chunk_size=0)
+
+
+def test_file_body_store_map(tmp_path: pathlib.Path):
+    store = FileBodyStore(tmp_path)
+
+    mapped = store.map(store.write(b"foo", "text/plain"))
+    assert mapped[:] == b"foo"
+
+    assert store.map(store.write(b"", "text/plain")) == b""
+
+
+def test_spool_body_store(tmp_path: pathlib.Path):
+    path = tmp_path / "bodies.spool"
+    store = SpoolBodyStore(path, chunk_size=3)
+
+    foo = store.write(b"foo", "text/plain")
+    empty = store.write(b"")
+    bar = store.write(b"<html>bar</html>", "text/html")
+    assert (foo, empty, bar) == ("0:3", "3:0", "3:16")
+    assert store.read(foo) == b"foo"
+    assert store.read(empty) == b""
+
+    mapped = store.map(bar)
+    assert isinstance(mapped, memoryview)
+    assert mapped == b"<html>bar</html>"
+
+    # bodies written after the spool was mapped
+    assert store.read(store.write(b"baz")) == b"baz"
+    store.close()
+
+    # a spool is appended to
+    store = SpoolBodyStore(path)
+    assert store.write(b"qux") == "22:3"
+    store.close()
+    assert path.read_bytes() == b"foo<html>bar</html>bazqux"
+
+
+def test_file_body_store_concurrent_writes(tmp_path: pathlib.Path):
+    store = FileBodyStore(tmp_path, chunk_size=1024)
+    bodies = [b"%d" % i * 10000 for i in range(16)]
+    barrier = threading.Barrier(8, timeout=10)
+
+    def write_all() -> List[str]:
+        names: List[str] = []
+        for body in bodies:
+            # every thread writes the same body at the same time
+            barrier.wait()
+            names.append(store.write(body, "text/html"))
+        return names
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: write_all(), range(8)))
+
+    names = results[0]
+    assert all(result == names for result in results)
+    assert [store.read(name) for name in names] == bodies
+    # no temporary file is left behind
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(names)
+
+
+def test_incomplete_body_store():
+    class WriteOnlyBodyStore(BodyStore):
+        def write(self, body: bytes, mime_type: Optional[str] = None) -> str:
+            return ""
+
+    # fails when created rather than on the first read
+    with pytest.raises(TypeError):
+        WriteOnlyBodyStore()  # type: ignore
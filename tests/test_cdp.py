@@ -0,0 +1,157 @@
+import asyncio
+
+import pytest
+from playwright.async_api import Error
+
+from playwright_har_tracer.cdp import CDPNetworkCollector, update_entry
+from tests.utils import make_entry
+
+URL = "https://example.com/"
+
+
+def response_payload(**kwargs) -> dict:
+    payload = {
+        "url": URL,
+        "status": 200,
+        "statusText": "OK",
+        "headers": {"content-type": "text/html"},
+        "mimeType": "text/html",
+        "connectionReused": True,
+        "connectionId": 42,
+        "encodedDataLength": 120,
+        "securityState": "secure",
+        "remoteIPAddress": "93.184.216.34",
+        "remotePort": 443,
+        "protocol": "h2",
+        "fromDiskCache": True,
+        "securityDetails": {
+            "protocol": "TLS 1.3",
+            "subjectName": "example.com",
+            "issuer": "Example CA",
+            "validFrom": 1,
+            "validTo": 2,
+        },
+    }
+    payload.update(kwargs)
+    return payload
+
+
+@pytest.mark.asyncio
+async def test_collector():
+    collector = CDPNetworkCollector(timeout=0.1)
+    collector._on_request_will_be_sent(
+        {"requestId": "1", "request": {"method": "GET", "url": URL}}
+    )
+    collector._on_response_received({"requestId": "1", "response": response_payload()})
+    collector._on_loading_finished({"requestId": "1", "encodedDataLength": 1120})
+
+    record = await collector.take("GET", URL)
+    assert record is not None
+    assert record.encoded_data_length == 1120
+
+    entry = make_entry()
+    update_entry(entry, record)
+    assert entry.request.http_version == "HTTP/2.0"
+    assert entry.response.http_version == "HTTP/2.0"
+    assert entry.response._transfer_size == 1120
+    assert entry.response._from_cache == "disk"
+    assert entry.connection == "42"
+    assert entry.server_ip_address == "93.184.216.34"
+    assert entry._server_port == 443
+    assert entry._security_details is not None
+    assert entry._security_details.subject_name == "example.com"
+
+    # consumed
+    assert await collector.take("GET", URL) is None
+
+
+@pytest.mark.asyncio
+async def test_collector_with_redirect():
+    collector = CDPNetworkCollector(timeout=0.1)
+    collector._on_request_will_be_sent(
+        {"requestId": "1", "request": {"method": "GET", "url": URL}}
+    )
+    collector._on_request_will_be_sent(
+        {
+            "requestId": "1",
+            "request": {"method": "GET", "url": URL + "next"},
+            "redirectResponse": response_payload(status=302, encodedDataLength=80),
+        }
+    )
+
+    record = await collector.take("GET", URL)
+    assert record is not None
+    assert record.response is not None
+    assert record.response.status == 302
+    assert record.encoded_data_length == 80
+
+
+@pytest.mark.asyncio
+async def test_collector_with_preflight():
+    collector = CDPNetworkCollector(timeout=0.1)
+    # Playwright doesn't report CORS preflights
+    collector._on_request_will_be_sent(
+        {"requestId": "1", "request": {"method": "OPTIONS", "url": URL}}
+    )
+    collector._on_request_will_be_sent(
+        {"requestId": "2", "request": {"method": "GET", "url": URL}}
+    )
+    collector._on_response_received({"requestId": "2", "response": response_payload()})
+    collector._on_loading_finished({"requestId": "2", "encodedDataLength": 1120})
+
+    record = await collector.take("GET", URL)
+    assert record is not None
+    assert record.encoded_data_length == 1120
+
+
+@pytest.mark.asyncio
+async def test_collector_discard():
+    collector = CDPNetworkCollector(timeout=0.1)
+    for request_id in ("1", "2"):
+        collector._on_request_will_be_sent(
+            {"requestId": request_id, "request": {"method": "GET", "url": URL}}
+        )
+    collector._on_loading_failed({"requestId": "1"})
+    collector._on_loading_finished({"requestId": "2", "encodedDataLength": 1120})
+
+    # the failed request's record isn't taken by the next request
+    collector.discard("GET", URL)
+    record = await collector.take("GET", URL)
+    assert record is not None
+    assert record.encoded_data_length == 1120
+
+
+@pytest.mark.asyncio
+async def test_collector_take_timeout():
+    collector = CDPNetworkCollector(timeout=0.01)
+    assert await collector.take("GET", URL) is None
+    assert collector._arrivals == {}
+
+
+@pytest.mark.asyncio
+async def test_collector_wait_attached_on_failure():
+    class Context:
+        async def new_cdp_session(self, page):
+            raise RuntimeError("closed")
+
+    collector = CDPNetworkCollector()
+    with pytest.raises(RuntimeError):
+        await collector.attach(Context(), None)  # type: ignore
+
+    # waiters are released even though the session couldn't be attached
+    await asyncio.wait_for(collector.wait_attached(), timeout=1.0)
+
+
+@pytest.mark.asyncio
+async def test_collector_attach_on_closed_page():
+    class Context:
+        async def new_cdp_session(self, page):
+            raise Error("Target page, context or browser has been closed")
+
+    collector = CDPNetworkCollector(timeout=10.0)
+    # the session isn't attached, and the task doesn't fail
+    await collector.attach(Context(), None)  # type: ignore
+    await asyncio.wait_for(collector.wait_attached(), timeout=1.0)
+
+    # requests fall back to Playwright's data without waiting for records
+    assert await asyncio.wait_for(collector.take("GET", URL), timeout=1.0) is None
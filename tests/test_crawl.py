@@ -0,0 +1,62 @@
+import io
+
+import pytest
+
+from playwright_har_tracer.crawl import (
+    CrawlOptions,
+    CrawlReport,
+    PageResult,
+    WorkerResult,
+    crawl,
+    max_rss,
+    read_urls,
+    unseen_pages,
+)
+
+
+def test_read_urls():
+    fp = io.StringIO("http://example.com/\n\n# a comment\n  http://example.org/  \n")
+    assert read_urls(fp) == ["http://example.com/", "http://example.org/"]
+
+
+def test_crawl_report():
+    report = CrawlReport(
+        pages=10,
+        entries=30,
+        elapsed=2.0,
+        workers=[
+            WorkerResult(worker=0, pages=6, max_rss=100),
+            WorkerResult(worker=1, pages=4, max_rss=None),
+        ],
+    )
+    assert report.pages_per_second == 5.0
+    assert report.worker_max_rss == 100
+
+    assert CrawlReport(pages=0, entries=0, elapsed=0.0).pages_per_second == 0.0
+
+
+def test_unseen_pages():
+    urls = ["http://example.com/", "http://example.org/", "http://example.net/"]
+    pages = [PageResult(index=1, url=urls[1], path="1.har")]
+    assert unseen_pages(urls, pages) == [
+        PageResult(index=0, url=urls[0], path=None, error="not crawled"),
+        PageResult(index=2, url=urls[2], path=None, error="not crawled"),
+    ]
+
+
+def test_max_rss():
+    rss = max_rss()
+    assert rss is None or rss > 0
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"options": CrawlOptions(browser_name="foo")},
+        {"options": CrawlOptions(contexts=0)},
+        {"workers": -1},
+    ],
+)
+def test_crawl_with_invalid_options(tmp_path, kwargs):
+    with pytest.raises(ValueError):
+        crawl(["http://example.com/"], tmp_path / "out.har", **kwargs)
@@ -0,0 +1,77 @@
+import copy
+import json
+import pathlib
+from typing import Any, Dict
+
+from playwright_har_tracer import dataclasses
+from playwright_har_tracer.diff import diff_har_files, diff_hars, summarize
+from tests.test_dataclass import fixture
+
+
+def make_after() -> Dict[str, Any]:
+    after = copy.deepcopy(fixture)
+    entries = after["log"]["entries"]
+    # drop the first entry, add a third-party one and grow the second one
+    removed = entries.pop(0)
+    third_party = copy.deepcopy(entries[0])
+    third_party["request"]["url"] = "https://tracker.example.com/t.js"
+    entries.append(third_party)
+    entries[0]["response"]["content"]["size"] = 1000
+    entries[0]["response"]["_transferSize"] = 400
+    entries[0]["time"] = 12.5
+    return {"after": after, "removed": removed}
+
+
+def test_summarize():
+    entry = fixture["log"]["entries"][0]
+    summary = summarize(entry)
+    assert summary.domain == "www.w3.org"
+    # unknown (-1) values count as 0
+    assert summary.body_size == 0
+    assert summary.time == 0.0
+
+    assert summarize(dataclasses.har.Entry.from_dict(entry)) == summary
+
+
+def test_diff_hars():
+    changes = make_after()
+    before = dataclasses.har.Har.from_dict(fixture)
+    after = dataclasses.har.Har.from_dict(changes["after"])
+
+    result = diff_hars(before, after)
+    assert [s.url for s in result.removed] == [changes["removed"]["request"]["url"]]
+    assert [s.url for s in result.added] == ["https://tracker.example.com/t.js"]
+    assert result.matched == len(before.log.entries) - 1
+    assert result.added_domains == ["tracker.example.com"]
+    assert result.removed_domains == []
+
+    domain = result.domains["www.w3.org"]
+    assert domain.requests_delta == -1
+    assert domain.body_size_delta == 1000
+    assert domain.transfer_size_delta == 400
+    assert domain.time_delta == 12.5
+
+
+def test_diff_hars_with_repeated_requests():
+    har = dataclasses.har.Har.from_dict(fixture)
+    doubled = dataclasses.har.Har.from_dict(fixture)
+    doubled.log.entries.append(copy.deepcopy(doubled.log.entries[0]))
+
+    result = diff_hars(har, doubled)
+    assert [s.url for s in result.added] == [har.log.entries[0].request.url]
+    assert result.removed == []
+
+
+def test_diff_har_files(tmp_path: pathlib.Path):
+    changes = make_after()
+    before_path = tmp_path / "before.har"
+    after_path = tmp_path / "after.har"
+    before_path.write_text(json.dumps(fixture, default=str))
+    after_path.write_text(json.dumps(changes["after"], default=str))
+
+    result = diff_har_files(before_path, after_path, chunk_size=64)
+    expected = diff_hars(
+        dataclasses.har.Har.from_dict(fixture),
+        dataclasses.har.Har.from_dict(changes["after"]),
+    )
+    assert result == expected
@@ -0,0 +1,60 @@
+import json
+import pathlib
+import subprocess
+import sys
+from typing import Set
+
+import pytest
+
+ROOT = pathlib.Path(__file__).parent.parent
+
+# modules the package used to import eagerly
+HEAVY_MODULES = [
+    "dataclasses_json",
+    "marshmallow",
+    "dateutil",
+    "importlib.metadata",
+    "playwright",
+]
+
+
+def imported_modules(statement: str) -> Set[str]:
+    # a fresh interpreter, so that nothing is imported yet
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"{statement}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))",
+        ],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(json.loads(completed.stdout.splitlines()[-1]))
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import playwright_har_tracer",
+        "from playwright_har_tracer.dataclasses.har import Har",
+        "from playwright_har_tracer.operations import merge_hars",
+        "from playwright_har_tracer.diff import diff_hars",
+    ],
+)
+def test_lazy_imports(statement: str):
+    modules = imported_modules(statement)
+    assert "playwright_har_tracer" in modules
+
+    imported = [name for name in HEAVY_MODULES if name in modules]
+    assert imported == []
+
+
+def test_lazy_attributes():
+    modules = imported_modules(
+        "import playwright_har_tracer as p\np.dataclasses.har\np.__version__"
+    )
+    assert "playwright_har_tracer.dataclasses.har" in modules
+    assert "importlib.metadata" in modules
+    assert "playwright" not in modules
@@ -0,0 +1,104 @@
+from datetime import datetime
+
+import pytest
+
+from playwright_har_tracer import dataclasses
+from playwright_har_tracer.index import HarIndex, normalize_mime_type
+from tests.test_dataclass import fixture
+
+
+@pytest.fixture
+def har() -> dataclasses.har.Har:
+    return dataclasses.har.Har.from_dict(fixture)
+
+
+@pytest.mark.parametrize(
+    "mime_type,expected",
+    [(None, ""), ("text/html; charset=utf-8", "text/html"), ("Image/PNG", "image/png")],
+)
+def test_normalize_mime_type(mime_type, expected):
+    assert normalize_mime_type(mime_type) == expected
+
+
+def test_har_index(har: dataclasses.har.Har):
+    index = HarIndex.from_har(har)
+    entries = har.log.entries
+    assert len(index) == len(entries)
+
+    assert index.by_url("https://www.w3.org/") == [
+        e for e in entries if e.request.url == "https://www.w3.org/"
+    ]
+    assert index.by_url_prefix("https://www.w3.org/") == sorted(
+        [e for e in entries if e.request.url.startswith("https://www.w3.org/")],
+        key=lambda e: e.request.url,
+    )
+    assert index.by_host("www.w3.org") == [
+        e for e in entries if e.request.url.startswith("https://www.w3.org/")
+    ]
+    assert index.by_page("page_0") == entries
+    assert index.by_status(200) == [e for e in entries if e.response.status == 200]
+
+    mime_type = entries[0].response.content.mime_type
+    assert mime_type is not None
+    assert entries[0] in index.by_mime_type(mime_type)
+
+
+def test_har_index_between(har: dataclasses.har.Har):
+    index = HarIndex.from_har(har)
+    # the fixture mixes naive and aware datetimes
+    entries = sorted(har.log.entries, key=lambda e: e.started_date_time.timestamp())
+
+    assert index.between() == entries
+    start = entries[1].started_date_time
+    end = entries[-1].started_date_time
+    assert index.between(start, end) == [
+        e
+        for e in entries
+        if start.timestamp() <= e.started_date_time.timestamp() < end.timestamp()
+    ]
+    assert index.between(end=datetime(1970, 1, 2)) == []
+
+
+def test_har_index_query(har: dataclasses.har.Har):
+    index = HarIndex.from_har(har)
+    entries = har.log.entries
+
+    assert index.query() == entries
+    assert index.query(host="www.w3.org", status=200) == [
+        e
+        for e in entries
+        if e.request.url.startswith("https://www.w3.org/") and e.response.status == 200
+    ]
+    assert index.query(page="page_1") == []
+
+
+def test_har_index_remove_page(har: dataclasses.har.Har):
+    index = HarIndex.from_har(har)
+    entries = har.log.entries
+    assert len(index.by_page("page_0")) == len(entries)
+
+    index.remove_page("page_0")
+    assert len(index) == 0
+    assert index.by_page("page_0") == []
+    assert index.by_url("https://www.w3.org/") == []
+    assert index.by_url_prefix("https://") == []
+    assert index.by_host("www.w3.org") == []
+    assert index.by_status(200) == []
+    assert index.between() == []
+
+    # entries of other pages are kept
+    index.add(entries[0])
+    assert index.by_url(entries[0].request.url) == [entries[0]]
+    assert index.between() == [entries[0]]
+
+
+def test_har_index_lazy_sort(har: dataclasses.har.Har):
+    index = HarIndex()
+    # added in reverse order, sorted on lookup
+    for entry in reversed(har.log.entries):
+        index.add(entry)
+
+    keys = [e.started_date_time.timestamp() for e in index.between()]
+    assert keys == sorted(e.started_date_time.timestamp() for e in har.log.entries)
+    urls = [e.request.url for e in index.by_url_prefix("")]
+    assert urls == sorted(urls)
@@ -1,9 +1,11 @@
 from dataclasses import dataclass, field
-from typing import Optional
+from datetime import datetime, timezone
+from typing import List, Optional
 
 import pytest
 
-from playwright_har_tracer.dataclasses.mixin import CustomizedDataClassJsonMixin
+from playwright_har_tracer.dataclasses.mixin import CustomizedDataClassJsonMixin, config
+from playwright_har_tracer.encoders import datetime_encoder
 
 
 @dataclass
@@ -46,3 +48,33 @@ def test_customized_dataclass_json_mixin_to_dict(test_input: dict, expected: dic
 def test_customized_dataclass_json_mixin_to_json(test_input: dict, expected: str):
     parent = Parent.from_dict(test_input)
     assert parent.to_json() == expected
+
+
+@dataclass
+class Renamed(CustomizedDataClassJsonMixin):
+    started_date_time: datetime = field(metadata=config(encoder=datetime_encoder))
+    children: List[Child] = field(default_factory=list)
+    _size: Optional[int] = field(default=None, metadata=config(field_name="_size"))
+
+
+def test_customized_dataclass_json_mixin_round_trip():
+    renamed = Renamed(
+        started_date_time=datetime(2021, 1, 1, tzinfo=timezone.utc),
+        children=[Child(snake_key="a")],
+        _size=1,
+    )
+    data = renamed.to_dict()
+    assert data == {
+        "startedDateTime": "2021-01-01T00:00:00+00:00",
+        "children": [{"snakeKey": "a"}],
+        "_size": 1,
+    }
+
+    # unknown keys are ignored
+    assert Renamed.from_dict({**data, "unknown": 1}) == renamed
+    assert Renamed.from_json(renamed.to_json()) == renamed
+
+
+def test_customized_dataclass_json_mixin_missing_field():
+    with pytest.raises(TypeError):
+        Renamed.from_dict({})
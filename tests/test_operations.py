@@ -0,0 +1,95 @@
+import json
+import pathlib
+
+from playwright_har_tracer import dataclasses
+from playwright_har_tracer.operations import (
+    by_domain,
+    by_page,
+    by_time_window,
+    merge_har_files,
+    merge_hars,
+    shard_har,
+    shard_har_file,
+    split_har,
+    split_har_file,
+)
+from tests.test_dataclass import fixture
+
+path = pathlib.Path(__file__).parent / "./fixtures/test.har"
+
+
+def test_merge_hars():
+    har = dataclasses.har.Har.from_dict(fixture)
+    merged = merge_hars([har, har])
+
+    assert [page.id for page in merged.log.pages] == ["page_0", "page_1"]
+    assert len(merged.log.entries) == len(har.log.entries) * 2
+    assert merged.log.entries[-1].pageref == "page_1"
+    # the inputs are left untouched
+    assert har.log.pages[0].id == "page_0"
+
+
+def test_split_har_by_domain():
+    har = dataclasses.har.Har.from_dict(fixture)
+    hars = split_har(har, by_domain)
+
+    assert "www.w3.org" in hars
+    assert sum(len(h.log.entries) for h in hars.values()) == len(har.log.entries)
+    for h in hars.values():
+        assert [page.id for page in h.log.pages] == ["page_0"]
+
+
+def test_split_har_by_page_and_time_window():
+    har = dataclasses.har.Har.from_dict(fixture)
+    assert list(split_har(har, by_page).keys()) == ["page_0"]
+
+    hars = split_har(har, by_time_window(3600))
+    assert sum(len(h.log.entries) for h in hars.values()) == len(har.log.entries)
+
+
+def test_shard_har():
+    har = dataclasses.har.Har.from_dict(fixture)
+    shards = shard_har(har, 4)
+    # entries of a page are kept together
+    assert len(shards) == 1
+    assert len(shards[0].log.entries) == len(har.log.entries)
+
+
+def test_merge_har_files(tmp_path: pathlib.Path):
+    output = tmp_path / "merged.har"
+    count = merge_har_files([path, path], output, chunk_size=64)
+
+    with open(path) as f:
+        expected = json.load(f)["log"]
+
+    with open(output) as f:
+        log = json.load(f)["log"]
+
+    assert count == len(expected["entries"]) * 2
+    assert [page["id"] for page in log["pages"]] == ["page_0", "page_1"]
+    assert log["entries"][0]["pageref"] == "page_0"
+    assert log["entries"][-1]["pageref"] == "page_1"
+    assert log["creator"] == expected["creator"]
+
+
+def test_split_har_file(tmp_path: pathlib.Path):
+    outputs = split_har_file(path, tmp_path, by_domain, max_open_files=2)
+
+    with open(path) as f:
+        expected = json.load(f)["log"]
+
+    total = 0
+    for domain, output in outputs.items():
+        with open(output) as f:
+            log = json.load(f)["log"]
+
+        assert all(domain in entry["request"]["url"] for entry in log["entries"])
+        assert [page["id"] for page in log["pages"]] == ["page_0"]
+        total += len(log["entries"])
+
+    assert total == len(expected["entries"])
+
+
+def test_shard_har_file(tmp_path: pathlib.Path):
+    outputs = shard_har_file(path, tmp_path, 2)
+    assert len(outputs) == 1
@@ -0,0 +1,112 @@
+import pytest
+
+from playwright_har_tracer.processors import (
+    Annotate,
+    DropURLs,
+    Filter,
+    Pipeline,
+    Processor,
+    RedactCookies,
+    RedactHeaders,
+    RedactQueryParams,
+    TruncateBodies,
+    remove_entry,
+)
+from tests.utils import make_entry
+
+REQUEST_HEADERS = {
+    "authorization": "Bearer secret",
+    "cookie": "sid=secret",
+    "accept": "*/*",
+}
+
+
+def test_redact_headers():
+    entry = make_entry(
+        request_headers=REQUEST_HEADERS, response_headers={"set-cookie": "other=1"}
+    )
+    assert RedactHeaders().process(entry)
+
+    assert [header.value for header in entry.request.headers] == [
+        "[REDACTED]",
+        "[REDACTED]",
+        "*/*",
+    ]
+    assert entry.request.cookies[0].value == "[REDACTED]"
+    assert entry.response.cookies[0].value == "[REDACTED]"
+
+
+def test_redact_cookies():
+    entry = make_entry(
+        request_headers=REQUEST_HEADERS, response_headers={"set-cookie": "other=1"}
+    )
+    assert RedactCookies(["sid"], replacement="x").process(entry)
+
+    assert entry.request.cookies[0].value == "x"
+    assert entry.response.cookies[0].value == "1"
+
+
+def test_redact_query_params():
+    entry = make_entry("http://example.com/?token=secret&q=a+b")
+    assert RedactQueryParams(["token"]).process(entry)
+
+    assert entry.request.url == "http://example.com/?token=%5BREDACTED%5D&q=a+b"
+    assert [param.value for param in entry.request.query_string] == [
+        "[REDACTED]",
+        "a b",
+    ]
+
+
+@pytest.mark.parametrize(
+    "text,encoding,expected",
+    [
+        ("0123456789", None, "0123"),
+        ("MDEyMzQ1Njc4OQ==", "base64", "MDEy"),
+        ("0123", None, "0123"),
+    ],
+)
+def test_truncate_bodies(text: str, encoding: str, expected: str):
+    entry = make_entry(text=text)
+    entry.response.content.encoding = encoding
+
+    assert TruncateBodies(4).process(entry)
+    assert entry.response.content.text == expected
+
+
+def test_pipeline():
+    beacon = make_entry("https://example.com/analytics/collect?v=1")
+    entry = make_entry()
+
+    seen = []
+    pipeline = Pipeline(
+        [
+            DropURLs([r"/analytics/"]),
+            Filter(lambda entry: entry.response.status == 200),
+            Annotate(lambda entry: seen.append(entry) or "checked"),
+        ]
+    )
+
+    assert not pipeline.process(beacon)
+    assert pipeline.process(entry)
+    # the pipeline stops at the first processor dropping the entry
+    assert seen == [entry]
+    assert entry.comment == "checked"
+
+
+def test_remove_entry():
+    entries = [make_entry() for _ in range(3)]
+    first, second, third = entries
+
+    assert remove_entry(entries, second)
+    assert entries == [first, third]
+    assert entries[0] is first
+    assert not remove_entry(entries, second)
+
+
+def test_incomplete_processor():
+    class NoopProcessor(Processor):
+        pass
+
+    # fails when created rather than on the first entry
+    with pytest.raises(TypeError):
+        NoopProcessor()  # type: ignore
@@ -0,0 +1,113 @@
+import pathlib
+from typing import Optional
+
+import pytest
+
+from playwright_har_tracer import dataclasses
+from playwright_har_tracer.body_store import FileBodyStore
+from playwright_har_tracer.replay import HarReplayer, ReplayMiss
+from tests.utils import make_entry
+
+
+class FakeRequest:
+    def __init__(self, method: str, url: str, post_data: Optional[bytes] = None):
+        self.method = method
+        self.url = url
+        self.post_data_buffer = post_data
+
+
+def make_har(*entries: dataclasses.har.Entry) -> dataclasses.har.Har:
+    return dataclasses.har.Har(
+        log=dataclasses.har.Log(
+            version="1.2",
+            creator=dataclasses.har.Creator(name="test", version="0"),
+            browser=dataclasses.har.Browser(name="test", version="0"),
+            pages=[],
+            entries=list(entries),
+        )
+    )
+
+
+def test_lookup():
+    first = make_entry("http://example.com/?a=1&b=2", text="first")
+    second = make_entry("http://example.com/?a=1&b=2", text="second")
+    failed = make_entry("http://example.com/failed", status=-1)
+    replayer = HarReplayer(make_har(first, second, failed))
+
+    assert len(replayer) == 2
+    # served in capture order, then the last one over and over
+    assert replayer.lookup("GET", "http://example.com/?b=2&a=1") is first
+    assert replayer.lookup("GET", "http://example.com/?b=2&a=1") is second
+    assert replayer.lookup("GET", "http://example.com/?b=2&a=1") is second
+
+    assert replayer.lookup("POST", "http://example.com/?a=1&b=2") is None
+    assert replayer.lookup("GET", "http://example.com/failed") is None
+
+
+def test_lookup_with_match_body():
+    foo = make_entry("http://example.com/", method="POST", post_data="foo", text="foo")
+    bar = make_entry("http://example.com/", method="POST", post_data="bar", text="bar")
+    replayer = HarReplayer(make_har(foo, bar), match_body=True)
+
+    assert replayer.lookup("POST", "http://example.com/", b"bar") is bar
+    assert replayer.lookup("POST", "http://example.com/", b"foo") is foo
+    # falls back to the method and URL
+    assert replayer.lookup("POST", "http://example.com/", b"baz") is foo
+
+
+def test_fulfill_args():
+    entry = make_entry("http://example.com/", text="foo")
+    entry.response.headers = [
+        dataclasses.har.Header(name="Content-Type", value="text/plain"),
+        dataclasses.har.Header(name="Content-Encoding", value="gzip"),
+        dataclasses.har.Header(name="Set-Cookie", value="a=1"),
+        dataclasses.har.Header(name="Set-Cookie", value="b=2"),
+    ]
+    replayer = HarReplayer(make_har(entry))
+
+    args = replayer._fulfill_args(FakeRequest("GET", "http://example.com"))  # type: ignore
+    assert args == {
+        "status": 200,
+        "headers": {"content-type": "text/plain", "set-cookie": "a=1\nb=2"},
+        "body": b"foo",
+    }
+
+    missing = FakeRequest("GET", "http://example.com/missing")
+    assert replayer._fulfill_args(missing) is None  # type: ignore
+    assert replayer.misses == [
+        ReplayMiss(method="GET", url="http://example.com/missing")
+    ]
+
+
+def test_response_body_with_body_store(tmp_path: pathlib.Path):
+    store = FileBodyStore(tmp_path)
+    entry = make_entry("http://example.com/")
+    entry.response.content._file = store.write(b"<html></html>", "text/html")
+
+    replayer = HarReplayer(make_har(entry), body_store=store)
+    assert replayer.response_body(entry) == b"<html></html>"
+
+
+def test_response_body_with_many_stored_bodies(tmp_path: pathlib.Path):
+    store = FileBodyStore(tmp_path)
+    entries = []
+    for i in range(2048):
+        entry = make_entry(f"http://example.com/{i}")
+        entry.response.content._file = store.write(str(i).encode(), "text/plain")
+        entries.append(entry)
+
+    # no file descriptor is kept open per served body
+    resource = pytest.importorskip("resource")
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (1024, hard))
+    try:
+        replayer = HarReplayer(make_har(*entries), body_store=store)
+        for i, entry in enumerate(entries):
+            assert replayer.response_body(entry) == str(i).encode()
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+
+def test_invalid_not_found():
+    with pytest.raises(ValueError):
+        HarReplayer(make_har(), not_found="ignore")
@@ -0,0 +1,50 @@
+import gc
+from typing import Optional
+
+from playwright_har_tracer.request_index import RequestIndex
+from tests.utils import make_entry
+
+
+class FakeRequest:
+    def __init__(self, redirected_from: Optional["FakeRequest"] = None):
+        self.redirected_from = redirected_from
+
+
+def test_add_and_evict():
+    index = RequestIndex()
+    request = FakeRequest()
+    entry = make_entry()
+
+    index.add(request, entry)  # type: ignore
+    assert len(index) == 1
+    record = index.get(request)  # type: ignore
+    assert record is not None
+    assert record.entry is entry
+
+    index.evict(request)  # type: ignore
+    assert len(index) == 0
+    assert index.get(request) is None  # type: ignore
+
+
+def test_redirect_source():
+    index = RequestIndex()
+    first = FakeRequest()
+    entry = make_entry(status=302)
+    index.add(first, entry)  # type: ignore
+    index.evict(first)  # type: ignore
+
+    second = FakeRequest(redirected_from=first)
+    assert index.redirect_source(second) is entry  # type: ignore
+    # the redirect link is consumed
+    assert index.redirect_source(second) is None  # type: ignore
+
+
+def test_weak_references():
+    index = RequestIndex()
+    request = FakeRequest()
+    index.add(request, make_entry())  # type: ignore
+    assert len(index) == 1
+
+    del request
+    gc.collect()
+    assert len(index) == 0
@@ -0,0 +1,107 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from playwright_har_tracer.scheduler import (
+    Priority,
+    PrioritySemaphore,
+    Scheduler,
+    body_priority,
+)
+
+
+@pytest.mark.parametrize(
+    "resource_type,expected",
+    [
+        ("document", Priority.BODY),
+        ("script", Priority.BODY),
+        ("image", Priority.MEDIA_BODY),
+        ("media", Priority.MEDIA_BODY),
+    ],
+)
+def test_body_priority(resource_type: str, expected: Priority):
+    assert body_priority(resource_type) == expected
+
+
+def test_priority_semaphore_with_invalid_value():
+    with pytest.raises(ValueError):
+        PrioritySemaphore(0)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_runs_in_priority_order():
+    scheduler = Scheduler(max_in_flight=1)
+    order: List[str] = []
+    gate = asyncio.Event()
+
+    async def blocker():
+        await gate.wait()
+
+    async def job(name: str):
+        order.append(name)
+
+    first = asyncio.ensure_future(scheduler.run(blocker(), Priority.HEADERS))
+    await asyncio.sleep(0)
+
+    jobs = [
+        asyncio.ensure_future(scheduler.run(job("body"), Priority.BODY)),
+        asyncio.ensure_future(scheduler.run(job("media"), Priority.MEDIA_BODY)),
+        asyncio.ensure_future(scheduler.run(job("headers"), Priority.HEADERS)),
+    ]
+    await asyncio.sleep(0)
+
+    metrics = scheduler.metrics
+    assert metrics.in_flight == 1
+    assert metrics.queue_depth == 3
+    assert metrics.max_queue_depth == 3
+
+    gate.set()
+    await asyncio.gather(first, *jobs)
+
+    assert order == ["headers", "body", "media"]
+    metrics = scheduler.metrics
+    assert metrics.in_flight == 0
+    assert metrics.queue_depth == 0
+    assert metrics.completed == 4
+
+
+@pytest.mark.asyncio
+async def test_scheduler_with_cancelled_waiter():
+    scheduler = Scheduler(max_in_flight=1)
+    gate = asyncio.Event()
+
+    async def blocker():
+        await gate.wait()
+
+    async def job():
+        return 1
+
+    first = asyncio.ensure_future(scheduler.run(blocker(), Priority.HEADERS))
+    await asyncio.sleep(0)
+
+    cancelled = asyncio.ensure_future(scheduler.run(job(), Priority.HEADERS))
+    waiting = asyncio.ensure_future(scheduler.run(job(), Priority.BODY))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    gate.set()
+
+    assert await waiting == 1
+    await first
+    assert cancelled.cancelled()
+    assert scheduler.metrics.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_without_limit():
+    scheduler = Scheduler()
+
+    async def job():
+        return 1
+
+    results = await asyncio.gather(
+        *[scheduler.run(job(), Priority.BODY) for _ in range(10)]
+    )
+    assert results == [1] * 10
+    assert scheduler.metrics.max_queue_depth == 0
@@ -0,0 +1,96 @@
+import json
+import pathlib
+
+import pytest
+
+from playwright_har_tracer import dataclasses
+from playwright_har_tracer.sqlite_sink import SQLiteSink
+from tests.test_dataclass import fixture
+
+
+@pytest.fixture
+def har() -> dataclasses.har.Har:
+    har = dataclasses.har.Har.from_dict(fixture)
+    entry = har.log.entries[0]
+    entry.response.content.text = "Zm9v"
+    entry.response.content.encoding = "base64"
+    return har
+
+
+@pytest.mark.parametrize("bodies", ["hash", "blob"])
+def test_sqlite_sink(tmp_path: pathlib.Path, har: dataclasses.har.Har, bodies: str):
+    with SQLiteSink(tmp_path / "har.db", batch_size=10, bodies=bodies) as sink:
+        sink.set_log_info(creator=har.log.creator, browser=har.log.browser)
+        sink.add_har(har)
+
+        (count,) = sink.execute("SELECT COUNT(*) FROM entries").fetchone()
+        assert count == len(har.log.entries)
+
+        restored = sink.to_har()
+
+    assert restored.log.creator == har.log.creator
+    assert restored.log.browser == har.log.browser
+    assert [p.id for p in restored.log.pages] == [p.id for p in har.log.pages]
+    assert len(restored.log.entries) == len(har.log.entries)
+
+    for restored_entry, entry in zip(restored.log.entries, har.log.entries):
+        assert restored_entry.request.url == entry.request.url
+        assert restored_entry.request.headers == entry.request.headers
+        assert restored_entry.response.headers == entry.response.headers
+        assert restored_entry.response.cookies == entry.response.cookies
+        assert restored_entry.timings == entry.timings
+        assert restored_entry.response.content == entry.response.content
+
+
+def test_sqlite_sink_without_bodies(tmp_path: pathlib.Path, har: dataclasses.har.Har):
+    with SQLiteSink(tmp_path / "har.db", bodies=None) as sink:
+        sink.add_har(har)
+        restored = sink.to_har()
+
+    content = restored.log.entries[0].response.content
+    assert content.text is None
+    assert content.encoding is None
+
+
+def test_sqlite_sink_export(tmp_path: pathlib.Path, har: dataclasses.har.Har):
+    path = tmp_path / "har.db"
+    with SQLiteSink(path) as sink:
+        sink.add_har(har)
+
+    # reopen the database
+    with SQLiteSink(path) as sink:
+        sink.add_entry(har.log.entries[0])
+        sink.export(tmp_path / "export.har")
+
+    with open(tmp_path / "export.har") as f:
+        log = json.load(f)["log"]
+
+    assert len(log["entries"]) == len(har.log.entries) + 1
+    assert log["entries"][0]["response"]["content"]["text"] == "Zm9v"
+
+
+def test_sqlite_sink_with_invalid_bodies(tmp_path: pathlib.Path):
+    with pytest.raises(ValueError):
+        SQLiteSink(tmp_path / "har.db", bodies="foo")
+
+
+def test_sqlite_sink_iter_entries_merges_children(
+    tmp_path: pathlib.Path, har: dataclasses.har.Har
+):
+    entries = har.log.entries
+    with SQLiteSink(tmp_path / "har.db") as sink:
+        sink.add_har(har)
+        # an entry without headers and orphaned header rows
+        sink.execute("DELETE FROM headers WHERE entry_id = 1")
+        sink.execute("DELETE FROM entries WHERE id = 2")
+
+        restored = list(sink.iter_entries())
+
+    assert len(restored) == len(entries) - 1
+    assert restored[0]["request"]["headers"] == []
+    assert restored[0]["response"]["headers"] == []
+    for data, entry in zip(restored[1:], entries[2:]):
+        assert data["request"]["url"] == entry.request.url
+        assert len(data["request"]["headers"]) == len(entry.request.headers)
+        assert len(data["response"]["headers"]) == len(entry.response.headers)
+        assert len(data["response"]["cookies"]) == len(entry.response.cookies)
@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from playwright_har_tracer.stats import QuantileSketch, Stats
+from tests.utils import make_entry
+
+HTML = {"content-type": "text/html; charset=utf-8"}
+
+
+def test_quantile_sketch():
+    values = [random.uniform(1, 1000) for _ in range(10_000)]
+    sketch = QuantileSketch(0.01)
+    for value in values:
+        sketch.add(value)
+
+    values.sort()
+    for q in (0.0, 0.5, 0.9, 0.99, 1.0):
+        expected = values[int(q * (len(values) - 1))]
+        actual = sketch.quantile(q)
+        assert actual is not None
+        assert abs(actual - expected) <= expected * 0.01 + 1e-9
+
+    assert sketch.count == len(values)
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_quantile_sketch_merge():
+    a, b, whole = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for i in range(100):
+        (a if i % 2 == 0 else b).add(i)
+        whole.add(i)
+
+    a.merge(b)
+    assert a.count == whole.count
+    assert a.quantile(0.5) == whole.quantile(0.5)
+    assert a.min == 0
+    assert a.max == 99
+
+    with pytest.raises(ValueError):
+        a.merge(QuantileSketch(0.05))
+
+
+def test_stats():
+    first, second = Stats(slowest=2), Stats(slowest=2)
+    first.add_entry(
+        make_entry("http://a.example.com/1", time=10, size=100, response_headers=HTML)
+    )
+    first.add_entry(
+        make_entry("http://a.example.com/2", time=30, size=200, response_headers=HTML)
+    )
+    second.add_entry(
+        make_entry("http://b.example.com/1", time=20, size=300, response_headers=HTML)
+    )
+
+    stats = Stats.merged([first, second], slowest=2)
+    assert stats.requests == 3
+    assert stats.requests_by_domain == {"a.example.com": 2, "b.example.com": 1}
+    assert stats.bytes_by_mime_type == {"text/html": 600}
+    assert stats.slowest == [
+        (30, "http://a.example.com/2"),
+        (20, "http://b.example.com/1"),
+    ]
+    # phases which don't apply are not counted
+    assert stats.timings["dns"].count == 0
+    assert stats.timings["wait"].count == 3
+
+    summary = stats.summary([0.5])
+    assert summary["timings"]["time"]["p50"] == pytest.approx(20, rel=0.01)
+    assert summary["timings"]["dns"]["p50"] is None
@@ -0,0 +1,127 @@
+import base64
+import io
+import json
+import pathlib
+
+import pytest
+
+from playwright_har_tracer import dataclasses, streaming
+from playwright_har_tracer.body_store import SpoolBodyStore
+from playwright_har_tracer.streaming import HarWriter, iter_log, write_har
+
+path = pathlib.Path(__file__).parent / "./fixtures/test.har"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024 * 1024])
+def test_iter_log(chunk_size: int):
+    with open(path) as f:
+        expected = json.load(f)["log"]
+
+    with open(path) as f:
+        items = list(iter_log(f, chunk_size=chunk_size))
+
+    assert [v for k, v in items if k == "pages"] == expected["pages"]
+    assert [v for k, v in items if k == "entries"] == expected["entries"]
+    assert dict((k, v) for k, v in items if k not in ("pages", "entries")) == {
+        "version": expected["version"],
+        "creator": expected["creator"],
+        "browser": expected["browser"],
+    }
+
+
+def test_iter_log_with_numbers_at_chunk_boundaries():
+    data = '{"log": {"version": "1.2", "entries": [12345, 678], "pages": []}}'
+    items = list(iter_log(io.StringIO(data), chunk_size=2))
+    assert items == [("version", "1.2"), ("entries", 12345), ("entries", 678)]
+
+
+def test_iter_log_with_empty_arrays():
+    data = '{"log": {"pages": [], "entries": [ ]}, "extra": {"a": [1]}}'
+    assert list(iter_log(io.StringIO(data))) == []
+
+
+def test_iter_log_with_invalid_data():
+    with pytest.raises(ValueError):
+        list(iter_log(io.StringIO('["log"]')))
+
+
+def test_har_writer():
+    with open(path) as f:
+        expected = json.load(f)["log"]
+
+    fp = io.StringIO()
+    with HarWriter(
+        fp,
+        creator=dataclasses.har.Creator(name="foo", version="1.0"),
+        browser=expected["browser"],
+    ) as writer:
+        for page in expected["pages"]:
+            writer.add_page(page)
+        for entry in expected["entries"]:
+            writer.add_entry(entry)
+
+    assert writer.entries == len(expected["entries"])
+
+    log = json.loads(fp.getvalue())["log"]
+    assert log["version"] == "1.2"
+    assert log["creator"] == {"name": "foo", "version": "1.0"}
+    assert log["pages"] == expected["pages"]
+    assert log["entries"] == expected["entries"]
+
+
+def test_har_writer_without_entries():
+    fp = io.StringIO()
+    HarWriter(fp).close()
+    assert json.loads(fp.getvalue()) == {
+        "log": {"version": "1.2", "entries": [], "pages": []}
+    }
+
+
+def test_har_writer_with_body_store(tmp_path, monkeypatch):
+    # small chunks to check that they line up
+    monkeypatch.setattr(streaming, "BASE64_CHUNK_SIZE", 3)
+
+    store = SpoolBodyStore(tmp_path / "bodies.spool")
+    body = b"<html><body>foo</body></html>"
+
+    with open(path) as f:
+        entry = json.load(f)["log"]["entries"][0]
+    content = entry["response"]["content"]
+    content.pop("text", None)
+    content["_file"] = store.write(body, "text/html")
+
+    fp = io.StringIO()
+    with HarWriter(fp, body_store=store) as writer:
+        writer.add_entry(entry)
+        # entries without a stored body are written as they are
+        writer.add_entry({"response": {"content": {"size": 0}}})
+
+    entries = json.loads(fp.getvalue())["log"]["entries"]
+    written = entries[0]["response"]["content"]
+    assert "_file" not in written
+    assert written["encoding"] == "base64"
+    assert base64.b64decode(written["text"]) == body
+    assert entries[1] == {"response": {"content": {"size": 0}}}
+
+    # the added entry is left as it is
+    assert "text" not in content
+    store.close()
+
+
+def test_write_har(tmp_path):
+    with open(path) as f:
+        har = dataclasses.har.Har.from_dict(json.load(f))
+
+    store = SpoolBodyStore(tmp_path / "bodies.spool")
+    entry = har.log.entries[0]
+    entry.response.content.text = None
+    entry.response.content._file = store.write(b"foo")
+
+    fp = io.StringIO()
+    write_har(har, fp, body_store=store)
+
+    log = json.loads(fp.getvalue())["log"]
+    assert len(log["entries"]) == len(har.log.entries)
+    assert len(log["pages"]) == len(har.log.pages)
+    assert log["entries"][0]["response"]["content"]["text"] == "Zm9v"
+    store.close()
@@ -1,18 +1,39 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from types import SimpleNamespace
 from typing import Optional
+from urllib.parse import parse_qsl
 
 import pytest
 
 from playwright_har_tracer import dataclasses
 from playwright_har_tracer.utils import (
+    body_to_base64,
+    calculate_request_body_size,
     calculate_request_headers_size,
     calculate_response_headers_size,
+    calculate_time,
     datetime_to_millis,
+    finalize_page_timings,
+    form_data_to_params,
+    is_textual_mime_type,
     millis_to_roundish_millis,
+    multipart_to_params,
     normalize_http_version,
+    normalize_url,
     parse_cookie,
+    parse_http_date,
+    parse_query,
+    post_data_for_har,
     query_to_query_params,
+    run_body_task,
+    set_request_sizes,
+    set_sizes,
+    set_timings,
+    timing_to_timings,
 )
+from tests.utils import make_entry
 
 
 @pytest.mark.parametrize("input,expected", [(0.0, 0), (0.1, 0), (1.1, 1), (1.9, 1)])
@@ -30,6 +51,141 @@ def test_query_to_query_params():
     assert query_params == [dataclasses.har.QueryParameter(name="name", value="value")]
 
 
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        ("", []),
+        ("a=1&a=2", [("a", "1"), ("a", "2")]),
+        ("b=2&a=1&b=3", [("b", "2"), ("a", "1"), ("b", "3")]),
+        ("a=&b", [("a", ""), ("b", "")]),
+        ("q=foo+bar%21", [("q", "foo bar!")]),
+    ],
+)
+def test_query_to_query_params_keeps_order_and_duplicates(query: str, expected):
+    assert query_to_query_params(query) == [
+        dataclasses.har.QueryParameter(name=name, value=value)
+        for name, value in expected
+    ]
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["a=1&a=2", "&&a=%20b&c", "a+b=c+d&e=%E3%81%82&f==g", "x=%zz&%2B=%2b"],
+)
+def test_parse_query(query: str):
+    assert parse_query(query) == parse_qsl(query, keep_blank_values=True)
+
+
+def test_form_data_to_params():
+    assert form_data_to_params("foo=bar&baz=123&foo=") == [
+        dataclasses.har.Param(name="foo", value="bar"),
+        dataclasses.har.Param(name="baz", value="123"),
+        dataclasses.har.Param(name="foo", value=""),
+    ]
+    assert form_data_to_params("") == []
+
+
+MULTIPART_BODY = (
+    b"--boundary\r\n"
+    b'Content-Disposition: form-data; name="title"\r\n'
+    b"\r\n"
+    b"hello\r\n"
+    b"--boundary\r\n"
+    b'Content-Disposition: form-data; name="file"; filename="a \\"b\\".png"\r\n'
+    b"Content-Type: image/png\r\n"
+    b"\r\n"
+    b"\x89PNG\r\n\x1a\n\xff\r\n"
+    b"--boundary--\r\n"
+)
+
+
+def make_request(body: Optional[bytes], content_type: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        post_data_buffer=body, headers={"content-type": content_type}
+    )
+
+
+@pytest.mark.parametrize(
+    "mime_type,expected",
+    [
+        ("text/plain; charset=utf-8", True),
+        ("application/json", True),
+        ("application/vnd.api+json", True),
+        ("application/x-www-form-urlencoded", True),
+        ("application/octet-stream", False),
+        ("application/grpc-web+proto", False),
+        ("multipart/form-data; boundary=x", False),
+    ],
+)
+def test_is_textual_mime_type(mime_type: str, expected: bool):
+    assert is_textual_mime_type(mime_type) is expected
+
+
+def test_multipart_to_params():
+    assert multipart_to_params(MULTIPART_BODY, "boundary") == [
+        dataclasses.har.Param(name="title", value="hello"),
+        dataclasses.har.Param(
+            name="file", file_name='a "b".png', content_type="image/png"
+        ),
+    ]
+    assert multipart_to_params(b"", "boundary") == []
+
+
+def test_post_data_for_har_with_text():
+    request = make_request("caf\u00e9".encode(), "text/plain")
+    post_data = post_data_for_har(request)  # type: ignore
+    assert post_data is not None
+    assert post_data.text == "caf\u00e9"
+    assert post_data._encoding is None
+    assert calculate_request_body_size(request) == 5  # type: ignore
+
+
+def test_post_data_for_har_with_form_data():
+    request = make_request(b"foo=bar&baz=1", "application/x-www-form-urlencoded")
+    post_data = post_data_for_har(request)  # type: ignore
+    assert post_data is not None
+    assert post_data.text == "foo=bar&baz=1"
+    assert [param.name for param in post_data.params] == ["foo", "baz"]
+
+
+def test_post_data_for_har_with_binary():
+    request = make_request(b"\x00\x01\x02\x03", "application/octet-stream")
+
+    post_data = post_data_for_har(request)  # type: ignore
+    assert post_data is not None
+    assert post_data.text == ""
+
+    post_data = post_data_for_har(request, binary_post_data="base64")  # type: ignore
+    assert post_data is not None
+    assert post_data.text == "AAECAw=="
+    assert post_data._encoding == "base64"
+    assert post_data.to_dict()["_encoding"] == "base64"
+
+
+def test_post_data_for_har_with_max_post_data_size():
+    request = make_request(b"0123456789", "text/plain")
+    post_data = post_data_for_har(request, max_post_data_size=4)  # type: ignore
+    assert post_data is not None
+    assert post_data.text == "0123"
+    assert post_data.comment == "truncated to 4 of 10 bytes"
+
+    request = make_request(b"\x00\x01\x02\x03", "application/octet-stream")
+    post_data = post_data_for_har(
+        request, binary_post_data="base64", max_post_data_size=3  # type: ignore
+    )
+    assert post_data is not None
+    assert post_data.text == "AAEC"
+
+
+def test_post_data_for_har_with_multipart():
+    request = make_request(MULTIPART_BODY, "multipart/form-data; boundary=boundary")
+    post_data = post_data_for_har(request)  # type: ignore
+    assert post_data is not None
+    assert post_data.text == ""
+    assert [param.name for param in post_data.params] == ["title", "file"]
+    assert post_data.params[1].value is None
+
+
 def test_parse_cookie_with_max_age():
     cookie = parse_cookie("id=a3fWa; Max-Age=2592000")
     assert cookie.name == "id"
@@ -42,6 +198,29 @@ def test_parse_cookie_with_expires():
     assert cookie.expires < datetime.now(tz=timezone.utc)
 
 
+def test_parse_cookie_with_obsolete_expires():
+    # RFC 850 dates are handed over to dateutil
+    cookie = parse_cookie("id=a3fWa; Expires=Wednesday, 21-Oct-15 07:28:00 GMT")
+    assert cookie.expires == datetime(2015, 10, 21, 7, 28, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        (
+            "Wed, 21 Oct 2015 07:28:00 GMT",
+            datetime(2015, 10, 21, 7, 28, tzinfo=timezone.utc),
+        ),
+        ("Wednesday, 21-Oct-15 07:28:00 GMT", None),
+        ("Wed, 21 Foo 2015 07:28:00 GMT", None),
+        ("Wed, 31 Feb 2015 07:28:00 GMT", None),
+        ("Wed, 21 Oct 2015 07:28:00 +0900", None),
+    ],
+)
+def test_parse_http_date(value: str, expected: Optional[datetime]):
+    assert parse_http_date(value) == expected
+
+
 def test_parse_cookie_with_http_only():
     cookie = parse_cookie("id=a3fWa; HttpOnly")
     assert cookie.http_only is True
@@ -113,3 +292,173 @@ def test_calculate_response_headers_size():
         },
     )
     assert size == 380
+
+
+def test_set_request_sizes():
+    entry = make_entry()
+    set_request_sizes(
+        entry,
+        {
+            "requestBodySize": 0,
+            "requestHeadersSize": 120,
+            "responseBodySize": 1000,
+            "responseHeadersSize": 200,
+        },
+    )
+    assert entry.request.headers_size == 120
+    assert entry.request.body_size == 0
+    assert entry.response.headers_size == 200
+    assert entry.response.body_size == 1000
+    assert entry.response._transfer_size == 1200
+
+
+def test_set_sizes():
+    entry = make_entry()
+    entry.response.status_text = "OK"
+    set_sizes(entry, {"accept": "*/*"}, {"content-length": "1000"})
+    assert entry.request.headers_size == calculate_request_headers_size(
+        entry.request.method, entry.request.url, "HTTP/1.1", {"accept": "*/*"}
+    )
+    assert entry.response.headers_size == len(
+        "HTTP/1.1 200 OK\r\ncontent-length: 1000\r\n\r\n"
+    )
+    assert entry.response.body_size == 1000
+    assert entry.response._transfer_size == entry.response.headers_size + 1000
+
+    # without content-length the sizes on the wire are unknown
+    set_sizes(entry, {}, {})
+    assert entry.response.body_size == -1
+    assert entry.response._transfer_size == -1
+
+
+def test_timing_to_timings():
+    timings = timing_to_timings(
+        {
+            "startTime": 1000.0,
+            "domainLookupStart": 1.0,
+            "domainLookupEnd": 3.5,
+            "connectStart": 3.5,
+            "connectEnd": 10.0,
+            "secureConnectionStart": 5.0,
+            "requestStart": 10.5,
+            "responseStart": 20.0,
+            "responseEnd": 25.0,
+        }
+    )
+    assert timings.dns == 2
+    assert timings.connect == 6
+    assert timings.ssl == 5
+    assert timings.wait == 9
+    assert timings.receive == 5
+    assert calculate_time(timings) == 27
+
+
+def test_timing_to_timings_without_ssl():
+    timings = timing_to_timings(
+        {
+            "startTime": 1000.0,
+            "domainLookupStart": 1.0,
+            "domainLookupEnd": 3.5,
+            "connectStart": 3.5,
+            "connectEnd": 10.0,
+            "secureConnectionStart": -1,
+            "requestStart": 10.5,
+            "responseStart": 20.0,
+            "responseEnd": 25.0,
+        }
+    )
+    assert timings.connect == 6
+    assert timings.ssl == -1
+    assert calculate_time(timings) == 22
+
+
+def test_timing_to_timings_with_failed_request():
+    timings = timing_to_timings({"startTime": 1000.0})
+    assert timings.dns == -1
+    assert timings.wait == -1
+    assert timings.receive == -1
+
+
+def test_finalize_page_timings():
+    page = dataclasses.har.Page(
+        started_date_time=datetime(1970, 1, 1, 0, 0, 1, 0, tzinfo=timezone.utc),
+        id="page_0",
+        title="",
+        page_timings=dataclasses.har.PageTimings(on_content_load=1500, on_load=-1),
+    )
+    finalize_page_timings(page)
+    assert page.page_timings.on_content_load == 500.0
+    assert page.page_timings.on_load == -1
+
+
+def test_set_timings():
+    page = dataclasses.har.Page(
+        started_date_time=datetime(1970, 1, 1, 0, 0, 2, 0, tzinfo=timezone.utc),
+        id="page_0",
+        title="",
+        page_timings=dataclasses.har.PageTimings(),
+    )
+    entry = make_entry()
+
+    # a request started before the page moves the page start back
+    started = set_timings(page, entry, {"startTime": 1500.0, "responseStart": 10})
+    assert started == 1500.0
+    assert page.started_date_time == datetime(
+        1970, 1, 1, 0, 0, 1, 500000, tzinfo=timezone.utc
+    )
+
+    started = set_timings(page, entry, {"startTime": 1800.0}, started)
+    assert started == 1500.0
+    # a missing start time is ignored
+    assert set_timings(page, entry, {}, started) == 1500.0
+    assert page.started_date_time.tzinfo is timezone.utc
+
+
+def test_body_to_base64():
+    assert body_to_base64(b"foo") == "Zm9v"
+
+
+@pytest.mark.asyncio
+async def test_run_body_task():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        main_thread = threading.get_ident()
+
+        def thread_ident(body: bytes) -> int:
+            return threading.get_ident()
+
+        # below the threshold, it runs inline
+        ident = await run_body_task(
+            thread_ident, b"foo", executor=executor, inline_threshold=1024
+        )
+        assert ident == main_thread
+
+        ident = await run_body_task(
+            thread_ident, b"foo", executor=executor, inline_threshold=1
+        )
+        assert ident != main_thread
+
+        # blocking calls never run inline, whatever the size of the body
+        ident = await run_body_task(
+            thread_ident,
+            b"foo",
+            executor=executor,
+            inline_threshold=1024,
+            blocking=True,
+        )
+        assert ident != main_thread
+
+    # without an executor, only blocking calls leave the event loop
+    assert await run_body_task(thread_ident, b"foo") == main_thread
+    assert await run_body_task(thread_ident, b"foo", blocking=True) != main_thread
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        ("HTTP://Example.com:80/a?b=2&a=1#top", "http://example.com/a?a=1&b=2"),
+        ("https://example.com:8443", "https://example.com:8443/"),
+        ("http://[::1]:8080/", "http://[::1]:8080/"),
+    ],
+)
+def test_normalize_url(url: str, expected: str):
+    assert normalize_url(url) == expected
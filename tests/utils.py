@@ -1,9 +1,12 @@
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Tuple
+from datetime import datetime, timezone
+from typing import AsyncGenerator, Dict, Optional, Tuple
+from urllib.parse import urlparse
 
 from playwright.async_api import Page, async_playwright
 
-from playwright_har_tracer import HarTracer
+from playwright_har_tracer import HarTracer, dataclasses
+from playwright_har_tracer.utils import query_to_query_params, set_headers
 
 
 @asynccontextmanager
@@ -22,3 +25,54 @@ async def page_with_har_tracer() -> AsyncGenerator[Tuple[Page, HarTracer], None]
         finally:
             await context.close()
             await browser.close()
+
+
+def make_entry(
+    url: str = "http://example.com",
+    *,
+    method: str = "GET",
+    status: int = 200,
+    request_headers: Optional[Dict[str, str]] = None,
+    response_headers: Optional[Dict[str, str]] = None,
+    post_data: Optional[str] = None,
+    text: Optional[str] = None,
+    size: int = -1,
+    time: float = -1,
+) -> dataclasses.har.Entry:
+    entry = dataclasses.har.Entry(
+        started_date_time=datetime.now(timezone.utc),
+        time=time,
+        request=dataclasses.har.Request(
+            method=method,
+            url=url,
+            http_version="HTTP/1.1",
+            cookies=[],
+            headers=[],
+            query_string=query_to_query_params(urlparse(url).query),
+            headers_size=-1,
+            body_size=0,
+        ),
+        response=dataclasses.har.Response(
+            status=status,
+            status_text="",
+            http_version="HTTP/1.1",
+            cookies=[],
+            headers=[],
+            content=dataclasses.har.Content(size=size, text=text),
+            headers_size=-1,
+            body_size=-1,
+            redirect_url="",
+        ),
+        cache=dataclasses.har.Cache(),
+        timings=dataclasses.har.Timings(send=-1, wait=time, receive=-1),
+    )
+
+    if request_headers is not None or response_headers is not None:
+        set_headers(entry, request_headers or {}, response_headers or {})
+
+    if post_data is not None:
+        entry.request.post_data = dataclasses.har.PostData(
+            mime_type="application/json", params=[], text=post_data
+        )
+
+    return entry